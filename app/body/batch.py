@@ -0,0 +1,70 @@
+from fastapi import HTTPException, Request, status
+from pydantic import TypeAdapter, ValidationError
+from dotenv import load_dotenv
+import json
+import os
+
+load_dotenv()
+MAX_BATCH_SIZE = int(os.getenv("MAX_BATCH_SIZE", "1000"))
+
+NDJSON_TYPES = ("application/x-ndjson", "application/ndjson", "application/jsonl")
+
+
+async def batch_body(request: Request) -> list:
+    """Read a JSON array, or one JSON object per line for NDJSON uploads."""
+    raw = await request.body()
+    content_type = request.headers.get("content-type", "").split(";")[0].strip()
+    try:
+        if content_type in NDJSON_TYPES:
+            items = [json.loads(line) for line in raw.splitlines() if line.strip()]
+        else:
+            items = json.loads(raw)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="malformed batch body")
+    if not isinstance(items, list):
+        raise HTTPException(status_code=400, detail="batch body must be a list")
+    if not items:
+        raise HTTPException(status_code=400, detail="batch is empty")
+    if len(items) > MAX_BATCH_SIZE:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"batch is limited to {MAX_BATCH_SIZE} items",
+        )
+    return items
+
+
+def validate_batch(adapter: TypeAdapter, items: list) -> tuple[dict, dict]:
+    """Validate the whole list in one pass and split it by item index.
+
+    Returns ``(valid, errors)``; both are keyed by the position in ``items``.
+    """
+    try:
+        return dict(enumerate(adapter.validate_python(items))), {}
+    except ValidationError as exc:
+        errors: dict[int, list] = {}
+        for error in exc.errors(include_url=False, include_context=False):
+            index, *loc = error["loc"]
+            errors.setdefault(index, []).append({"loc": loc, "msg": error["msg"]})
+    keep = [i for i in range(len(items)) if i not in errors]
+    valid = adapter.validate_python([items[i] for i in keep])
+    return dict(zip(keep, valid)), errors
+
+
+def batch_report(
+    total: int, created: dict, failed: dict, queued: dict | None = None
+) -> dict:
+    queued = queued or {}
+    results = []
+    for index in range(total):
+        if index in created:
+            results.append({"index": index, "status": "created", "id": created[index]})
+        elif index in queued:
+            results.append(
+                {"index": index, "status": "queued", "job_id": queued[index]}
+            )
+        else:
+            results.append({"index": index, "status": "failed", **failed[index]})
+    report = {"created": len(created), "failed": len(failed), "results": results}
+    if queued:
+        report["queued"] = len(queued)
+    return report
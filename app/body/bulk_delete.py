@@ -0,0 +1,99 @@
+from sqlalchemy import delete, select
+from sqlalchemy.orm import Session
+from app.database.config import SessionLocal
+from app.body.counters import FILTERED, track_rows
+from app.body.rollups import ROLLED_UP, track_rollups
+from app.models_sql import Calculate, CalculationJob, ClearJob
+from dotenv import load_dotenv
+from datetime import datetime, timedelta, timezone
+import logging
+import os
+import uuid
+
+load_dotenv()
+DELETE_CHUNK_SIZE = int(os.getenv("DELETE_CHUNK_SIZE", "5000"))
+CLEAR_JOB_TTL = float(os.getenv("CLEAR_JOB_TTL", "3600"))
+
+# columns of other tables pointing at deleted rows, cleared in the same chunk
+REFERENCES = {Calculate: (CalculationJob.calculation_id,)}
+
+
+def delete_chunk(
+    db: Session, model, chunk_size: int = DELETE_CHUNK_SIZE, job: ClearJob | None = None
+) -> int:
+    names = dict.fromkeys((*ROLLED_UP.get(model, ()), *FILTERED.get(model, ())))
+    columns = [getattr(model, name) for name in names]
+    rows = db.execute(
+        select(model.id, *columns).order_by(model.id).limit(chunk_size)
+    ).all()
+    if not rows:
+        return 0
+    rows = [row._asdict() for row in rows]
+    last = rows[-1]["id"]
+    track_rows(db, model, rows, sign=-1)
+    for column in REFERENCES.get(model, ()):
+        db.query(column.class_).filter(column <= last).update(
+            {column: None}, synchronize_session=False
+        )
+    db.query(model).filter(model.id <= last).delete(synchronize_session=False)
+    if model in ROLLED_UP:
+        # removed bounds are read again from the rows left behind
+        track_rollups(db, rows, sign=-1)
+    if job is not None:
+        job.deleted += len(rows)
+    db.commit()
+    return len(rows)
+
+
+def delete_all(
+    db: Session, model, chunk_size: int = DELETE_CHUNK_SIZE, job: ClearJob | None = None
+) -> int:
+    """Delete every row of ``model`` in chunks, committing after each one."""
+    deleted = 0
+    while removed := delete_chunk(db, model, chunk_size, job):
+        deleted += removed
+    return deleted
+
+
+def clear_job_view(job: ClearJob) -> dict:
+    return {
+        "job_id": job.id,
+        "table": job.table_name,
+        "status": job.status,
+        "deleted": job.deleted,
+        "error": job.error,
+    }
+
+
+def start_clear_job(db: Session, model) -> dict:
+    """Record a pending clear job, pruning those finished over CLEAR_JOB_TTL ago."""
+    expired = datetime.now(timezone.utc) - timedelta(seconds=CLEAR_JOB_TTL)
+    db.execute(delete(ClearJob).where(ClearJob.finished_at < expired))
+    job = ClearJob(id=uuid.uuid4().hex, table_name=model.__tablename__, deleted=0)
+    db.add(job)
+    db.commit()
+    return clear_job_view(job)
+
+
+def clear_job_status(db: Session, job_id: str) -> dict | None:
+    job = db.get(ClearJob, job_id)
+    return clear_job_view(job) if job is not None else None
+
+
+def run_clear_job(job_id: str, model):
+    db = SessionLocal()
+    try:
+        job = db.get(ClearJob, job_id)
+        job.status = "running"
+        db.commit()
+        try:
+            delete_all(db, model, job=job)
+            job.status = "done"
+        except Exception as exc:
+            db.rollback()
+            logging.exception("clear job %s failed", job_id)
+            job.status, job.error = "failed", str(exc)
+        job.finished_at = datetime.now(timezone.utc)
+        db.commit()
+    finally:
+        db.close()
@@ -0,0 +1,114 @@
+import numpy as np
+import warnings
+from fastapi import HTTPException
+from app.body.expressions import compile_expression
+
+
+def parse_numbers(numbers: str) -> np.ndarray:
+    """Parse ``"1, 2.5,3"`` straight into a float64 array.
+
+    Older NumPy only warns when ``fromstring`` stops at bad data, so the
+    warning is raised too. Blank input (which ``fromstring`` reads as
+    ``[-1.0]``) and a trailing comma stay errors, as do nan and inf.
+    """
+    if not numbers.strip() or numbers.rstrip().endswith(","):
+        raise HTTPException(
+            status_code=400, detail="numbers must be comma separated values"
+        )
+    try:
+        with warnings.catch_warnings():
+            warnings.simplefilter("error", DeprecationWarning)
+            values = np.fromstring(numbers, dtype=np.float64, sep=",")
+    except (ValueError, DeprecationWarning):
+        values = None
+    if values is None or not values.size:
+        raise HTTPException(
+            status_code=400, detail="numbers must be comma separated values"
+        )
+    if not np.isfinite(values).all():
+        raise HTTPException(status_code=400, detail="numbers must be finite")
+    return values
+
+
+def pack_numbers(values: np.ndarray) -> bytes:
+    """Little-endian float64 bytes, the stored form of a calculation's numbers."""
+    return np.asarray(values, dtype="<f8").tobytes()
+
+
+def unpack_numbers(blob: bytes) -> np.ndarray:
+    """Read stored numbers back without copying them."""
+    return np.frombuffer(blob, dtype="<f8")
+
+
+def format_numbers(values: np.ndarray) -> str:
+    """Render numbers in the comma separated form the API accepts."""
+    return ",".join(
+        str(int(value)) if value.is_integer() and abs(value) < 2**53 else repr(value)
+        for value in values.tolist()
+    )
+
+
+def _check_sqrt(values: np.ndarray):
+    if (values < 0).any():
+        raise HTTPException(
+            status_code=400, detail="Cannot take the sqrt of a negative number"
+        )
+
+
+def _divide(values: np.ndarray) -> float:
+    if (values[1:] == 0).any():
+        raise HTTPException(status_code=400, detail="Cannot divide by zero")
+    return np.divide.reduce(values)
+
+
+def _product(values: np.ndarray) -> float:
+    with np.errstate(over="raise"):
+        try:
+            return np.multiply.reduce(values)
+        except FloatingPointError:
+            raise HTTPException(
+                status_code=400, detail="product overflows a 64-bit float"
+            )
+
+
+def _sqrt(values: np.ndarray) -> float:
+    _check_sqrt(values[:1])
+    return np.sqrt(values[0])
+
+
+def _sqrt_each(values: np.ndarray) -> np.ndarray:
+    _check_sqrt(values)
+    return np.sqrt(values)
+
+
+# scalar operations reduce the whole list to one number; the rest return a
+# value per input number
+OPERATIONS = {
+    "add": np.sum,
+    "minus": np.subtract.reduce,
+    "times": _product,
+    "product": _product,
+    "divide": _divide,
+    "sqrt": _sqrt,
+    "mean": np.mean,
+    "std": np.std,
+    "min": np.min,
+    "max": np.max,
+}
+ELEMENTWISE = {"sqrt_each": _sqrt_each}
+
+
+def calculate(operation: str, values: np.ndarray) -> float | list[float]:
+    """Run a named operation, or evaluate ``operation`` as an expression."""
+    if operation in OPERATIONS:
+        with np.errstate(over="ignore"):
+            result = float(OPERATIONS[operation](values))
+    elif operation in ELEMENTWISE:
+        result = ELEMENTWISE[operation](values).tolist()
+    elif operation.isidentifier() and len(operation) > 1:
+        raise HTTPException(status_code=400, detail="unsupported operation")
+    else:
+        result = compile_expression(operation)(values)
+    if not np.isfinite(result).all():
+        raise HTTPException(status_code=400, detail="result overflows a 64-bit float")
+    return result
@@ -0,0 +1,327 @@
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from app.database.config import SessionLocal
+from app.body.calc_engine import parse_numbers
+from app.body.concurrency import off_loop
+from app.body.result_cache import result_cache
+
+# write hooks, for workers without the API
+from app.body import counters, entity_cache, rollups, versions
+from app.models_sql import Calculate, CalculationJob
+from fastapi import HTTPException
+from dotenv import load_dotenv
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from threading import Event, Lock, Thread
+import json
+import logging
+import os
+import sqlite3
+import time
+import uuid
+
+load_dotenv()
+CALC_JOB_BROKER = os.getenv("CALC_JOB_BROKER", "memory")
+CALC_JOB_THRESHOLD = int(os.getenv("CALC_JOB_THRESHOLD", "100000"))
+CALC_JOB_WORKERS = int(os.getenv("CALC_JOB_WORKERS", "2"))
+CALC_JOB_QUEUE_PATH = os.getenv("CALC_JOB_QUEUE_PATH", "calc_jobs.db")
+CALC_JOB_POLL_SECONDS = float(os.getenv("CALC_JOB_POLL_SECONDS", "1"))
+CALC_JOB_LEASE_SECONDS = float(os.getenv("CALC_JOB_LEASE_SECONDS", "60"))
+CALC_JOB_MAX_ATTEMPTS = int(os.getenv("CALC_JOB_MAX_ATTEMPTS", "3"))
+CELERY_BROKER_URL = os.getenv("CELERY_BROKER_URL", "redis://localhost:6379/0")
+
+
+def operand_count(numbers: str) -> int:
+    """Count the numbers without parsing them, so sizing a request is cheap."""
+    return numbers.count(",") + 1
+
+
+def run_job(job_id: str):
+    """Evaluate a job and store its ``Calculate`` row.
+
+    A ``running`` job is run again: it was claimed by a worker that died
+    before finishing, and the broker has handed it over.
+    """
+    db = SessionLocal()
+    try:
+        job = db.get(CalculationJob, job_id)
+        if job is None or job.status not in ("pending", "running"):
+            return
+        job.status = "running"
+        db.commit()
+        try:
+            values = parse_numbers(job.numbers)
+            result, result_id = result_cache.evaluate(db, job.operation, values)
+        except HTTPException as exc:
+            job.status, job.error = "failed", exc.detail
+        else:
+            now = datetime.now(timezone.utc)
+            calc = Calculate(
+                mathematician_id=job.mathematician_id,
+                mathematician=job.mathematician,
+                operation=job.operation,
+                numbers=values,
+                result=result if isinstance(result, float) else None,
+                result_id=result_id,
+                time_of_calculation=now,
+            )
+            db.add(calc)
+            db.flush()
+            job.status = "done"
+            # with the results table on the job points at the stored result
+            job.result = None if result_id is not None else json.dumps(result)
+            job.calculation_id = calc.id
+        job.finished_at = datetime.now(timezone.utc)
+        db.commit()
+    except Exception as exc:
+        db.rollback()
+        logging.exception("calculation job %s failed", job_id)
+        fail_job(job_id, str(exc))
+    finally:
+        db.close()
+
+
+def fail_job(job_id: str, error: str):
+    with SessionLocal() as db:
+        db.query(CalculationJob).filter(CalculationJob.id == job_id).update(
+            {
+                "status": "failed",
+                "error": error,
+                "finished_at": datetime.now(timezone.utc),
+            }
+        )
+        db.commit()
+
+
+class ThreadBroker:
+    """Runs jobs on a thread pool in the API process.
+
+    Jobs still queued when the process exits stay ``pending``.
+    """
+
+    def __init__(self, workers: int = CALC_JOB_WORKERS):
+        self.pool = ThreadPoolExecutor(
+            max_workers=max(workers, 1), thread_name_prefix="calc-job"
+        )
+
+    def submit(self, job_id: str):
+        self.pool.submit(run_job, job_id)
+
+    def start(self):
+        pass
+
+    def stop(self):
+        self.pool.shutdown(wait=False)
+
+
+class SQLiteBroker:
+    """Queue kept in a SQLite file.
+
+    Jobs survive restarts, and worker processes on the same host
+    (``python -m app.body.calc_jobs``) can share the queue with the API,
+    which runs ``workers`` threads of its own. A claimed job stays queued
+    under a lease its worker keeps renewing, and leaves the queue once
+    ``run_job`` is done; the job of a worker that died is claimed again
+    when the lease runs out, up to ``max_attempts`` times.
+    """
+
+    def __init__(
+        self,
+        path: str = CALC_JOB_QUEUE_PATH,
+        workers: int = CALC_JOB_WORKERS,
+        poll: float = CALC_JOB_POLL_SECONDS,
+        lease: float = CALC_JOB_LEASE_SECONDS,
+        max_attempts: int = CALC_JOB_MAX_ATTEMPTS,
+    ):
+        self.path = path
+        self.workers = workers
+        self.poll = poll
+        self.lease = lease
+        self.max_attempts = max_attempts
+        self.stopped = Event()
+        self.wakeup = Event()
+        self._threads: list[Thread] = []
+        self._lock = Lock()
+        conn = self._connect()
+        try:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS calculation_queue (job_id TEXT PRIMARY KEY)"
+            )
+            columns = {
+                row[1] for row in conn.execute("PRAGMA table_info(calculation_queue)")
+            }
+            if "leased_until" not in columns:
+                conn.execute(
+                    "ALTER TABLE calculation_queue ADD COLUMN leased_until REAL"
+                )
+            if "attempts" not in columns:
+                conn.execute(
+                    "ALTER TABLE calculation_queue "
+                    "ADD COLUMN attempts INTEGER NOT NULL DEFAULT 0"
+                )
+        finally:
+            conn.close()
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path, timeout=30, isolation_level=None)
+
+    def _execute(self, sql: str, params: tuple = ()) -> list:
+        conn = self._connect()
+        try:
+            return conn.execute(sql, params).fetchall()
+        finally:
+            conn.close()
+
+    def submit(self, job_id: str):
+        self._execute(
+            "INSERT OR IGNORE INTO calculation_queue (job_id) VALUES (?)", (job_id,)
+        )
+        self.start()
+        self.wakeup.set()
+
+    def claim(self) -> tuple[str, int] | None:
+        """Lease the oldest job nobody holds, or whose lease has run out."""
+        now = time.time()
+        rows = self._execute(
+            "UPDATE calculation_queue SET leased_until = ?, attempts = attempts + 1 "
+            "WHERE rowid = (SELECT min(rowid) FROM calculation_queue "
+            "WHERE leased_until IS NULL OR leased_until < ?) "
+            "RETURNING job_id, attempts",
+            (now + self.lease, now),
+        )
+        return tuple(rows[0]) if rows else None
+
+    def renew(self, job_id: str):
+        self._execute(
+            "UPDATE calculation_queue SET leased_until = ? WHERE job_id = ?",
+            (time.time() + self.lease, job_id),
+        )
+
+    def finish(self, job_id: str):
+        self._execute("DELETE FROM calculation_queue WHERE job_id = ?", (job_id,))
+
+    def _hold(self, job_id: str, done: Event):
+        while not done.wait(self.lease / 3):
+            try:
+                self.renew(job_id)
+            except sqlite3.Error:
+                logging.exception("could not renew the lease of job %s", job_id)
+
+    def work(self):
+        while not self.stopped.is_set():
+            claimed = self.claim()
+            if claimed is None:
+                self.wakeup.wait(self.poll)
+                self.wakeup.clear()
+                continue
+            job_id, attempts = claimed
+            if attempts > self.max_attempts:
+                fail_job(job_id, f"abandoned by {attempts - 1} workers")
+                self.finish(job_id)
+                continue
+            done = Event()
+            Thread(target=self._hold, args=(job_id, done), daemon=True).start()
+            try:
+                run_job(job_id)
+            finally:
+                done.set()
+            self.finish(job_id)
+
+    def start(self):
+        with self._lock:
+            if self._threads or self.workers < 1:
+                return
+            self._threads = [
+                Thread(target=self.work, name=f"calc-job-{index}", daemon=True)
+                for index in range(self.workers)
+            ]
+        for thread in self._threads:
+            thread.start()
+
+    def stop(self):
+        self.stopped.set()
+        self.wakeup.set()
+
+
+class CeleryBroker:
+    """Hands job ids to Celery workers.
+
+    Run them with ``celery -A app.body.calc_jobs:celery_app worker``.
+    """
+
+    def __init__(self, url: str = CELERY_BROKER_URL):
+        from celery import Celery
+
+        self.app = Celery("calculations", broker=url)
+        self.task = self.app.task(name="calculations.run_job")(run_job)
+
+    def submit(self, job_id: str):
+        self.task.delay(job_id)
+
+    def start(self):
+        pass
+
+    def stop(self):
+        pass
+
+
+def build_broker(name: str = CALC_JOB_BROKER):
+    if name == "celery":
+        return CeleryBroker()
+    if name == "sqlite":
+        return SQLiteBroker()
+    return ThreadBroker()
+
+
+job_broker = build_broker()
+celery_app = getattr(job_broker, "app", None)
+
+
+def enqueue(db: Session, **fields) -> str:
+    """Store a pending job and hand it to the broker, returning its id."""
+    return enqueue_all(db, [fields])[0]
+
+
+def enqueue_all(db: Session, jobs: list[dict]) -> list[str]:
+    """Store pending jobs in one commit, then hand them to the broker."""
+    job_ids = [uuid.uuid4().hex for _ in jobs]
+    db.add_all(
+        CalculationJob(id=job_id, status="pending", **fields)
+        for job_id, fields in zip(job_ids, jobs)
+    )
+    db.commit()
+    off_loop(submit_all, job_ids)
+    return job_ids
+
+
+def submit_all(job_ids: list[str]):
+    for job_id in job_ids:
+        job_broker.submit(job_id)
+
+
+def job_result(db: Session, job: CalculationJob):
+    if job.result is not None:
+        return json.loads(job.result)
+    if job.calculation_id is None:
+        return None
+    result_id = db.scalar(
+        select(Calculate.result_id).where(Calculate.id == job.calculation_id)
+    )
+    return result_cache.stored(db, result_id) if result_id is not None else None
+
+
+def job_view(db: Session, job: CalculationJob) -> dict:
+    return {
+        "job_id": job.id,
+        "status": job.status,
+        "operation": job.operation,
+        "result": job_result(db, job),
+        "error": job.error,
+        "calculation_id": job.calculation_id,
+        "created_at": job.created_at,
+        "finished_at": job.finished_at,
+    }
+
+
+if __name__ == "__main__":
+    SQLiteBroker(workers=0).work()
@@ -0,0 +1,16 @@
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.util import await_only
+from sqlalchemy.util.concurrency import in_greenlet
+
+
+def off_loop(func, *args, **kwargs):
+    """Call blocking ``func``, on a worker thread when inside an async route.
+
+    Async routes run the sync handlers through ``AsyncSession.run_sync``, on
+    the event loop thread. There ``func`` is awaited from the handler's
+    greenlet, so the loop keeps serving other requests meanwhile; anywhere
+    else it is simply called.
+    """
+    if in_greenlet():
+        return await_only(run_in_threadpool(func, *args, **kwargs))
+    return func(*args, **kwargs)
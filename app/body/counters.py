@@ -0,0 +1,121 @@
+from sqlalchemy import delete, event, func, inspect, select, text
+from sqlalchemy.orm import Session
+from app.models_sql import Task, Calculate, Market, RowCounter
+
+COUNTED = (Task, Calculate, Market)
+# per-value totals, for columns with a handful of values only; one key per
+# distinct operation or trade would grow without bound
+FILTERED = {Task: ("complete",)}
+
+_UPSERT = text(
+    "INSERT INTO row_counters (key, value) VALUES (:key, :delta) "
+    "ON CONFLICT (key) DO UPDATE SET value = row_counters.value + :delta"
+)
+
+
+def counter_key(model, **filters) -> str:
+    key = model.__tablename__
+    for name, value in sorted(filters.items()):
+        key += f":{name}={value}"
+    return key
+
+
+def counted_keys(model, values: dict) -> list[str]:
+    """The table's key and one per filtered column, for a row with ``values``."""
+    return [counter_key(model)] + [
+        counter_key(model, **{name: values.get(name)})
+        for name in FILTERED.get(model, ())
+    ]
+
+
+def counters_connection(session: Session, model):
+    return session.connection(bind_arguments={"mapper": inspect(model)})
+
+
+def bump(session: Session, model, deltas: dict):
+    conn = counters_connection(session, model)
+    for key, delta in deltas.items():
+        if delta:
+            conn.execute(_UPSERT, {"key": key, "delta": delta})
+
+
+def _add(deltas: dict, model, values: dict, sign: int):
+    for key in counted_keys(model, values):
+        deltas[key] = deltas.get(key, 0) + sign
+
+
+def track_rows(session: Session, model, rows: list, sign: int = 1):
+    """Count rows written or removed without the ORM unit of work.
+
+    ``rows`` are dicts holding at least the model's FILTERED columns.
+    """
+    deltas = {}
+    for values in rows:
+        _add(deltas, model, values, sign)
+    bump(session, model, deltas)
+
+
+def _values(obj, names) -> dict:
+    return {name: getattr(obj, name) for name in names}
+
+
+@event.listens_for(Session, "after_flush")
+def _count_flushed_rows(session: Session, flush_context):
+    deltas = {model: {} for model in COUNTED}
+    for sign, objects in ((1, session.new), (-1, session.deleted)):
+        for obj in objects:
+            model = type(obj)
+            if model in deltas:
+                _add(deltas[model], model, _values(obj, FILTERED.get(model, ())), sign)
+    for obj in session.dirty:
+        model = type(obj)
+        for name in FILTERED.get(model, ()):
+            history = inspect(obj).attrs[name].history
+            if not history.has_changes():
+                continue
+            old = (history.deleted or [None])[0]
+            for value, sign in ((old, -1), (getattr(obj, name), 1)):
+                key = counter_key(model, **{name: value})
+                deltas[model][key] = deltas[model].get(key, 0) + sign
+    for model, model_deltas in deltas.items():
+        bump(session, model, model_deltas)
+
+
+def row_count(db: Session, model, exact: bool = False, **filters) -> int:
+    """Rows of ``model``, optionally narrowed by FILTERED columns.
+
+    ``exact`` counts with ``COUNT(*)`` instead of reading the counter.
+    """
+    if exact:
+        query = select(func.count()).select_from(model.__table__)
+        for name, value in filters.items():
+            query = query.where(getattr(model, name) == value)
+        return counters_connection(db, model).execute(query).scalar()
+    value = counters_connection(db, model).execute(
+        select(RowCounter.value).where(RowCounter.key == counter_key(model, **filters))
+    )
+    return value.scalar() or 0
+
+
+def reset_counters(db: Session, model):
+    """Drop the table's counters, per-value ones included."""
+    counters_connection(db, model).execute(
+        delete(RowCounter).where(
+            (RowCounter.key == counter_key(model))
+            | RowCounter.key.like(f"{model.__tablename__}:%")
+        )
+    )
+
+
+def rebuild_counters(db: Session, model):
+    reset_counters(db, model)
+    conn = counters_connection(db, model)
+    total = conn.execute(select(func.count()).select_from(model.__table__))
+    deltas = {counter_key(model): total.scalar()}
+    for name in FILTERED.get(model, ()):
+        column = getattr(model, name)
+        for value, count in conn.execute(
+            select(column, func.count()).select_from(model.__table__).group_by(column)
+        ):
+            deltas[counter_key(model, **{name: value})] = count
+    bump(db, model, deltas)
@@ -1,10 +1,14 @@
 from datetime import timedelta, datetime
 from jose import jwt
 from passlib.context import CryptContext
-from fastapi import HTTPException
+from fastapi import HTTPException, status
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock
 from dotenv import load_dotenv
+import asyncio
 import os
 import hashlib
+import hmac
 
 load_dotenv()
 SECRET_KEY = os.getenv("SECRET_KEY")
@@ -17,9 +21,63 @@ ACCESS_TOKEN_EXPIRE_MINUTES = os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES")
 if not ACCESS_TOKEN_EXPIRE_MINUTES:
     raise RuntimeError("ACCESS_TOKEN_EXPIRE_MINUTES is missing or not loaded from .env")
 
+ARGON2_WORKERS = int(os.getenv("ARGON2_WORKERS", str(os.cpu_count() or 2)))
+ARGON2_QUEUE_SIZE = int(os.getenv("ARGON2_QUEUE_SIZE", "64"))
+
 pwd_context = CryptContext(schemes=["argon2"], deprecated="auto")
 
 
+class HashingPool:
+    """Runs Argon2 work on dedicated threads; argon2-cffi releases the GIL.
+
+    At most ``workers + queue_size`` jobs are admitted at once, anything
+    beyond that is rejected with 503 instead of piling up.
+    """
+
+    def __init__(
+        self, workers: int = ARGON2_WORKERS, queue_size: int = ARGON2_QUEUE_SIZE
+    ):
+        self.workers = workers
+        self.capacity = workers + queue_size
+        self.pending = 0
+        self.rejected = 0
+        self._lock = Lock()
+        self._executor = ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="argon2"
+        )
+
+    async def run(self, func, *args):
+        with self._lock:
+            if self.pending >= self.capacity:
+                self.rejected += 1
+                raise HTTPException(
+                    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                    detail="authentication is busy, try again shortly",
+                    headers={"Retry-After": "1"},
+                )
+            self.pending += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, func, *args)
+        finally:
+            with self._lock:
+                self.pending -= 1
+
+    def shutdown(self):
+        self._executor.shutdown(wait=True)
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.workers,
+            "capacity": self.capacity,
+            "pending": self.pending,
+            "rejected": self.rejected,
+        }
+
+
+hashing_pool = HashingPool()
+
+
 def verify_password(plain_password: str, hashed_password: str):
     return pwd_context.verify(plain_password, hashed_password)
 
@@ -49,7 +107,35 @@ def get_hashed_secret(secret: str):
 
 
 def get_fingerprint(secret: str) -> str:
-    return hashlib.sha256(secret.encode()).hexdigest()
+    return hmac.new(SECRET_KEY.encode(), secret.encode(), hashlib.sha256).hexdigest()
+
+
+async def verify_password_async(plain_password: str, hashed_password: str):
+    return await hashing_pool.run(verify_password, plain_password, hashed_password)
+
+
+async def hash_password_async(password: str):
+    if len(password) < 8:
+        raise HTTPException(
+            status_code=401, detail="weak password, should be morethan 7 letters"
+        )
+    return await hashing_pool.run(pwd_context.hash, password)
+
+
+async def verify_code_async(plain_code: int, hashed_code: str):
+    return await hashing_pool.run(verify_code, plain_code, hashed_code)
+
+
+async def get_hashed_code_async(code: int) -> str:
+    return await hashing_pool.run(get_hashed_code, code)
+
+
+async def verify_secret_async(plain_secret: str, hashed_secret: str):
+    return await hashing_pool.run(verify_secret, plain_secret, hashed_secret)
+
+
+async def get_hashed_secret_async(secret: str):
+    return await hashing_pool.run(get_hashed_secret, secret)
 
 
 def create_access_token(data: dict, expires_delta: timedelta | None = None):
@@ -1,6 +1,41 @@
-from app.database.config import SessionLocal
+from app.database.config import SessionLocal, AsyncSessionLocal
+from app.database.replicas import (
+    READ_YOUR_WRITES_SECONDS,
+    async_replica_session,
+    replica_session,
+)
+from app.body import counters  # registers the row counter flush hook
+from app.body import rollups  # registers the calculation rollup flush hook
+from app.body import versions  # registers the table version commit hooks
+from app.body.cache import TTLCache
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
-from fastapi import Depends
+from fastapi import Depends, Request
+import hashlib
+import time
+
+recent_writers = TTLCache(maxsize=100_000, ttl=READ_YOUR_WRITES_SECONDS)
+# carries the primary-read window to whichever worker serves the next read
+READ_PRIMARY_COOKIE = "read_primary_until"
+
+
+def client_key(request: Request) -> bytes:
+    identity = request.headers.get("authorization") or (
+        request.client.host if request.client else ""
+    )
+    return hashlib.sha256(identity.encode()).digest()
+
+
+def save_new(db: Session, obj) -> bool:
+    """Add and commit ``obj``; ``False`` when a unique constraint refuses it."""
+    db.add(obj)
+    try:
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        return False
+    db.refresh(obj)
+    return True
 
 
 def get_db():
@@ -9,3 +44,76 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+def mark_writer(request: Request):
+    """Flag the request; ``read_your_writes`` opens the window once it is answered."""
+    request.state.wrote = True
+
+
+async def read_your_writes(request: Request, call_next):
+    """Middleware opening a writer's read-your-writes window.
+
+    The in-process marker covers this worker, the cookie any other. It goes
+    on whatever response the route returned, its own ``Response`` objects
+    included, and the window starts once the write is done.
+    """
+    response = await call_next(request)
+    if getattr(request.state, "wrote", False):
+        recent_writers.set(client_key(request), True)
+        until = time.time() + READ_YOUR_WRITES_SECONDS
+        response.set_cookie(
+            READ_PRIMARY_COOKIE,
+            f"{until:.3f}",
+            max_age=max(int(READ_YOUR_WRITES_SECONDS), 1),
+            httponly=True,
+            samesite="lax",
+        )
+    return response
+
+
+def get_write_db(request: Request):
+    mark_writer(request)
+    yield from get_db()
+
+
+def wrote_recently(request: Request) -> bool:
+    try:
+        until = float(request.cookies.get(READ_PRIMARY_COOKIE, 0))
+    except ValueError:
+        until = 0
+    # the cookie only ever moves reads onto the primary, so trusting it is safe
+    return time.time() < until or bool(recent_writers.get(client_key(request)))
+
+
+def get_read_db(request: Request):
+    db = None
+    if not wrote_recently(request):
+        db = replica_session()
+    if db is None:
+        db = SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+async def get_async_write_db(request: Request):
+    mark_writer(request)
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+async def get_async_read_db(request: Request):
+    db = None
+    if not wrote_recently(request):
+        db = async_replica_session()
+    if db is None:
+        db = AsyncSessionLocal()
+    async with db:
+        yield db
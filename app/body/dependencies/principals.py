@@ -0,0 +1,8 @@
+from sqlalchemy.orm import Session
+
+
+def principal_id(db: Session, model, name_column, payload: dict) -> int | None:
+    uid = payload.get("uid")
+    if uid is not None:
+        return uid
+    return db.query(model.id).filter(name_column == payload.get("sub")).scalar()
@@ -0,0 +1,351 @@
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session, ORMExecuteState
+from app.body.cache import TTLCache
+from app.body.concurrency import in_greenlet, off_loop
+from app.body.versions import commit_listeners, table_version
+from app.database.config import SessionLocal
+from app.models_sql import Task, Calculate, Market
+from dotenv import load_dotenv
+from threading import Event, Lock
+import asyncio
+import os
+import time
+
+load_dotenv()
+ENTITY_CACHE_BACKEND = os.getenv("ENTITY_CACHE_BACKEND", "memory")
+ENTITY_CACHE_URL = os.getenv("ENTITY_CACHE_URL", "redis://localhost:6379/0")
+ENTITY_CACHE_SIZE = int(os.getenv("ENTITY_CACHE_SIZE", "10000"))
+ENTITY_CACHE_TTL = float(os.getenv("ENTITY_CACHE_TTL", "60"))
+ENTITY_CACHE_NEGATIVE_TTL = float(os.getenv("ENTITY_CACHE_NEGATIVE_TTL", "5"))
+ENTITY_CACHE_WAIT = float(os.getenv("ENTITY_CACHE_WAIT", "5"))
+ENTITY_CACHE_VERSION_SECONDS = float(os.getenv("ENTITY_CACHE_VERSION_SECONDS", "1"))
+
+# the column each cached lookup is keyed by
+ENTITY_KEYS = {Task: "id", Calculate: "id", Market: "section"}
+
+NOT_FOUND = b"\x00"
+TOMBSTONE = b"\x01"
+
+
+def _milliseconds(seconds: float) -> int:
+    return max(int(seconds * 1000), 1)
+
+
+def _table(key: str) -> str:
+    return key.partition(":")[0]
+
+
+class MemoryBackend:
+    """In-process LRU; every worker keeps its own copy."""
+
+    shared = False
+
+    def __init__(self, maxsize: int = ENTITY_CACHE_SIZE):
+        self.cache = TTLCache(maxsize=maxsize)
+        self.generations: dict[str, int] = {}
+        self._lock = Lock()
+
+    def get(self, key: str) -> bytes | None:
+        return self.cache.get(key)
+
+    def reserve(self, key: str) -> int:
+        """Token taken before a load; ``fill`` drops the body if a write came since."""
+        with self._lock:
+            return self.generations.get(_table(key), 0)
+
+    def fill(self, key: str, token: int, value: bytes, ttl: float):
+        with self._lock:
+            if self.generations.get(_table(key), 0) == token:
+                self.cache.set(key, value, ttl)
+
+    def _bump(self, table: str):
+        self.generations[table] = self.generations.get(table, 0) + 1
+
+    def delete(self, keys):
+        with self._lock:
+            for key in keys:
+                self._bump(_table(key))
+                self.cache.delete(key)
+
+    def delete_table(self, table: str):
+        with self._lock:
+            self._bump(table)
+            self.cache.delete_prefix(f"{table}:")
+
+
+class RedisBackend:
+    """Shared cache over anything speaking the redis-py client API.
+
+    ``client`` defaults to ``redis.Redis.from_url(ENTITY_CACHE_URL)``; pass
+    a fake with the same methods to run without a server.
+
+    Keys carry their table's generation, kept in Redis, so evicting a table
+    is one ``INCR`` whatever the size of the cache. An evicted row leaves a
+    short-lived tombstone and loads store with ``NX``, so a worker that read
+    the row before the write cannot put the old body back.
+    """
+
+    shared = True
+
+    def __init__(
+        self,
+        client=None,
+        namespace: str = "entity:",
+        tombstone_ttl: float = ENTITY_CACHE_WAIT,
+    ):
+        if client is None:
+            import redis
+
+            client = redis.Redis.from_url(ENTITY_CACHE_URL)
+        self.client = client
+        self.namespace = namespace
+        self.tombstone_ttl = tombstone_ttl
+
+    def generation(self, table: str) -> int:
+        return int(self.client.get(f"{self.namespace}generation:{table}") or 0)
+
+    def _key(self, key: str, generation: int | None = None) -> str:
+        table, _, value = key.partition(":")
+        if generation is None:
+            generation = self.generation(table)
+        return f"{self.namespace}{table}:{generation}:{value}"
+
+    def get(self, key: str) -> bytes | None:
+        value = self.client.get(self._key(key))
+        return None if value == TOMBSTONE else value
+
+    def reserve(self, key: str) -> int:
+        return self.generation(_table(key))
+
+    def fill(self, key: str, token: int, value: bytes, ttl: float):
+        # a generation bumped during the load files the body where nobody
+        # reads, a tombstone set during the load makes NX refuse it
+        self.client.set(self._key(key, token), value, px=_milliseconds(ttl), nx=True)
+
+    def delete(self, keys):
+        generations = {}
+        for key in keys:
+            table = _table(key)
+            if table not in generations:
+                generations[table] = self.generation(table)
+            self.client.set(
+                self._key(key, generations[table]),
+                TOMBSTONE,
+                px=_milliseconds(self.tombstone_ttl),
+            )
+
+    def delete_table(self, table: str):
+        self.client.incr(f"{self.namespace}generation:{table}")
+
+
+class _Flight:
+    def __init__(self):
+        self.done = Event()
+        self.value = None
+
+
+def in_event_loop() -> bool:
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return False
+    return True
+
+
+class EntityCache:
+    """Read-through cache of encoded single-row responses.
+
+    Misses are cached too (for ``negative_ttl``) and concurrent misses on one
+    key share a single load. Writes evict keys once their transaction commits.
+    """
+
+    def __init__(
+        self,
+        backend,
+        ttl: float = ENTITY_CACHE_TTL,
+        negative_ttl: float = ENTITY_CACHE_NEGATIVE_TTL,
+    ):
+        self.backend = backend
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.hits = 0
+        self.misses = 0
+        self.loads = 0
+        self._flights: dict[str, _Flight] = {}
+        self._seen: dict[str, int] = {}
+        self._own: dict[str, set] = {}
+        self._checked: dict[str, float] = {}
+        self._lock = Lock()
+
+    def fetch(self, db: Session, model, value, load) -> bytes | None:
+        """Return the cached body for ``model`` keyed by ``value``.
+
+        ``load(session)`` builds the body, or returns ``None`` when the row
+        does not exist. Loads run on the primary so a lagging replica never
+        fills the cache with rows that were already evicted.
+        """
+        if in_greenlet():
+            # an async route: backend calls and loads leave the event loop
+            return off_loop(self._fetch_detached, model, value, load)
+        if not self.backend.shared:
+            self._watch(db, model)
+        key = f"{model.__tablename__}:{value}"
+        body = self.backend.get(key)
+        if body is None:
+            self.misses += 1
+            body = self._load_once(db, key, load)
+        else:
+            self.hits += 1
+        return None if body == NOT_FOUND else body
+
+    def _fetch_detached(self, model, value, load) -> bytes | None:
+        with SessionLocal() as db:
+            return self.fetch(db, model, value, load)
+
+    def _load_once(self, db: Session, key: str, load) -> bytes:
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+        token = self.backend.reserve(key)
+        # a follower on the event loop thread would block the very load it
+        # waits for, so async handlers load on their own instead
+        if not leader and not in_event_loop():
+            if flight.done.wait(ENTITY_CACHE_WAIT) and flight.value is not None:
+                return flight.value
+        body = None
+        try:
+            self.loads += 1
+            if db.info.get("replica"):
+                with SessionLocal() as primary:
+                    body = load(primary)
+            else:
+                body = load(db)
+            body = NOT_FOUND if body is None else body
+            ttl = self.negative_ttl if body == NOT_FOUND else self.ttl
+            self.backend.fill(key, token, body, ttl)
+            return body
+        finally:
+            if leader:
+                flight.value = body
+                flight.done.set()
+                with self._lock:
+                    self._flights.pop(key, None)
+
+    def _watch(self, db: Session, model):
+        table = model.__tablename__
+        now = time.monotonic()
+        with self._lock:
+            if now - self._checked.get(table, -ENTITY_CACHE_VERSION_SECONDS) < (
+                ENTITY_CACHE_VERSION_SECONDS
+            ):
+                return
+            self._checked[table] = now
+        if db.info.get("replica"):
+            with SessionLocal() as primary:
+                version = table_version(primary, model)
+        else:
+            version = table_version(db, model)
+        self.note_versions({table: version})
+
+    def note_versions(self, versions: dict[str, int], committed: bool = False):
+        """Follow the table stamps, evicting a table another process wrote.
+
+        A per-process backend only hears of this process's commits, which
+        evict their own keys. ``committed`` stamps are those commits; a
+        stamp read from the database that moved past them means some other
+        worker or job wrote the table, and all of it may be stale.
+        """
+        stale = []
+        with self._lock:
+            for table, version in versions.items():
+                seen = self._seen.get(table)
+                own = self._own.setdefault(table, set())
+                if seen is None:
+                    self._seen[table] = version
+                    continue
+                if committed:
+                    if version > seen:
+                        own.add(version)
+                    while seen + 1 in own:
+                        seen += 1
+                        own.discard(seen)
+                elif version > seen:
+                    if not own.issuperset(range(seen + 1, version + 1)):
+                        stale.append(table)
+                    own.difference_update(range(seen + 1, version + 1))
+                    seen = version
+                if len(own) > ENTITY_CACHE_SIZE:
+                    # never caught up with the database, start afresh
+                    stale.append(table)
+                    seen = max(own)
+                    own.clear()
+                self._seen[table] = seen
+        if stale:
+            self.evict(tables=stale)
+
+    def evict(self, keys=(), tables=()):
+        self.backend.delete(list(keys))
+        for table in tables:
+            self.backend.delete_table(table)
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "backend": type(self.backend).__name__,
+            "hits": self.hits,
+            "misses": self.misses,
+            "loads": self.loads,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+        }
+
+
+def build_backend(name: str = ENTITY_CACHE_BACKEND):
+    if name == "redis":
+        return RedisBackend()
+    return MemoryBackend()
+
+
+entity_cache = EntityCache(build_backend())
+if not entity_cache.backend.shared:
+    commit_listeners.append(
+        lambda versions: entity_cache.note_versions(versions, committed=True)
+    )
+
+
+def _pending(session: Session) -> dict:
+    return session.info.setdefault("evict", {"keys": set(), "tables": set()})
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_flushed_keys(session: Session, flush_context):
+    for objects in (session.new, session.dirty, session.deleted):
+        for obj in objects:
+            name = ENTITY_KEYS.get(type(obj))
+            if name is None:
+                continue
+            history = inspect(obj).attrs[name].history
+            values = {getattr(obj, name), *history.deleted}
+            _pending(session)["keys"].update(
+                f"{obj.__table__.name}:{value}" for value in values
+            )
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _collect_bulk_tables(state: ORMExecuteState):
+    if (state.is_insert or state.is_update or state.is_delete) and state.bind_mapper:
+        if state.bind_mapper.class_ in ENTITY_KEYS:
+            _pending(state.session)["tables"].add(state.bind_mapper.local_table.name)
+
+
+@event.listens_for(Session, "after_commit")
+def _evict_committed(session: Session):
+    pending = session.info.pop("evict", None)
+    if pending:
+        entity_cache.evict(pending["keys"], pending["tables"])
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_rolled_back(session: Session):
+    session.info.pop("evict", None)
@@ -0,0 +1,62 @@
+from fastapi import Depends, HTTPException, Request, Response, status
+from sqlalchemy.orm import Session
+from app.body.cache import TTLCache
+from app.body.dependencies.db_session import get_read_db
+from app.body.versions import table_version
+from dotenv import load_dotenv
+from urllib.parse import urlencode
+import hashlib
+import os
+
+load_dotenv()
+RESPONSE_CACHE_TTL = float(os.getenv("RESPONSE_CACHE_TTL", "0"))
+RESPONSE_CACHE_SIZE = int(os.getenv("RESPONSE_CACHE_SIZE", "1024"))
+
+response_cache = TTLCache(maxsize=RESPONSE_CACHE_SIZE, ttl=RESPONSE_CACHE_TTL)
+
+
+def make_etag(request: Request, version: int) -> str:
+    # sorted and re-encoded, so the same parameters in any order share a tag
+    query = urlencode(sorted(request.query_params.multi_items()))
+    digest = hashlib.sha256(f"{request.url.path}?{query}".encode()).hexdigest()
+    return f'"{version}-{digest[:16]}"'
+
+
+def etag_matches(header: str, tag: str) -> bool:
+    candidates = [
+        candidate.strip().removeprefix("W/") for candidate in header.split(",")
+    ]
+    return "*" in candidates or tag in candidates
+
+
+def conditional(model):
+    """Dependency tagging a read of ``model`` with its table version.
+
+    The stamp is read through the route's own session, so a replica answers
+    with the stamp of the rows it holds. A matching ``If-None-Match`` ends
+    the request with 304 after that single primary key lookup.
+    """
+
+    def version_tag(request: Request, db: Session = Depends(get_read_db)) -> str:
+        tag = make_etag(request, table_version(db, model))
+        if etag_matches(request.headers.get("if-none-match", ""), tag):
+            raise HTTPException(
+                status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": tag}
+            )
+        return tag
+
+    return version_tag
+
+
+def cached_response(tag: str | None) -> Response | None:
+    body = response_cache.get(tag) if tag and RESPONSE_CACHE_TTL > 0 else None
+    if body is None:
+        return None
+    return Response(body, media_type="application/json", headers={"ETag": tag})
+
+
+def tagged(tag: str | None, response: Response) -> Response:
+    if tag:
+        response.headers["ETag"] = tag
+        response_cache.set(tag, response.body)
+    return response
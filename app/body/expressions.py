@@ -0,0 +1,129 @@
+from app.body.cache import TTLCache
+from fastapi import HTTPException
+from dotenv import load_dotenv
+import numpy as np
+import ast
+import math
+import os
+
+load_dotenv()
+EXPRESSION_CACHE_SIZE = int(os.getenv("EXPRESSION_CACHE_SIZE", "1024"))
+EXPRESSION_MAX_LENGTH = int(os.getenv("EXPRESSION_MAX_LENGTH", "500"))
+EXPRESSION_MAX_DEPTH = int(os.getenv("EXPRESSION_MAX_DEPTH", "20"))
+EXPRESSION_MAX_NODES = int(os.getenv("EXPRESSION_MAX_NODES", "200"))
+EXPRESSION_MAX_OPERANDS = int(os.getenv("EXPRESSION_MAX_OPERANDS", "26"))
+
+FUNCTIONS = {
+    "sqrt": math.sqrt,
+    "abs": abs,
+    "exp": math.exp,
+    "log": math.log,
+    "log10": math.log10,
+    "sin": math.sin,
+    "cos": math.cos,
+    "tan": math.tan,
+    "min": min,
+    "max": max,
+}
+CONSTANTS = {"pi": math.pi, "tau": math.tau}
+
+OPERATORS = (ast.Add, ast.Sub, ast.Mult, ast.Div, ast.Pow, ast.Mod, ast.FloorDiv)
+UNARY_OPERATORS = (ast.UAdd, ast.USub)
+
+# names and functions an expression may use; builtins are not reachable
+_GLOBALS = {"__builtins__": {}, **FUNCTIONS, **CONSTANTS}
+
+
+def _invalid(reason: str):
+    raise HTTPException(status_code=400, detail=f"invalid expression: {reason}")
+
+
+class Expression:
+    """An arithmetic expression over single letter operands, compiled once.
+
+    ``(a+b)*sqrt(c)/d`` takes four numbers, bound to the operands in
+    alphabetical order.
+    """
+
+    def __init__(self, text: str):
+        if len(text) > EXPRESSION_MAX_LENGTH:
+            _invalid(f"longer than {EXPRESSION_MAX_LENGTH} characters")
+        try:
+            tree = ast.parse(text.strip(), mode="eval")
+        except (SyntaxError, RecursionError):
+            _invalid("could not be parsed")
+        names: set[str] = set()
+        self.nodes = 0
+        self._check(tree.body, names, 1)
+        if len(names) > EXPRESSION_MAX_OPERANDS:
+            _invalid(f"more than {EXPRESSION_MAX_OPERANDS} operands")
+        self.text = text
+        self.operands = sorted(names)
+        self.code = compile(tree, "<expression>", "eval")
+
+    def _check(self, node: ast.AST, names: set, depth: int):
+        # there are no loops to run, so capping the nodes caps evaluation time
+        self.nodes += 1
+        if self.nodes > EXPRESSION_MAX_NODES:
+            _invalid(f"more than {EXPRESSION_MAX_NODES} terms")
+        if depth > EXPRESSION_MAX_DEPTH:
+            _invalid(f"nested deeper than {EXPRESSION_MAX_DEPTH}")
+        if isinstance(node, ast.BinOp) and isinstance(node.op, OPERATORS):
+            self._check(node.left, names, depth + 1)
+            self._check(node.right, names, depth + 1)
+        elif isinstance(node, ast.UnaryOp) and isinstance(node.op, UNARY_OPERATORS):
+            self._check(node.operand, names, depth + 1)
+        elif isinstance(node, ast.Constant) and type(node.value) in (int, float):
+            node.value = float(node.value)
+        elif isinstance(node, ast.Name) and node.id in CONSTANTS:
+            pass
+        elif isinstance(node, ast.Name) and len(node.id) == 1 and node.id.islower():
+            names.add(node.id)
+        elif (
+            isinstance(node, ast.Call)
+            and isinstance(node.func, ast.Name)
+            and node.func.id in FUNCTIONS
+            and node.args
+            and not node.keywords
+        ):
+            for arg in node.args:
+                if isinstance(arg, ast.Starred):
+                    _invalid("unpacking is not allowed")
+                self._check(arg, names, depth + 1)
+        elif isinstance(node, ast.Call) and isinstance(node.func, ast.Name):
+            _invalid(f"unknown function {node.func.id}")
+        elif isinstance(node, ast.Name):
+            _invalid(f"unknown name {node.id}, operands are single letters")
+        else:
+            _invalid(f"{type(node).__name__} is not allowed")
+
+    def __call__(self, values: np.ndarray) -> float:
+        if values.size != len(self.operands):
+            raise HTTPException(
+                status_code=400,
+                detail=f"expression takes {len(self.operands)} numbers, "
+                f"got {values.size}",
+            )
+        scope = dict(zip(self.operands, values.tolist()))
+        try:
+            return float(eval(self.code, _GLOBALS, scope))
+        except ZeroDivisionError:
+            raise HTTPException(status_code=400, detail="Cannot divide by zero")
+        except OverflowError:
+            raise HTTPException(
+                status_code=400, detail="result overflows a 64-bit float"
+            )
+        except (ValueError, TypeError) as exc:
+            raise HTTPException(status_code=400, detail=f"math error: {exc}")
+
+
+expression_cache = TTLCache(maxsize=EXPRESSION_CACHE_SIZE)
+
+
+def compile_expression(text: str) -> Expression:
+    """Return the compiled form of ``text``, parsing it only on a cache miss."""
+    expression = expression_cache.get(text)
+    if expression is None:
+        expression = Expression(text)
+        expression_cache.set(text, expression)
+    return expression
@@ -0,0 +1,241 @@
+from sqlalchemy import case, func, inspect, select
+from sqlalchemy.orm import Session
+from app.database.config import SessionLocal
+from app.body.versions import table_version
+from app.models_sql import Market
+from threading import Lock
+import numpy as np
+
+GROUPS = ("trade", "union", "taxes")
+
+
+def _factorize(values: list) -> tuple[np.ndarray, list]:
+    labels = list(dict.fromkeys(values))
+    index = {label: code for code, label in enumerate(labels)}
+    codes = np.fromiter(map(index.__getitem__, values), np.int64, len(values))
+    return codes, labels
+
+
+def _numeric(values) -> np.ndarray:
+    # NumPy reads None as NaN in a float array
+    return np.array(values, dtype=np.float64)
+
+
+class MarketSnapshot:
+    """Columnar copy of the market sections, tagged with the table version.
+
+    Per (group, metric) the non-null values are sorted by group then value
+    once, after that counts, sums, bounds and percentiles of every group are
+    index arithmetic over the sorted array.
+    """
+
+    def __init__(self, rows: list, version: int):
+        columns = list(zip(*rows)) if rows else [()] * (2 + len(GROUPS) + 1)
+        self.version = version
+        self.size = len(rows)
+        self.section = np.array(columns[0], dtype=np.int64)
+        self.metrics = {
+            "traders": _numeric(columns[1]),
+            "sales_per_day": _numeric(columns[2]),
+        }
+        self.groups = {
+            name: _factorize(list(column)) for name, column in zip(GROUPS, columns[3:])
+        }
+        self._sorted: dict = {}
+        self._weighted: dict = {}
+        self._lock = Lock()
+
+    def _codes(self, group: str | None) -> tuple[np.ndarray, list]:
+        if group is None:
+            return np.zeros(self.size, dtype=np.int64), [None]
+        return self.groups[group]
+
+    def sorted_groups(self, group: str | None, metric: str):
+        key = (group, metric)
+        if key not in self._sorted:
+            codes, labels = self._codes(group)
+            values = self.metrics[metric]
+            keep = ~np.isnan(values)
+            values, codes = values[keep], codes[keep]
+            order = np.lexsort((values, codes))
+            counts = np.bincount(codes, minlength=len(labels))
+            starts = np.cumsum(counts) - counts
+            with self._lock:
+                self._sorted[key] = (values[order], starts, counts)
+        return self._sorted[key]
+
+    def weighted_sales(self, group: str | None) -> np.ndarray:
+        """sales_per_day averaged with traders as weights, per group."""
+        if group not in self._weighted:
+            codes, labels = self._codes(group)
+            traders = self.metrics["traders"]
+            sales = self.metrics["sales_per_day"]
+            keep = ~(np.isnan(traders) | np.isnan(sales))
+            weights = np.bincount(codes[keep], traders[keep], len(labels))
+            weighted = np.bincount(
+                codes[keep], traders[keep] * sales[keep], len(labels)
+            )
+            with np.errstate(invalid="ignore", divide="ignore"):
+                result = np.where(weights > 0, weighted / weights, np.nan)
+            with self._lock:
+                self._weighted[group] = result
+        return self._weighted[group]
+
+    def summarize(
+        self,
+        group: str | None,
+        metric: str,
+        percentiles: list[float],
+        top: int | None,
+    ) -> list[dict]:
+        values, starts, counts = self.sorted_groups(group, metric)
+        labels = self._codes(group)[1]
+        present = np.flatnonzero(counts)
+        starts, counts = starts[present], counts[present]
+        ends = starts + counts - 1
+        sums = np.add.reduceat(values, starts) if present.size else np.zeros(0)
+        order = np.argsort(-sums, kind="stable")
+        if top is not None:
+            order = order[:top]
+        quantiles = {}
+        for percentile in percentiles:
+            position = (counts - 1) * (percentile / 100)
+            low = np.floor(position).astype(np.int64)
+            high = np.minimum(low + 1, counts - 1)
+            fraction = position - low
+            quantiles[percentile] = values[starts + low] + fraction * (
+                values[starts + high] - values[starts + low]
+            )
+        weighted = self.weighted_sales(group)[present]
+        return [
+            {
+                "group": labels[present[i]],
+                "count": int(counts[i]),
+                "sum": float(sums[i]),
+                "mean": float(sums[i] / counts[i]),
+                "min": float(values[starts[i]]),
+                "max": float(values[ends[i]]),
+                "weighted_sales_per_day": (
+                    None if np.isnan(weighted[i]) else float(weighted[i])
+                ),
+                "percentiles": {
+                    f"p{percentile:g}": float(quantiles[percentile][i])
+                    for percentile in percentiles
+                },
+            }
+            for i in order.tolist()
+        ]
+
+    def top_sections(self, metric: str, count: int) -> list[dict]:
+        """The ``count`` sections with the highest ``metric``, best first."""
+        values = self.metrics[metric]
+        ranked = np.where(np.isnan(values), -np.inf, values)
+        count = min(count, int((~np.isnan(values)).sum()))
+        if count <= 0:
+            return []
+        best = np.argpartition(ranked, -count)[-count:]
+        best = best[np.argsort(-ranked[best], kind="stable")]
+        return [
+            {"section": int(self.section[i]), metric: float(values[i])}
+            for i in best.tolist()
+        ]
+
+
+_snapshot: MarketSnapshot | None = None
+_snapshot_lock = Lock()
+
+
+def load_snapshot(db: Session, version: int) -> MarketSnapshot:
+    rows = db.execute(
+        select(
+            Market.section,
+            Market.traders,
+            Market.sales_per_day,
+            *(getattr(Market, name) for name in GROUPS),
+        ).where(Market.section.is_not(None))
+    ).all()
+    return MarketSnapshot(rows, version)
+
+
+def market_snapshot(load: bool = True) -> MarketSnapshot | None:
+    """The cached snapshot if it matches the ``markets`` stamp in the database.
+
+    Otherwise it is reloaded, or ``None`` is returned when ``load`` is false.
+    The stamp is read on the primary, before the rows, so a snapshot is never
+    older than the stamp it carries, and a write from any worker or job
+    retires it on the next request.
+    """
+    global _snapshot
+    with SessionLocal() as db:
+        version = table_version(db, Market)
+        snapshot = _snapshot
+        if snapshot is not None and snapshot.version == version:
+            return snapshot
+        if not load:
+            return None
+        with _snapshot_lock:
+            if _snapshot is None or _snapshot.version != version:
+                _snapshot = load_snapshot(db, version)
+            return _snapshot
+
+
+def snapshot_analytics(
+    load: bool,
+    group: str | None,
+    metric: str,
+    percentiles: list[float],
+    top: int | None,
+    top_sections: int,
+) -> tuple[list[dict], list[dict]] | None:
+    """Groups and top sections from the snapshot, ``None`` when there is none."""
+    snapshot = market_snapshot(load=load)
+    if snapshot is None:
+        return None
+    return (
+        snapshot.summarize(group, metric, percentiles, top),
+        snapshot.top_sections(metric, top_sections),
+    )
+
+
+def sql_summary(
+    db: Session, group: str | None, metric: str, top: int | None
+) -> list[dict]:
+    """Plain aggregates computed by the database, one row per group."""
+    value = getattr(Market, metric)
+    key = getattr(Market, group) if group else None
+    both = Market.traders.is_not(None) & Market.sales_per_day.is_not(None)
+    total = func.sum(value)
+    query = select(
+        *([key] if key is not None else []),
+        func.count(value).label("count"),
+        total.label("sum"),
+        func.min(value).label("min"),
+        func.max(value).label("max"),
+        func.sum(case((both, Market.traders * Market.sales_per_day))).label("weighted"),
+        func.sum(case((both, Market.traders))).label("weights"),
+    ).where(Market.section.is_not(None), value.is_not(None))
+    if key is not None:
+        query = query.group_by(key)
+    query = query.order_by(total.desc())
+    if top is not None:
+        query = query.limit(top)
+    bind = {"mapper": inspect(Market)}
+    groups = []
+    for row in db.execute(query, bind_arguments=bind):
+        if not row.count:
+            continue
+        groups.append(
+            {
+                "group": getattr(row, group) if group else None,
+                "count": row.count,
+                "sum": float(row.sum),
+                "mean": float(row.sum) / row.count,
+                "min": float(row.min),
+                "max": float(row.max),
+                "weighted_sales_per_day": (
+                    row.weighted / row.weights if row.weights else None
+                ),
+                "percentiles": {},
+            }
+        )
+    return groups
@@ -0,0 +1,92 @@
+from datetime import datetime
+from fastapi import HTTPException
+from sqlalchemy import DateTime, tuple_
+import base64
+import json
+
+
+def encode_cursor(values: list, direction: str) -> str:
+    keys = [v.isoformat() if isinstance(v, datetime) else v for v in values]
+    raw = json.dumps({"k": keys, "d": direction}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, columns: list) -> tuple[list, str]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        keys, direction = data["k"], data["d"]
+        if len(keys) != len(columns) or direction not in ("next", "prev"):
+            raise ValueError(cursor)
+        values = [
+            datetime.fromisoformat(key) if isinstance(col.type, DateTime) else key
+            for col, key in zip(columns, keys)
+        ]
+    except (ValueError, KeyError, TypeError):
+        raise HTTPException(status_code=400, detail="invalid cursor")
+    return values, direction
+
+
+def _key(row, columns: list) -> list:
+    return [getattr(row, col.key) for col in columns]
+
+
+def keyset_page(
+    query, columns: list, limit: int, cursor: str | None, descending: bool = False
+):
+    """Fetch one page ordered by ``columns`` starting after ``cursor``.
+
+    Returns ``(rows, next_cursor, prev_cursor)``. The ordering columns must be
+    unique together (end them with the primary key) and should be indexed.
+    """
+    values, direction = (
+        (None, "next") if cursor is None else decode_cursor(cursor, columns)
+    )
+    backwards = direction == "prev"
+    newest_first = descending != backwards
+    if values is not None:
+        key = tuple_(*columns) if len(columns) > 1 else columns[0]
+        bound = tuple(values) if len(columns) > 1 else values[0]
+        query = query.filter(key < bound if newest_first else key > bound)
+    order = [col.desc() if newest_first else col.asc() for col in columns]
+    rows = query.order_by(*order).limit(limit + 1).all()
+    more = len(rows) > limit
+    rows = rows[:limit]
+    if backwards:
+        rows.reverse()
+    if not rows:
+        return rows, None, None
+    first, last = _key(rows[0], columns), _key(rows[-1], columns)
+    if backwards:
+        next_cursor = encode_cursor(last, "next")
+        prev_cursor = encode_cursor(first, "prev") if more else None
+    else:
+        next_cursor = encode_cursor(last, "next") if more else None
+        prev_cursor = encode_cursor(first, "prev") if values is not None else None
+    return rows, next_cursor, prev_cursor
+
+
+def offset_page(query, columns: list, page: int, limit: int, descending: bool = False):
+    """Classic page/limit slice that still hands out cursors for the next hop."""
+    order = [col.desc() if descending else col.asc() for col in columns]
+    rows = query.order_by(*order).offset((page - 1) * limit).limit(limit + 1).all()
+    more = len(rows) > limit
+    rows = rows[:limit]
+    if not rows:
+        return rows, None, None
+    next_cursor = encode_cursor(_key(rows[-1], columns), "next") if more else None
+    prev_cursor = encode_cursor(_key(rows[0], columns), "prev") if page > 1 else None
+    return rows, next_cursor, prev_cursor
+
+
+def paginate(
+    query,
+    columns: list,
+    page: int,
+    limit: int,
+    cursor: str | None = None,
+    descending: bool = False,
+):
+    if cursor is not None:
+        return keyset_page(query, columns, limit, cursor, descending)
+    return offset_page(query, columns, page, limit, descending)
@@ -0,0 +1,32 @@
+from sqlalchemy import inspect
+from sqlalchemy.orm import Query, load_only
+from pydantic import BaseModel
+
+
+def _attributes(model) -> dict:
+    """Readable attribute names of ``model`` and the column each one loads.
+
+    A synonym takes the place of the column it renders.
+    """
+    mapper = inspect(model)
+    rendered = {synonym.name: name for name, synonym in mapper.synonyms.items()}
+    return {rendered.get(key, key): key for key in mapper.column_attrs.keys()}
+
+
+def record_fields(model, record: type[BaseModel] | None = None) -> list[str]:
+    """Attribute names of ``model`` that ``record`` serializes, or all of them."""
+    names = _attributes(model)
+    if record is None:
+        return list(names)
+    return [name for name in record.model_fields if name in names]
+
+
+def record_columns(model, record: type[BaseModel]) -> list:
+    """Mapped columns of ``model`` that the response model ``record`` serializes."""
+    names = _attributes(model)
+    return [getattr(model, names[name]) for name in record_fields(model, record)]
+
+
+def project(query: Query, model, record: type[BaseModel]) -> Query:
+    """Load only the columns ``record`` needs instead of the whole row."""
+    return query.options(load_only(*record_columns(model, record)))
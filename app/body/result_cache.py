@@ -0,0 +1,160 @@
+from sqlalchemy import event, inspect, text
+from sqlalchemy.orm import Session
+from app.body.cache import TTLCache
+from app.body.calc_engine import calculate
+from app.body.concurrency import off_loop
+from app.models_sql import CalculationResult
+from dotenv import load_dotenv
+from datetime import datetime, timezone
+import numpy as np
+import hashlib
+import json
+import os
+
+load_dotenv()
+RESULT_CACHE_SIZE = int(os.getenv("RESULT_CACHE_SIZE", "4096"))
+RESULT_CACHE_TTL = float(os.getenv("RESULT_CACHE_TTL", "300"))
+RESULT_CACHE_TABLE = os.getenv("RESULT_CACHE_TABLE", "false").lower() in (
+    "1",
+    "true",
+    "yes",
+    "on",
+)
+
+_INSERT = text(
+    "INSERT INTO calculation_results "
+    "(digest, operation, count, result, result_values, created_at) "
+    "VALUES (:digest, :operation, :count, :result, :result_values, :created_at) "
+    "ON CONFLICT (digest) DO NOTHING"
+)
+_SELECT = text(
+    "SELECT id, result, result_values FROM calculation_results WHERE digest = :digest"
+)
+_SELECT_ID = text(
+    "SELECT result, result_values FROM calculation_results WHERE id = :result_id"
+)
+
+
+def result_key(operation: str, values: np.ndarray) -> str:
+    """Hash the operation and the parsed numbers.
+
+    Hashing the float64 bytes rather than the submitted text makes
+    ``"1,2"``, ``"1.0, 2"`` and ``"1e0,2"`` the same input.
+    """
+    digest = hashlib.sha256(operation.encode())
+    digest.update(b"\x00")
+    digest.update(values.astype("<f8", copy=False).tobytes())
+    return digest.hexdigest()
+
+
+def _decode(result, result_values):
+    return json.loads(result_values) if result_values is not None else result
+
+
+class ResultCache:
+    """Memoizes ``calculate`` per canonical ``(operation, numbers)`` input.
+
+    Results live in a per-process LRU and, with ``table`` on, in the shared
+    ``calculation_results`` table too, so history rows can point at the row
+    holding their result. Element-wise lists live only there; history rows
+    still keep a scalar result, which the rollups aggregate in SQL and which
+    is all a row has when the table is off. Results only reach the LRU once the transaction
+    that produced them commits, a rolled back row is never referenced.
+    """
+
+    def __init__(
+        self,
+        maxsize: int = RESULT_CACHE_SIZE,
+        ttl: float = RESULT_CACHE_TTL,
+        table: bool = RESULT_CACHE_TABLE,
+    ):
+        self.memory = TTLCache(maxsize=maxsize, ttl=ttl)
+        self.table = table
+        self.table_hits = 0
+        self.evaluations = 0
+
+    def evaluate(
+        self, db: Session, operation: str, values: np.ndarray
+    ) -> tuple[float | list[float], int | None]:
+        """Return the result for ``operation`` over ``values`` and its row id.
+
+        The id is ``None`` when the table is off.
+        """
+        key = result_key(operation, values)
+        cached = self.memory.get(key)
+        if cached is not None:
+            return cached
+        entry = self._load(db, key) if self.table else None
+        if entry is None:
+            result = off_loop(calculate, operation, values)
+            self.evaluations += 1
+            entry = (result, self._store(db, key, operation, values, result))
+        else:
+            self.table_hits += 1
+        db.info.setdefault("results", {})[key] = entry
+        return entry
+
+    def _connection(self, db: Session):
+        return db.connection(bind_arguments={"mapper": inspect(CalculationResult)})
+
+    def _load(self, db: Session, key: str):
+        row = self._connection(db).execute(_SELECT, {"digest": key}).first()
+        if row is not None:
+            return _decode(row.result, row.result_values), row.id
+
+    def _store(self, db: Session, key: str, operation, values, result) -> int | None:
+        if not self.table:
+            return None
+        scalar = isinstance(result, float)
+        conn = self._connection(db)
+        conn.execute(
+            _INSERT,
+            {
+                "digest": key,
+                "operation": operation,
+                "count": int(values.size),
+                "result": result if scalar else None,
+                "result_values": None if scalar else json.dumps(result),
+                "created_at": datetime.now(timezone.utc),
+            },
+        )
+        # a concurrent writer may have inserted the digest first
+        return conn.execute(_SELECT, {"digest": key}).first().id
+
+    def stored(self, db: Session, result_id: int) -> float | list[float] | None:
+        """Read a result back through the id a history row or job points at."""
+        row = self._connection(db).execute(_SELECT_ID, {"result_id": result_id}).first()
+        return _decode(row.result, row.result_values) if row is not None else None
+
+    def remember(self, entries: dict):
+        for key, entry in entries.items():
+            self.memory.set(key, entry)
+
+    def stats(self) -> dict:
+        memory = self.memory.stats()
+        lookups = memory["hits"] + memory["misses"]
+        hits = memory["hits"] + self.table_hits
+        return {
+            "size": memory["size"],
+            "maxsize": memory["maxsize"],
+            "table": self.table,
+            "memory_hits": memory["hits"],
+            "table_hits": self.table_hits,
+            "evaluations": self.evaluations,
+            "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+result_cache = ResultCache()
+
+
+@event.listens_for(Session, "after_commit")
+def _remember_committed(session: Session):
+    entries = session.info.pop("results", None)
+    if entries:
+        result_cache.remember(entries)
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_rolled_back(session: Session):
+    session.info.pop("results", None)
@@ -0,0 +1,254 @@
+from datetime import date
+from sqlalchemy import Date, bindparam, delete, event, func, inspect, insert, select
+from sqlalchemy import literal
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+from app.models_sql import Calculate, CalculationRollup
+import math
+
+ROLLUP_COLUMNS = ("mathematician", "operation", "result", "time_of_calculation")
+ROLLED_UP = {Calculate: ROLLUP_COLUMNS}
+GROUPS = ("mathematician", "operation", "day")
+# the day rows without a time are filed under, the same whenever they are
+# added, removed or rebuilt
+UNDATED = date(1970, 1, 1)
+
+_UPSERT = text(
+    "INSERT INTO calculation_rollups (mathematician, operation, day, count, "
+    "result_count, total, sum_squares, minimum, maximum) VALUES (:mathematician, "
+    ":operation, :day, :count, :result_count, :total, :sum_squares, :minimum, "
+    ":maximum) ON CONFLICT (mathematician, operation, day) DO UPDATE SET "
+    "count = calculation_rollups.count + excluded.count, "
+    "result_count = calculation_rollups.result_count + excluded.result_count, "
+    "total = calculation_rollups.total + excluded.total, "
+    "sum_squares = calculation_rollups.sum_squares + excluded.sum_squares, "
+    "minimum = CASE WHEN calculation_rollups.minimum IS NULL "
+    "OR excluded.minimum < calculation_rollups.minimum "
+    "THEN excluded.minimum ELSE calculation_rollups.minimum END, "
+    "maximum = CASE WHEN calculation_rollups.maximum IS NULL "
+    "OR excluded.maximum > calculation_rollups.maximum "
+    "THEN excluded.maximum ELSE calculation_rollups.maximum END"
+).bindparams(bindparam("day", type_=Date))
+_SUBTRACT = text(
+    "UPDATE calculation_rollups SET count = count - :count, "
+    "result_count = result_count - :result_count, total = total - :total, "
+    "sum_squares = sum_squares - :sum_squares "
+    "WHERE mathematician = :mathematician AND operation = :operation AND day = :day"
+).bindparams(bindparam("day", type_=Date))
+_BOUNDS = text(
+    "SELECT minimum, maximum FROM calculation_rollups "
+    "WHERE mathematician = :mathematician AND operation = :operation AND day = :day"
+).bindparams(bindparam("day", type_=Date))
+_RESET_BOUNDS = text(
+    "UPDATE calculation_rollups SET minimum = :minimum, maximum = :maximum "
+    "WHERE mathematician = :mathematician AND operation = :operation AND day = :day"
+).bindparams(bindparam("day", type_=Date))
+
+
+def _group(values: dict) -> tuple[str, str, date]:
+    moment = values.get("time_of_calculation")
+    return (
+        values.get("mathematician") or "",
+        values.get("operation") or "",
+        moment.date() if moment is not None else UNDATED,
+    )
+
+
+def _day(moment):
+    return func.coalesce(func.date(moment), literal(UNDATED, Date))
+
+
+def _add(deltas: dict, values: dict):
+    delta = deltas.setdefault(
+        _group(values),
+        {"count": 0, "result_count": 0, "total": 0.0, "sum_squares": 0.0},
+    )
+    delta["count"] += 1
+    result = values.get("result")
+    if result is None:
+        return
+    delta["result_count"] += 1
+    delta["total"] += result
+    delta["sum_squares"] += result * result
+    delta["minimum"] = min(delta.get("minimum", result), result)
+    delta["maximum"] = max(delta.get("maximum", result), result)
+
+
+def rollups_connection(session: Session):
+    return session.connection(bind_arguments={"mapper": inspect(CalculationRollup)})
+
+
+def _params(group: tuple, delta: dict) -> dict:
+    return {
+        **dict(zip(GROUPS, group)),
+        "minimum": None,
+        "maximum": None,
+        **delta,
+    }
+
+
+def add_rollups(session: Session, deltas: dict):
+    conn = rollups_connection(session)
+    for group, delta in deltas.items():
+        conn.execute(_UPSERT, _params(group, delta))
+
+
+def subtract_rollups(session: Session, deltas: dict):
+    """Take removed rows out of their groups.
+
+    Sums and counts subtract, but a minimum or maximum that was removed
+    has to be read again from the group's remaining rows.
+    """
+    conn = rollups_connection(session)
+    for group, delta in deltas.items():
+        params = _params(group, delta)
+        conn.execute(_SUBTRACT, params)
+        bounds = conn.execute(_BOUNDS, params).first()
+        if bounds is None or delta["result_count"] == 0:
+            continue
+        if (
+            bounds.minimum is None
+            or delta["minimum"] <= bounds.minimum
+            or delta["maximum"] >= bounds.maximum
+        ):
+            mathematician, operation, day = group
+            minimum, maximum = conn.execute(
+                select(func.min(Calculate.result), func.max(Calculate.result)).where(
+                    func.coalesce(Calculate.mathematician, "") == mathematician,
+                    func.coalesce(Calculate.operation, "") == operation,
+                    _day(Calculate.time_of_calculation) == day,
+                )
+            ).one()
+            conn.execute(
+                _RESET_BOUNDS, {**params, "minimum": minimum, "maximum": maximum}
+            )
+    conn.execute(delete(CalculationRollup).where(CalculationRollup.count <= 0))
+
+
+def track_rollups(session: Session, rows: list[dict], sign: int = 1):
+    """Roll up rows written or removed without the ORM unit of work."""
+    deltas = {}
+    for values in rows:
+        _add(deltas, values)
+    if deltas:
+        (add_rollups if sign > 0 else subtract_rollups)(session, deltas)
+
+
+@event.listens_for(Session, "after_flush")
+def _roll_up_flushed_rows(session: Session, flush_context):
+    added, removed = {}, {}
+    for deltas, objects in ((added, session.new), (removed, session.deleted)):
+        for obj in objects:
+            if isinstance(obj, Calculate):
+                _add(deltas, {name: getattr(obj, name) for name in ROLLUP_COLUMNS})
+    for obj in session.dirty:
+        if not isinstance(obj, Calculate):
+            continue
+        attrs = inspect(obj).attrs
+        histories = {name: attrs[name].history for name in ROLLUP_COLUMNS}
+        if any(history.has_changes() for history in histories.values()):
+            old = {
+                name: (history.deleted or history.unchanged or [None])[0]
+                for name, history in histories.items()
+            }
+            _add(removed, old)
+            _add(added, {name: getattr(obj, name) for name in ROLLUP_COLUMNS})
+    if added:
+        add_rollups(session, added)
+    if removed:
+        subtract_rollups(session, removed)
+
+
+def rebuild_rollups(db: Session):
+    """Recompute every rollup from the calculations table."""
+    conn = rollups_connection(db)
+    conn.execute(delete(CalculationRollup))
+    result = Calculate.result
+    keys = (
+        func.coalesce(Calculate.mathematician, ""),
+        func.coalesce(Calculate.operation, ""),
+        _day(Calculate.time_of_calculation),
+    )
+    conn.execute(
+        insert(CalculationRollup).from_select(
+            [
+                "mathematician",
+                "operation",
+                "day",
+                "count",
+                "result_count",
+                "total",
+                "sum_squares",
+                "minimum",
+                "maximum",
+            ],
+            select(
+                *keys,
+                func.count(),
+                func.count(result),
+                func.coalesce(func.sum(result), 0.0),
+                func.coalesce(func.sum(result * result), 0.0),
+                func.min(result),
+                func.max(result),
+            ).group_by(*keys),
+        )
+    )
+
+
+def summarize(db: Session, group_by: list[str], **filters) -> list[dict]:
+    """Aggregate the rollups per ``group_by`` columns, one row per group.
+
+    ``filters`` narrows by ``mathematician``, ``operation`` and a ``start`` /
+    ``end`` day, both inclusive.
+    """
+    columns = [getattr(CalculationRollup, name) for name in group_by]
+    query = select(
+        *columns,
+        func.sum(CalculationRollup.count).label("count"),
+        func.sum(CalculationRollup.result_count).label("result_count"),
+        func.sum(CalculationRollup.total).label("total"),
+        func.sum(CalculationRollup.sum_squares).label("sum_squares"),
+        func.min(CalculationRollup.minimum).label("minimum"),
+        func.max(CalculationRollup.maximum).label("maximum"),
+    )
+    for name in ("mathematician", "operation"):
+        if filters.get(name) is not None:
+            query = query.where(getattr(CalculationRollup, name) == filters[name])
+    if filters.get("start") is not None:
+        query = query.where(CalculationRollup.day >= filters["start"])
+    if filters.get("end") is not None:
+        query = query.where(CalculationRollup.day <= filters["end"])
+    if columns:
+        query = query.group_by(*columns).order_by(*columns)
+    groups = []
+    for row in rollups_connection(db).execute(query):
+        if not row.count:
+            continue
+        mean = row.total / row.result_count if row.result_count else None
+        variance = (
+            max(row.sum_squares / row.result_count - mean * mean, 0.0)
+            if row.result_count
+            else None
+        )
+        groups.append(
+            {
+                **{name: getattr(row, name) for name in group_by},
+                "count": row.count,
+                "result_count": row.result_count,
+                "sum": row.total,
+                "mean": mean,
+                "std": math.sqrt(variance) if variance is not None else None,
+                "min": row.minimum,
+                "max": row.maximum,
+            }
+        )
+    return groups
+
+
+if __name__ == "__main__":
+    from app.database.config import SessionLocal
+
+    with SessionLocal() as session:
+        rebuild_rollups(session)
+        session.commit()
+    print("Calculation rollups rebuilt")
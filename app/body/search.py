@@ -0,0 +1,132 @@
+from sqlalchemy import false, inspect, text
+from sqlalchemy.engine import Connection
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Query, Session
+from app.models_sql import Task, Calculate, Market
+import re
+
+FTS_COLUMNS = {
+    Task: ("description",),
+    Market: ("trade", "union", "taxes"),
+    Calculate: ("operation",),
+}
+
+_available: dict[str, bool] = {}
+
+
+def fts_table(model) -> str:
+    return f"{model.__tablename__}_fts"
+
+
+def install_fts(conn: Connection, model):
+    """Create the external-content FTS5 index for ``model`` and its sync triggers."""
+    table, fts = model.__tablename__, fts_table(model)
+    columns = ", ".join(f'"{name}"' for name in FTS_COLUMNS[model])
+    new = ", ".join(f'new."{name}"' for name in FTS_COLUMNS[model])
+    old = ", ".join(f'old."{name}"' for name in FTS_COLUMNS[model])
+    conn.execute(
+        text(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5("
+            f"{columns}, content='{table}', content_rowid='id')"
+        )
+    )
+    conn.execute(
+        text(
+            f"CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {table} BEGIN "
+            f"INSERT INTO {fts}(rowid, {columns}) VALUES (new.id, {new}); END"
+        )
+    )
+    conn.execute(
+        text(
+            f"CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {table} BEGIN "
+            f"INSERT INTO {fts}({fts}, rowid, {columns}) "
+            f"VALUES ('delete', old.id, {old}); END"
+        )
+    )
+    conn.execute(
+        text(
+            f"CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE ON {table} BEGIN "
+            f"INSERT INTO {fts}({fts}, rowid, {columns}) "
+            f"VALUES ('delete', old.id, {old}); "
+            f"INSERT INTO {fts}(rowid, {columns}) VALUES (new.id, {new}); END"
+        )
+    )
+    conn.execute(text(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')"))
+
+
+def install_all(conn: Connection) -> bool:
+    if conn.dialect.name != "sqlite":
+        return False
+    try:
+        for model in FTS_COLUMNS:
+            install_fts(conn, model)
+    except OperationalError:
+        return False
+    _available.clear()
+    return True
+
+
+def fts_available(db: Session, model) -> bool:
+    fts = fts_table(model)
+    if fts not in _available:
+        bind = db.get_bind(mapper=inspect(model))
+        _available[fts] = bind.dialect.name == "sqlite" and inspect(bind).has_table(fts)
+    return _available[fts]
+
+
+def prefix_query(term: str) -> str:
+    tokens = re.findall(r"\w+", term)
+    return " ".join(f'"{token}"*' for token in tokens)
+
+
+def fts_searchable(terms: dict) -> bool:
+    """Whether every given term has a word FTS can match, e.g. not ``"+"``."""
+    values = [value for value in terms.values() if value]
+    return bool(values) and all(prefix_query(value) for value in values)
+
+
+def fts_query(
+    db: Session,
+    model,
+    terms: dict,
+    page: int = 1,
+    limit: int | None = None,
+    columns: list | None = None,
+) -> Query:
+    """Rank rows of ``model`` whose FTS columns match every term by prefix.
+
+    ``terms`` maps column name to the user's search text, empty values are
+    skipped and a query matching nothing comes back when none are left.
+    ``columns`` narrows the loaded columns, by default the whole row is read.
+    Results come back best match first.
+    """
+    table, fts = model.__tablename__, fts_table(model)
+    clauses = [
+        f'"{name}" : ({prefix_query(value)})'
+        for name, value in terms.items()
+        if value and prefix_query(value)
+    ]
+    if not clauses:
+        return db.query(model).filter(false())
+    columns = ", ".join(
+        f'{table}."{c.key}"' for c in columns or model.__table__.columns
+    )
+    statement = text(
+        f"SELECT {columns} FROM {table} JOIN {fts} ON {fts}.rowid = {table}.id "
+        f"WHERE {fts} MATCH :match ORDER BY {fts}.rank LIMIT :limit OFFSET :offset"
+    )
+    return (
+        db.query(model)
+        .from_statement(statement)
+        .params(
+            match=" AND ".join(clauses),
+            limit=-1 if limit is None else limit,
+            offset=0 if limit is None else (page - 1) * limit,
+        )
+    )
+
+
+def fts_search(
+    db: Session, model, terms: dict, page: int = 1, limit: int | None = None
+) -> list:
+    return fts_query(db, model, terms, page, limit).all()
@@ -0,0 +1,26 @@
+from functools import lru_cache
+from fastapi import Response
+from pydantic import TypeAdapter
+
+
+@lru_cache(maxsize=None)
+def adapter(response_type) -> TypeAdapter:
+    """One ``TypeAdapter`` per response type, built the first time it is used."""
+    return TypeAdapter(response_type)
+
+
+def encode(response_type, content, **dump_options) -> bytes:
+    """Validate ``content`` (ORM rows included) and encode it straight to JSON.
+
+    pydantic-core writes the bytes itself, so the body skips FastAPI's
+    ``jsonable_encoder`` pass and the second validation of ``response_model``.
+    """
+    serializer = adapter(response_type)
+    value = serializer.validate_python(content, from_attributes=True)
+    return serializer.dump_json(value, by_alias=True, **dump_options)
+
+
+def typed_response(response_type, content, **dump_options) -> Response:
+    return Response(
+        encode(response_type, content, **dump_options), media_type="application/json"
+    )
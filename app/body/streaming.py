@@ -0,0 +1,115 @@
+from sqlalchemy import inspect
+from sqlalchemy.orm import Query
+from fastapi import Query as Param, Request
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import StreamingResponse
+from typing import Literal
+from pydantic import BaseModel
+from app.body.projection import record_fields
+from app.database.config import SessionLocal
+from dotenv import load_dotenv
+from itertools import islice
+import csv
+import io
+import json
+import os
+
+load_dotenv()
+STREAM_CHUNK_SIZE = int(os.getenv("STREAM_CHUNK_SIZE", "1000"))
+
+MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+ACCEPT_FORMATS = {
+    "application/x-ndjson": "ndjson",
+    "application/ndjson": "ndjson",
+    "application/jsonl": "ndjson",
+    "text/csv": "csv",
+}
+
+
+def stream_format(
+    request: Request,
+    fmt: Literal["json", "ndjson", "csv"] | None = Param(None, alias="format"),
+) -> str | None:
+    """Pick a streaming format from ``?format=`` or, failing that, ``Accept``.
+
+    ``None`` means the route should answer with its usual JSON body.
+    """
+    if fmt:
+        return None if fmt == "json" else fmt
+    for accepted in request.headers.get("accept", "").split(","):
+        media_type = accepted.split(";")[0].strip()
+        if media_type in ACCEPT_FORMATS:
+            return ACCEPT_FORMATS[media_type]
+    return None
+
+
+def ndjson_chunks(rows, columns: list[str]):
+    for chunk in rows:
+        yield "".join(
+            json.dumps(jsonable_encoder({name: getattr(row, name) for name in columns}))
+            + "\n"
+            for row in chunk
+        )
+
+
+def csv_chunks(rows, columns: list[str]):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    for chunk in rows:
+        writer.writerows([getattr(row, name) for name in columns] for row in chunk)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def query_chunks(
+    query: Query,
+    model,
+    fmt: str,
+    record: type[BaseModel] | None = None,
+    chunk_size: int = STREAM_CHUNK_SIZE,
+):
+    """Encode the rows of ``query`` as NDJSON or CSV, one chunk at a time.
+
+    Rows are fetched ``chunk_size`` at a time through ``yield_per`` (a server
+    side cursor where the driver has one), so memory does not grow with the
+    result. With a ``record`` response model only its columns are written.
+    Async sessions cannot be iterated outside their greenlet, so
+    those queries run again on a sync session of their own.
+    """
+    columns = record_fields(model, record)
+    session = query.session
+    own_session = session.get_bind(mapper=inspect(model)).dialect.is_async
+    if own_session:
+        session = SessionLocal()
+        query = query.with_session(session)
+
+    def rows():
+        try:
+            results = iter(query.yield_per(chunk_size))
+            while chunk := list(islice(results, chunk_size)):
+                yield chunk
+        finally:
+            if own_session:
+                session.close()
+
+    chunks = csv_chunks if fmt == "csv" else ndjson_chunks
+    return chunks(rows(), columns)
+
+
+def stream_query(
+    query: Query, model, fmt: str, record: type[BaseModel] | None = None
+) -> StreamingResponse:
+    headers = {}
+    if fmt == "csv":
+        headers["Content-Disposition"] = (
+            f'attachment; filename="{model.__tablename__}.csv"'
+        )
+    return StreamingResponse(
+        query_chunks(query, model, fmt, record),
+        media_type=MEDIA_TYPES[fmt],
+        headers=headers,
+    )
@@ -1,132 +1,126 @@
 from datetime import datetime, timezone
-from fastapi import Security, status, HTTPException, Depends
+from fastapi import Body, Security, status, HTTPException, Depends
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 from jose import jwt, JWTError
 from app.models import Description, Post, CalculateResponse, secret, dev, dev_n
+from app.body.cache import TTLCache
 from dotenv import load_dotenv
+import hashlib
+import time
 import os
 
 load_dotenv()
 SECRET_KEY = os.getenv("SECRET_KEY")
 ALGORITHM = "HS256"
+TOKEN_CACHE_SIZE = int(os.getenv("TOKEN_CACHE_SIZE", "10000"))
+TOKEN_CACHE_TTL = float(os.getenv("TOKEN_CACHE_TTL", "300"))
 
 security_scheme = HTTPBearer()
+token_cache = TTLCache(maxsize=TOKEN_CACHE_SIZE, ttl=TOKEN_CACHE_TTL)
 
 
-def verify_mathematician(
+def decode_token(token: str) -> dict:
+    key = hashlib.sha256(token.encode()).digest()
+    payload = token_cache.get(key)
+    if payload is not None:
+        return payload
+    payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    exp = payload.get("exp")
+    ttl = min(exp - time.time(), TOKEN_CACHE_TTL) if exp else TOKEN_CACHE_TTL
+    token_cache.set(key, payload, ttl=ttl)
+    return payload
+
+
+def current_principal(
     credentials: HTTPAuthorizationCredentials = Security(security_scheme),
-):
+) -> dict | None:
     try:
-        payload = jwt.decode(
-            credentials.credentials, SECRET_KEY, algorithms=[ALGORITHM]
-        )
-        if payload.get("mathematician_secret") is None:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="you are not a mathematician",
-            )
-        return payload
+        return decode_token(credentials.credentials)
     except JWTError:
+        return None
+
+
+def verify_mathematician(payload: dict | None = Depends(current_principal)):
+    if payload is None or payload.get("mathematician_secret") is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="you are not a mathematician",
         )
+    return payload
 
 
-def verify_developer(
-    credentials: HTTPAuthorizationCredentials = Security(security_scheme),
-):
-    try:
-        payload = jwt.decode(
-            credentials.credentials, SECRET_KEY, algorithms=[ALGORITHM]
-        )
-        if payload.get("code") is None:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="you are not a developer",
-            )
-        return payload
-    except JWTError:
+def verify_developer(payload: dict | None = Depends(current_principal)):
+    if payload is None or payload.get("code") is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED, detail="you are not a developer"
         )
+    return payload
 
 
-def verify_token(
-    credentials: HTTPAuthorizationCredentials = Security(security_scheme),
-):
+def verify_token(payload: dict | None = Depends(current_principal)):
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="not authenticated",
         headers={"WWW-Authenticate": "Bearer"},
     )
-    try:
-        payload = jwt.decode(
-            credentials.credentials, SECRET_KEY, algorithms=[ALGORITHM]
-        )
-        if payload.get("nationality") is None:
-            raise credentials_exception
-        exp = payload.get("exp")
-        if exp and datetime.fromtimestamp(exp, tz=timezone.utc) < datetime.now(
-            timezone.utc
-        ):
-            raise HTTPException(status_code=401, detail="token has expired")
-        return payload
-    except JWTError:
+    if payload is None or payload.get("nationality") is None:
         raise credentials_exception
+    exp = payload.get("exp")
+    if exp and datetime.fromtimestamp(exp, tz=timezone.utc) < datetime.now(
+        timezone.utc
+    ):
+        raise HTTPException(status_code=401, detail="token has expired")
+    return payload
 
 
 def enrich_input(
-    credentials: HTTPAuthorizationCredentials = Security(security_scheme),
+    payload: dict | None = Depends(current_principal),
     body: Description = Depends(),
 ) -> Post:
-    token = credentials.credentials
-    credentials_exception = HTTPException(
-        status_code=status.HTTP_401_UNAUTHORIZED, detail="could not validate"
-    )
-    try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        return Post(
-            description=body.description,
-            name=payload.get("sub"),
-            nationality=payload.get("nationality"),
+    if payload is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED, detail="could not validate"
         )
-    except JWTError:
-        return credentials_exception
+    return Post(
+        description=body.description,
+        name=payload.get("sub"),
+        nationality=payload.get("nationality"),
+    )
 
 
 def add_post(
-    credentials: HTTPAuthorizationCredentials = Security(security_scheme),
-    data: secret = Depends(),
+    payload: dict | None = Depends(current_principal),
+    operation: str | None = None,
+    numbers: str | None = None,
+    body: secret | None = Body(None),
 ) -> CalculateResponse:
-    try:
-        payload = jwt.decode(
-            credentials.credentials, SECRET_KEY, algorithms=[ALGORITHM]
-        )
-        return CalculateResponse(
-            numbers=data.numbers,
-            operation=data.operation,
-            result=data.result,
-            mathematician=payload.get("sub"),
-        )
-    except JWTError:
-        return HTTPException(
+    """Take ``operation`` and ``numbers`` from the query string, or from a JSON
+    body for inputs too long to fit in a URL."""
+    if payload is None:
+        raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED, detail="could not validate"
         )
+    if body is None:
+        if operation is None or numbers is None:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail="operation and numbers are required",
+            )
+        body = secret(operation=operation, numbers=numbers)
+    return CalculateResponse(
+        numbers=body.numbers,
+        operation=body.operation,
+        result=body.result,
+        mathematician=payload.get("sub"),
+    )
 
 
 def augument(
-    credentials: HTTPAuthorizationCredentials = Security(security_scheme),
+    payload: dict | None = Depends(current_principal),
     data: dev = Depends(),
 ) -> dev_n:
-    try:
-        payload = jwt.decode(
-            credentials.credentials, SECRET_KEY, algorithms=[ALGORITHM]
-        )
-        return dev_n(
-            developer_code=data.developer_code, developer_name=payload.get("sub")
-        )
-    except JWTError:
-        return HTTPException(
+    if payload is None:
+        raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED, detail="could not validate"
         )
+    return dev_n(developer_code=data.developer_code, developer_name=payload.get("sub"))
@@ -0,0 +1,85 @@
+from sqlalchemy import event, inspect, select, text
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session, ORMExecuteState
+from app.models_sql import TableVersion
+import random
+
+# Stamps are rows of table_versions in the database holding the table, bumped
+# by the transaction that writes it. Every process sees the same stamp, and a
+# replica carries the stamps that match its copy of the rows.
+
+_BUMP = text(
+    "INSERT INTO table_versions (name, version) VALUES (:name, :start) "
+    "ON CONFLICT (name) DO UPDATE SET version = table_versions.version + 1 "
+    "RETURNING version"
+)
+
+# the tables something reads a stamp of; writes to others skip the extra row
+VERSIONED_TABLES = {"tasks", "calculations", "markets"}
+
+commit_listeners = []
+
+
+def bump_version(conn: Connection, table: str) -> int:
+    # a stamp starts at a random value, so tags handed out before the
+    # database was recreated do not match the new one
+    start = random.randrange(1, 2**31)
+    return conn.execute(_BUMP, {"name": table, "start": start}).scalar_one()
+
+
+def table_version(db: Session, model) -> int:
+    """The committed stamp of ``model``'s table, as seen by ``db``."""
+    conn = db.connection(bind_arguments={"mapper": inspect(model)})
+    version = conn.execute(
+        select(TableVersion.version).where(TableVersion.name == model.__tablename__)
+    )
+    return version.scalar() or 0
+
+
+def mark_changed(session: Session, mapper):
+    table = mapper.local_table.name
+    if table in VERSIONED_TABLES:
+        session.info.setdefault("changed_tables", {})[table] = mapper
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_flushed_tables(session: Session, flush_context):
+    for objects in (session.new, session.dirty, session.deleted):
+        for obj in objects:
+            mark_changed(session, inspect(obj).mapper)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _collect_bulk_tables(state: ORMExecuteState):
+    if (state.is_insert or state.is_update or state.is_delete) and state.bind_mapper:
+        mark_changed(state.session, state.bind_mapper)
+
+
+@event.listens_for(Session, "before_commit")
+def _bump_changed_tables(session: Session):
+    """Bump inside the committing transaction, so a stamp and its rows land together.
+
+    The bump is the transaction's last statement, which keeps the stamp row
+    locked only for the commit itself.
+    """
+    session.flush()
+    changed = session.info.pop("changed_tables", {})
+    bumped = session.info.setdefault("bumped_versions", {})
+    # a fixed order keeps two writers of the same tables from deadlocking
+    for table in sorted(changed):
+        conn = session.connection(bind_arguments={"mapper": changed[table]})
+        bumped[table] = bump_version(conn, table)
+
+
+@event.listens_for(Session, "after_commit")
+def _announce_committed_versions(session: Session):
+    bumped = session.info.pop("bumped_versions", None)
+    if bumped:
+        for listener in commit_listeners:
+            listener(bumped)
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_rolled_back_tables(session: Session):
+    session.info.pop("changed_tables", None)
+    session.info.pop("bumped_versions", None)
@@ -1,14 +1,125 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, inspect
+from sqlalchemy.engine import make_url
 from sqlalchemy.orm import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import sessionmaker, Session
+from app.database.settings import configure, engine_options
 from dotenv import load_dotenv
 import os
 
 load_dotenv()
 DATABASE_URL = os.getenv("DATABASE_URL")
 
+ASYNC_DRIVERS = {"sqlite+aiosqlite": "sqlite", "postgresql+asyncpg": "postgresql"}
+
+url = make_url(DATABASE_URL)
+ASYNC_DATABASE = url.drivername in ASYNC_DRIVERS
+SYNC_DATABASE_URL = os.getenv("SYNC_DATABASE_URL") or (
+    url.set(drivername=ASYNC_DRIVERS[url.drivername]) if ASYNC_DATABASE else url
+)
+
+DOMAIN_TABLES = {
+    "tasks": ("users", "tasks"),
+    "markets": ("developers", "markets"),
+    "calculations": (
+        "mathematicians",
+        "calculations",
+        "calculation_results",
+        "calculation_jobs",
+        "calculation_rollups",
+    ),
+}
+TABLE_DOMAINS = {
+    table: domain for domain, tables in DOMAIN_TABLES.items() for table in tables
+}
+DOMAIN_DATABASE_URLS = {
+    domain: os.getenv(f"{domain.upper()}_DATABASE_URL") or DATABASE_URL
+    for domain in DOMAIN_TABLES
+}
+
+
+def sync_url(database_url: str):
+    target = make_url(database_url)
+    if target.drivername in ASYNC_DRIVERS:
+        return target.set(drivername=ASYNC_DRIVERS[target.drivername])
+    return target
+
+
+def async_url(database_url: str):
+    target = make_url(database_url)
+    for async_driver, driver in ASYNC_DRIVERS.items():
+        if target.drivername == driver:
+            return target.set(drivername=async_driver)
+    return target
+
+
+def routing_session(engines: dict, default):
+    """Session class that sends each domain's tables to its own engine."""
+
+    class RoutingSession(Session):
+        def get_bind(self, mapper=None, clause=None, **kwargs):
+            if mapper is not None:
+                table = inspect(mapper).local_table.name
+                return engines.get(TABLE_DOMAINS.get(table), default)
+            return super().get_bind(mapper=mapper, clause=clause, **kwargs)
+
+    return RoutingSession
+
+
+engine = configure(
+    create_engine(SYNC_DATABASE_URL, **engine_options(SYNC_DATABASE_URL))
+)
+domain_engines = {}
+for domain, domain_url in DOMAIN_DATABASE_URLS.items():
+    if domain_url == DATABASE_URL:
+        domain_engines[domain] = engine
+    else:
+        target = sync_url(domain_url)
+        domain_engines[domain] = configure(
+            create_engine(target, **engine_options(target))
+        )
+SessionLocal = sessionmaker(
+    autocommit=False,
+    autoflush=False,
+    bind=engine,
+    class_=routing_session(domain_engines, engine),
+)
+
+async_engine = None
+AsyncSessionLocal = None
+if ASYNC_DATABASE:
+    from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+    async_engine = configure(create_async_engine(url, **engine_options(url)))
+    async_domain_engines = {
+        domain: (
+            async_engine
+            if domain_url == DATABASE_URL
+            else configure(
+                create_async_engine(domain_url, **engine_options(domain_url))
+            )
+        )
+        for domain, domain_url in DOMAIN_DATABASE_URLS.items()
+    }
+    AsyncSessionLocal = async_sessionmaker(
+        async_engine,
+        autoflush=False,
+        expire_on_commit=False,
+        sync_session_class=routing_session(
+            {
+                domain: domain_engine.sync_engine
+                for domain, domain_engine in async_domain_engines.items()
+            },
+            async_engine.sync_engine,
+        ),
+    )
+
+
+def distinct_engines() -> list:
+    engines = [engine]
+    for domain_engine in domain_engines.values():
+        if domain_engine not in engines:
+            engines.append(domain_engine)
+    return engines
 
-engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False})
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 Base = declarative_base()
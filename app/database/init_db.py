@@ -1,7 +1,10 @@
-from app.database.config import Base, engine
-from app.models_sql import Task, Calculate, Market
+from app.database.config import Base, distinct_engines
+from app.database.migrate import run_migrations
+from app.models_sql import Task, Calculate, Market, User, Developer, Mathematician
 
 
 print("Creating database tables....")
-Base.metadata.create_all(bind=engine)
+for engine in distinct_engines():
+    Base.metadata.create_all(bind=engine)
 print("All tables created successfully")
+run_migrations()
@@ -0,0 +1,275 @@
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Connection
+from app.database.config import distinct_engines
+
+
+def _columns(conn: Connection, table: str) -> set[str]:
+    return {column["name"] for column in inspect(conn).get_columns(table)}
+
+
+def backfill_secret_fingerprints(conn: Connection):
+    from app.body.dependencies.auth_jwt import get_fingerprint, verify_secret
+    from app.routes.Calculation_auth import TRUE_SECRETS
+
+    columns = _columns(conn, "calculations")
+    if "mathematician_secret" not in columns:
+        return
+    if "secret_fingerprint" not in columns:
+        conn.execute(
+            text("ALTER TABLE calculations ADD COLUMN secret_fingerprint VARCHAR")
+        )
+    seen = set(
+        conn.execute(
+            text(
+                "SELECT secret_fingerprint FROM calculations "
+                "WHERE secret_fingerprint IS NOT NULL"
+            )
+        ).scalars()
+    )
+    pending = conn.execute(
+        text(
+            "SELECT id, mathematician_secret FROM calculations "
+            "WHERE mathematician_secret IS NOT NULL AND secret_fingerprint IS NULL "
+            "ORDER BY id"
+        )
+    ).all()
+    for row_id, hashed_secret in pending:
+        for candidate in TRUE_SECRETS:
+            if not verify_secret(candidate, hashed_secret):
+                continue
+            fingerprint = get_fingerprint(candidate)
+            if fingerprint not in seen:
+                seen.add(fingerprint)
+                conn.execute(
+                    text(
+                        "UPDATE calculations SET secret_fingerprint = :fp "
+                        "WHERE id = :id"
+                    ),
+                    {"fp": fingerprint, "id": row_id},
+                )
+            break
+    conn.execute(
+        text(
+            "CREATE UNIQUE INDEX IF NOT EXISTS ix_calculations_secret_fingerprint "
+            "ON calculations (secret_fingerprint)"
+        )
+    )
+
+
+def _add_foreign_key(conn: Connection, table: str, column: str, target: str):
+    if column not in _columns(conn, table):
+        conn.execute(
+            text(f"ALTER TABLE {table} ADD COLUMN {column} INTEGER REFERENCES {target}")
+        )
+    conn.execute(
+        text(f"CREATE INDEX IF NOT EXISTS ix_{table}_{column} ON {table} ({column})")
+    )
+
+
+def split_principal_tables(conn: Connection):
+    from app.models_sql import User, Developer, Mathematician
+
+    for model in (User, Developer, Mathematician):
+        model.__table__.create(conn, checkfirst=True)
+    _add_foreign_key(conn, "tasks", "user_id", "users(id)")
+    _add_foreign_key(conn, "markets", "developer_id", "developers(id)")
+    _add_foreign_key(conn, "calculations", "mathematician_id", "mathematicians(id)")
+
+    if "password" in _columns(conn, "tasks"):
+        conn.execute(
+            text(
+                "INSERT OR IGNORE INTO users (username, password, nationality) "
+                "SELECT username, password, nationality FROM tasks "
+                "WHERE password IS NOT NULL ORDER BY id"
+            )
+        )
+        conn.execute(text("DELETE FROM tasks WHERE password IS NOT NULL"))
+    conn.execute(
+        text(
+            "INSERT OR IGNORE INTO developers (developer_name, developer_code) "
+            "SELECT developer_name, developer_code FROM markets "
+            "WHERE section IS NULL AND developer_name IS NOT NULL ORDER BY id"
+        )
+    )
+    conn.execute(text("DELETE FROM markets WHERE section IS NULL"))
+    if "mathematician_secret" in _columns(conn, "calculations"):
+        conn.execute(
+            text(
+                "INSERT OR IGNORE INTO mathematicians "
+                "(mathematician, mathematician_secret, secret_fingerprint) "
+                "SELECT mathematician, mathematician_secret, secret_fingerprint "
+                "FROM calculations WHERE mathematician_secret IS NOT NULL ORDER BY id"
+            )
+        )
+        conn.execute(
+            text("DELETE FROM calculations WHERE mathematician_secret IS NOT NULL")
+        )
+        conn.execute(text("DROP INDEX IF EXISTS ix_calculations_secret_fingerprint"))
+
+    conn.execute(
+        text(
+            "UPDATE tasks SET user_id = "
+            "(SELECT id FROM users WHERE users.username = tasks.username) "
+            "WHERE user_id IS NULL"
+        )
+    )
+    conn.execute(
+        text(
+            "UPDATE markets SET developer_id = (SELECT id FROM developers "
+            "WHERE developers.developer_name = markets.developer_name) "
+            "WHERE developer_id IS NULL"
+        )
+    )
+    conn.execute(
+        text(
+            "UPDATE calculations SET mathematician_id = (SELECT id FROM mathematicians "
+            "WHERE mathematicians.mathematician = calculations.mathematician) "
+            "WHERE mathematician_id IS NULL"
+        )
+    )
+
+
+def add_pagination_indexes(conn: Connection):
+    conn.execute(
+        text(
+            "CREATE INDEX IF NOT EXISTS ix_calculations_time_id "
+            "ON calculations (time_of_calculation, id)"
+        )
+    )
+
+
+def rebuild_row_counters(conn: Connection):
+    from sqlalchemy.orm import Session
+    from app.body.counters import COUNTED, rebuild_counters
+    from app.models_sql import RowCounter
+
+    RowCounter.__table__.create(conn, checkfirst=True)
+    session = Session(bind=conn)
+    for model in COUNTED:
+        rebuild_counters(session, model)
+
+
+def add_calculation_results(conn: Connection):
+    from app.models_sql import CalculationResult
+
+    CalculationResult.__table__.create(conn, checkfirst=True)
+    _add_foreign_key(conn, "calculations", "result_id", "calculation_results(id)")
+
+
+def add_calculation_jobs(conn: Connection):
+    from app.models_sql import CalculationJob
+
+    CalculationJob.__table__.create(conn, checkfirst=True)
+
+
+def add_clear_jobs(conn: Connection):
+    from app.models_sql import ClearJob
+
+    ClearJob.__table__.create(conn, checkfirst=True)
+
+
+def pack_calculation_operands(conn: Connection, chunk_size: int = 5000):
+    from fastapi import HTTPException
+    from sqlalchemy import LargeBinary
+    from app.body.calc_engine import pack_numbers, parse_numbers
+
+    columns = _columns(conn, "calculations")
+    if "operands" not in columns:
+        blob = conn.dialect.type_compiler.process(LargeBinary())
+        conn.execute(text(f"ALTER TABLE calculations ADD COLUMN operands {blob}"))
+    if "operand_count" not in columns:
+        conn.execute(text("ALTER TABLE calculations ADD COLUMN operand_count INTEGER"))
+    if "numbers" not in columns:
+        return
+    last_id, unreadable = 0, []
+    while True:
+        rows = conn.execute(
+            text(
+                "SELECT id, numbers FROM calculations WHERE id > :last "
+                "AND numbers IS NOT NULL AND operands IS NULL ORDER BY id LIMIT :n"
+            ),
+            {"last": last_id, "n": chunk_size},
+        ).all()
+        if not rows:
+            break
+        packed = []
+        for row_id, numbers in rows:
+            try:
+                values = parse_numbers(numbers)
+            except HTTPException:
+                unreadable.append(row_id)
+                continue
+            packed.append(
+                {"id": row_id, "blob": pack_numbers(values), "n": int(values.size)}
+            )
+        if packed:
+            conn.execute(
+                text(
+                    "UPDATE calculations SET operands = :blob, operand_count = :n "
+                    "WHERE id = :id"
+                ),
+                packed,
+            )
+        last_id = rows[-1].id
+    if unreadable:
+        print(
+            f"{len(unreadable)} calculations have unreadable numbers "
+            f"(ids {unreadable[:10]}...), keeping the numbers column"
+        )
+    else:
+        conn.execute(text("ALTER TABLE calculations DROP COLUMN numbers"))
+
+
+def rebuild_calculation_rollups(conn: Connection):
+    from sqlalchemy.orm import Session
+    from app.body.rollups import rebuild_rollups
+    from app.models_sql import CalculationRollup
+
+    CalculationRollup.__table__.create(conn, checkfirst=True)
+    rebuild_rollups(Session(bind=conn))
+
+
+def bump_table_versions(conn: Connection):
+    """Migrations write rows behind the ORM, so no tag from before them stays valid."""
+    from app.body.versions import VERSIONED_TABLES, bump_version
+    from app.models_sql import TableVersion
+
+    TableVersion.__table__.create(conn, checkfirst=True)
+    for table in sorted(VERSIONED_TABLES):
+        bump_version(conn, table)
+
+
+def install_full_text_search(conn: Connection):
+    from app.body.search import install_all
+
+    if not install_all(conn):
+        print("FTS5 unavailable, search endpoints will use substring matching")
+
+
+MIGRATIONS = [
+    backfill_secret_fingerprints,
+    split_principal_tables,
+    add_pagination_indexes,
+    pack_calculation_operands,
+    add_calculation_results,
+    add_calculation_jobs,
+    add_clear_jobs,
+    # schema changes go above, migrations querying through the ORM below
+    rebuild_row_counters,
+    rebuild_calculation_rollups,
+    install_full_text_search,
+    bump_table_versions,
+]
+
+
+def run_migrations(bind=None):
+    for target in [bind] if bind is not None else distinct_engines():
+        for migration in MIGRATIONS:
+            with target.begin() as conn:
+                print(f"Applying {migration.__name__} to {target.url}....")
+                migration(conn)
+
+
+if __name__ == "__main__":
+    run_migrations()
+    print("All migrations applied successfully")
@@ -0,0 +1,141 @@
+from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.orm import sessionmaker
+from app.database import config
+from app.database.config import (
+    ASYNC_DATABASE,
+    SYNC_DATABASE_URL,
+    async_url,
+    domain_engines,
+    engine,
+    routing_session,
+    sync_url,
+)
+from app.database.settings import configure, engine_options
+from dotenv import load_dotenv
+from itertools import count
+from threading import Event, Thread
+import logging
+import os
+import sqlite3
+
+load_dotenv()
+REPLICA_DATABASE_URLS = [
+    replica.strip()
+    for replica in os.getenv("REPLICA_DATABASE_URLS", "").split(",")
+    if replica.strip()
+]
+LOCAL_REPLICA_PATH = os.getenv("LOCAL_REPLICA_PATH")
+REPLICA_REFRESH_SECONDS = float(os.getenv("REPLICA_REFRESH_SECONDS", "2"))
+READ_YOUR_WRITES_SECONDS = float(os.getenv("READ_YOUR_WRITES_SECONDS", "5"))
+
+
+def refresh_local_replica(
+    primary: str | None = None, replica: str | None = LOCAL_REPLICA_PATH
+):
+    """Copy the primary SQLite file onto the replica with the backup API.
+
+    The copy is a consistent snapshot, table_versions included, so the
+    replica's stamps always describe the rows it holds.
+    """
+    primary = primary or make_url(SYNC_DATABASE_URL).database
+    source = sqlite3.connect(primary)
+    target = sqlite3.connect(replica, timeout=30)
+    try:
+        source.backup(target)
+    finally:
+        target.close()
+        source.close()
+
+
+class ReplicaRefresher(Thread):
+    def __init__(self, interval: float = REPLICA_REFRESH_SECONDS):
+        super().__init__(name="replica-refresher", daemon=True)
+        self.interval = interval
+        self.stopped = Event()
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            try:
+                refresh_local_replica()
+            except sqlite3.Error:
+                logging.exception("replica refresh failed")
+
+    def stop(self):
+        self.stopped.set()
+
+
+def replica_sessionmaker(replica: str) -> sessionmaker:
+    """Sessions that read default-database domains from ``replica``.
+
+    Domains moved to their own database keep reading from that database.
+    """
+    target = sync_url(replica)
+    replica_engine = configure(create_engine(target, **engine_options(target)))
+    engines = {
+        domain: replica_engine if domain_engine is engine else domain_engine
+        for domain, domain_engine in domain_engines.items()
+    }
+    return sessionmaker(
+        autocommit=False,
+        autoflush=False,
+        bind=replica_engine,
+        class_=routing_session(engines, replica_engine),
+        info={"replica": True},
+    )
+
+
+def async_replica_sessionmaker(replica: str):
+    """``replica_sessionmaker`` for the async stack, over the async driver."""
+    from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+    target = async_url(replica)
+    replica_engine = configure(create_async_engine(target, **engine_options(target)))
+    engines = {
+        domain: (
+            replica_engine if domain_engine is config.async_engine else domain_engine
+        ).sync_engine
+        for domain, domain_engine in config.async_domain_engines.items()
+    }
+    return async_sessionmaker(
+        replica_engine,
+        autoflush=False,
+        expire_on_commit=False,
+        sync_session_class=routing_session(engines, replica_engine.sync_engine),
+        info={"replica": True},
+    )
+
+
+replica_urls = list(REPLICA_DATABASE_URLS)
+if LOCAL_REPLICA_PATH:
+    refresh_local_replica()
+    replica_urls.append(f"sqlite:///{LOCAL_REPLICA_PATH}")
+replica_sessions = [replica_sessionmaker(replica) for replica in replica_urls]
+async_replica_sessions = (
+    [async_replica_sessionmaker(replica) for replica in replica_urls]
+    if ASYNC_DATABASE
+    else []
+)
+_turn = count()
+
+
+def _pick(sessions: list):
+    if not sessions:
+        return None
+    return sessions[next(_turn) % len(sessions)]()
+
+
+def replica_session():
+    return _pick(replica_sessions)
+
+
+def async_replica_session():
+    return _pick(async_replica_sessions)
+
+
+def start_refresher() -> ReplicaRefresher | None:
+    if not LOCAL_REPLICA_PATH:
+        return None
+    refresher = ReplicaRefresher()
+    refresher.start()
+    return refresher
@@ -1,16 +1,41 @@
 from app.routes import tasks_sql, calculations_sql, market_sql
 from app.routes import task_auth, market_auth, Calculation_auth
+from app.routes import metrics
+from app.routes.async_routes import asyncify
+from app.database.config import ASYNC_DATABASE
+from app.database.replicas import start_refresher
+from app.body.dependencies.db_session import read_your_writes
+from app.body.calc_jobs import job_broker
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
 
 
-app = FastAPI(title="Three Dimensions", version="1.0")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    refresher = start_refresher()
+    job_broker.start()
+    yield
+    job_broker.stop()
+    if refresher:
+        refresher.stop()
+
+
+app = FastAPI(
+    title="Three Dimensions",
+    version="1.0",
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse,
+)
+
+app.middleware("http")(read_your_writes)
 
 app.include_router(Calculation_auth.router)
 app.include_router(market_auth.router)
 app.include_router(task_auth.router)
-app.include_router(tasks_sql.router)
-app.include_router(calculations_sql.router)
-app.include_router(market_sql.router)
+for data_router in (tasks_sql.router, calculations_sql.router, market_sql.router):
+    app.include_router(asyncify(data_router) if ASYNC_DATABASE else data_router)
+app.include_router(metrics.router)
 
 
 @app.get("/", include_in_schema=False)
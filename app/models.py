@@ -1,5 +1,6 @@
-from pydantic import BaseModel, ConfigDict
-from typing import Optional, List, Generic, TypeVar
+from pydantic import BaseModel, ConfigDict, Field
+from datetime import date, datetime
+from typing import Optional, List, Dict, Generic, TypeVar
 
 T = TypeVar("T")
 
@@ -28,6 +29,16 @@ class dev(BaseModel):
     developer_code: str
 
 
+class MarketSection(BaseModel):
+    section: int
+    trade: str
+    traders: int
+    sales: float
+    taxes: str
+    union: str
+    developer_code: int
+
+
 class dev_n(BaseModel):
     developer_name: str
     developer_code: str
@@ -54,18 +65,132 @@ class MarketResponse(BaseModel):
     developer_name: str
     section: int
     trade: str
-    traders: int
+    traders: Optional[int] = None
     sales_per_day: float
     taxes: str
     union: str
 
-    class Config:
-        model_config = ConfigDict(from_attributes=True)
+    model_config = ConfigDict(from_attributes=True)
+
+
+class TaskRecord(TaskResponse):
+    username: Optional[str] = None
+    time_of_execution: Optional[datetime] = None
+
+
+class CalculationRecord(CalculateResponse):
+    id: int
+    time_of_calculation: Optional[datetime] = None
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class Message(BaseModel):
+    message: str
+
+
+class TaskPage(BaseModel):
+    total: int
+    page: Optional[int] = None
+    limit: int
+    tasks: List[TaskRecord]
+    next_cursor: Optional[str] = None
+    prev_cursor: Optional[str] = None
+
+
+class TaskResults(BaseModel):
+    results: List[TaskRecord]
+
+
+class TaskFile(BaseModel):
+    task: TaskRecord = Field(alias="this is your requested file")
+
+
+class CompletedTasks(BaseModel):
+    tasks: List[TaskRecord] = Field(alias="you have completed these tasks")
+    total: int = Field(alias="total completed")
+
+
+class UndoneTasks(BaseModel):
+    tasks: List[TaskRecord] = Field(alias="you have not completed these tasks")
+    total: int = Field(alias="total completed")
+
+
+class MarketPage(BaseModel):
+    total: int = Field(alias="total sections developed")
+    page: Optional[int] = None
+    limit: int
+    sections: List[MarketResponse] = Field(alias="required data")
+    next_cursor: Optional[str] = None
+    prev_cursor: Optional[str] = None
+
+
+class MarketResults(BaseModel):
+    total: int = Field(alias="total results")
+    results: List[MarketResponse]
+
+
+class MarketGroup(BaseModel):
+    group: Optional[str] = None
+    count: int
+    sum: float
+    mean: float
+    min: float
+    max: float
+    weighted_sales_per_day: Optional[float] = None
+    percentiles: Dict[str, float] = {}
+
+
+class RankedSection(BaseModel):
+    section: int
+    sales_per_day: Optional[float] = None
+    traders: Optional[float] = None
+
+
+class MarketAnalytics(BaseModel):
+    group_by: Optional[str] = None
+    metric: str
+    engine: str
+    groups: List[MarketGroup]
+    top_sections: List[RankedSection] = []
+
+
+class CalculationResults(BaseModel):
+    result: List[CalculationRecord]
+
+
+class CalculationGroup(BaseModel):
+    mathematician: Optional[str] = None
+    operation: Optional[str] = None
+    day: Optional[date] = None
+    count: int
+    result_count: int
+    sum: float
+    mean: Optional[float] = None
+    std: Optional[float] = None
+    min: Optional[float] = None
+    max: Optional[float] = None
+
+
+class CalculationStats(BaseModel):
+    group_by: List[str]
+    groups: List[CalculationGroup]
+
+
+class RecentCalculations(BaseModel):
+    total: int
+    page: Optional[int] = None
+    limit: int
+    calculations: List[CalculationRecord] = Field(alias="most recent calculation")
+    next_cursor: Optional[str] = None
+    prev_cursor: Optional[str] = None
 
 
 class PaginatedResponse(BaseModel, Generic[T]):
     status: str = "success"
-    page: int
+    page: Optional[int] = None
     limit: int
     total: int
     data: List[T]
+    next_cursor: Optional[str] = None
+    prev_cursor: Optional[str] = None
@@ -1,5 +1,13 @@
-from sqlalchemy import Column, Integer, Boolean, DateTime, String, Float
+from sqlalchemy import Column, Integer, Boolean, DateTime, String, Float, ForeignKey
+from sqlalchemy import Date, Index, LargeBinary, Text
+from sqlalchemy.orm import synonym
 from app.database.config import Base
+from app.body.calc_engine import (
+    format_numbers,
+    pack_numbers,
+    parse_numbers,
+    unpack_numbers,
+)
 from datetime import datetime, timezone
 
 
@@ -7,11 +15,34 @@ def current_utc_time():
     return datetime.now(timezone.utc)
 
 
+class User(Base):
+    __tablename__ = "users"
+    id = Column(Integer, primary_key=True, index=True)
+    username = Column(String, unique=True, index=True, nullable=False)
+    password = Column(String, nullable=False)
+    nationality = Column(String)
+
+
+class Developer(Base):
+    __tablename__ = "developers"
+    id = Column(Integer, primary_key=True, index=True)
+    developer_name = Column(String, unique=True, index=True, nullable=False)
+    developer_code = Column(String, nullable=False)
+
+
+class Mathematician(Base):
+    __tablename__ = "mathematicians"
+    id = Column(Integer, primary_key=True, index=True)
+    mathematician = Column(String, unique=True, index=True, nullable=False)
+    mathematician_secret = Column(String, nullable=False)
+    secret_fingerprint = Column(String, unique=True, index=True)
+
+
 class Task(Base):
     __tablename__ = "tasks"
     id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), index=True)
     username = Column(String, index=True)
-    password = Column(String)
     description = Column(String)
     complete = Column(Boolean, default=False)
     nationality = Column(String)
@@ -21,6 +52,7 @@ class Task(Base):
 class Market(Base):
     __tablename__ = "markets"
     id = Column(Integer, primary_key=True, index=True)
+    developer_id = Column(Integer, ForeignKey("developers.id"), index=True)
     developer_code = Column(Integer, unique=True)
     developer_name = Column(String)
     section = Column(Integer)
@@ -34,10 +66,91 @@ class Market(Base):
 class Calculate(Base):
     __tablename__ = "calculations"
     id = Column(Integer, primary_key=True, index=True)
+    mathematician_id = Column(Integer, ForeignKey("mathematicians.id"), index=True)
     mathematician = Column(String)
-    mathematician_secret = Column(String)
     username = Column(String)
     operation = Column(String)
-    numbers = Column(String)
+    operands = Column(LargeBinary)
+    operand_count = Column(Integer)
+    # scalars stay on the row for the rollups, lists only in calculation_results
     result = Column(Float)
+    result_id = Column(Integer, ForeignKey("calculation_results.id"), index=True)
     time_of_calculation = Column(DateTime, default=current_utc_time)
+
+    __table_args__ = (Index("ix_calculations_time_id", "time_of_calculation", "id"),)
+
+    def _get_numbers(self) -> str | None:
+        if self.operands is None:
+            return None
+        return format_numbers(unpack_numbers(self.operands))
+
+    def _set_numbers(self, numbers):
+        """Store comma separated text or an already parsed array."""
+        values = parse_numbers(numbers) if isinstance(numbers, str) else numbers
+        self.operands = pack_numbers(values)
+        self.operand_count = len(values)
+
+    # the API reads and writes comma separated text, the row keeps float64 bytes
+    numbers = synonym("operands", descriptor=property(_get_numbers, _set_numbers))
+
+
+class CalculationResult(Base):
+    __tablename__ = "calculation_results"
+    id = Column(Integer, primary_key=True, index=True)
+    digest = Column(String, unique=True, index=True, nullable=False)
+    operation = Column(String, nullable=False)
+    count = Column(Integer, nullable=False)
+    result = Column(Float)
+    result_values = Column(Text)
+    created_at = Column(DateTime, default=current_utc_time)
+
+
+class CalculationJob(Base):
+    __tablename__ = "calculation_jobs"
+    id = Column(String, primary_key=True)
+    mathematician_id = Column(Integer, ForeignKey("mathematicians.id"), index=True)
+    mathematician = Column(String)
+    operation = Column(String)
+    numbers = Column(Text)
+    status = Column(String, nullable=False, default="pending")
+    result = Column(Text)
+    error = Column(String)
+    calculation_id = Column(Integer, ForeignKey("calculations.id"))
+    created_at = Column(DateTime, default=current_utc_time)
+    finished_at = Column(DateTime)
+
+
+class ClearJob(Base):
+    __tablename__ = "clear_jobs"
+    id = Column(String, primary_key=True)
+    table_name = Column(String, nullable=False)
+    status = Column(String, nullable=False, default="pending")
+    deleted = Column(Integer, nullable=False, default=0)
+    error = Column(String)
+    created_at = Column(DateTime, default=current_utc_time)
+    finished_at = Column(DateTime, index=True)
+
+
+class CalculationRollup(Base):
+    __tablename__ = "calculation_rollups"
+    mathematician = Column(String, primary_key=True)
+    operation = Column(String, primary_key=True)
+    day = Column(Date, primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
+    result_count = Column(Integer, nullable=False, default=0)
+    total = Column(Float, nullable=False, default=0.0)
+    sum_squares = Column(Float, nullable=False, default=0.0)
+    minimum = Column(Float)
+    maximum = Column(Float)
+
+
+class RowCounter(Base):
+    __tablename__ = "row_counters"
+    key = Column(String, primary_key=True)
+    value = Column(Integer, nullable=False, default=0)
+
+
+class TableVersion(Base):
+    __tablename__ = "table_versions"
+    name = Column(String, primary_key=True)
+    version = Column(Integer, nullable=False)
@@ -1,14 +1,15 @@
 from fastapi import Depends, HTTPException, APIRouter, status
+from fastapi.concurrency import run_in_threadpool
 from app.body.dependencies.auth_jwt import (
-    verify_secret,
+    verify_secret_async,
     get_fingerprint,
     create_access_token,
-    get_hashed_secret,
+    get_hashed_secret_async,
 )
-from app.models_sql import Calculate
+from app.models_sql import Mathematician
 from datetime import timedelta
 from sqlalchemy.orm import Session
-from app.body.dependencies.db_session import get_db
+from app.body.dependencies.db_session import get_db, save_new
 from fastapi import Form
 
 router = APIRouter(prefix="/Mathematician Auth", tags=["Secured Calculations"])
@@ -16,8 +17,25 @@ router = APIRouter(prefix="/Mathematician Auth", tags=["Secured Calculations"])
 TRUE_SECRETS = {"pie", "radius", "trig", "fraction"}
 
 
+def find_mathematician(db: Session, mathematician: str) -> Mathematician | None:
+    return (
+        db.query(Mathematician)
+        .filter(Mathematician.mathematician == mathematician)
+        .first()
+    )
+
+
+def secret_told(db: Session, fingerprint: str) -> bool:
+    return (
+        db.query(Mathematician.id)
+        .filter(Mathematician.secret_fingerprint == fingerprint)
+        .first()
+        is not None
+    )
+
+
 @router.post("/registration")
-def register(
+async def register(
     mathematician: str = Form(...),
     mathematician_secret: str = Form(...),
     db: Session = Depends(get_db),
@@ -27,25 +45,32 @@ def register(
             status_code=403, detail="access denied, you do not know the secret"
         )
     fingerprint = get_fingerprint(mathematician_secret)
-    calc = db.query(Calculate.mathematician_secret).all()
-    for (stored_secret,) in calc:
-        if get_fingerprint(stored_secret) and stored_secret == fingerprint:
-            raise HTTPException(
-                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
-                detail="you can not tell the same secret twice",
-            )
-    hashed_secret = get_hashed_secret(mathematician_secret)
-    new_mathematician = Calculate(
-        mathematician=mathematician.strip(), mathematician_secret=hashed_secret
+    already_told = HTTPException(
+        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+        detail="you can not tell the same secret twice",
+    )
+    name_taken = HTTPException(
+        status_code=400, detail="mathematician is already registered"
     )
-    db.add(new_mathematician)
-    db.commit()
-    db.refresh(new_mathematician)
+    if await run_in_threadpool(find_mathematician, db, mathematician.strip()):
+        raise name_taken
+    if await run_in_threadpool(secret_told, db, fingerprint):
+        raise already_told
+    hashed_secret = await get_hashed_secret_async(mathematician_secret)
+    new_mathematician = Mathematician(
+        mathematician=mathematician.strip(),
+        mathematician_secret=hashed_secret,
+        secret_fingerprint=fingerprint,
+    )
+    if not await run_in_threadpool(save_new, db, new_mathematician):
+        if await run_in_threadpool(secret_told, db, fingerprint):
+            raise already_told
+        raise name_taken
     return {mathematician: "you are successfully registerd, welcome"}
 
 
 @router.post("/logins")
-def login(
+async def login(
     mathematician: str = Form(...),
     mathematician_secret: str = Form(...),
     db: Session = Depends(get_db),
@@ -54,17 +79,16 @@ def login(
         raise HTTPException(
             status_code=403, detail="access denied, you do not know the secret"
         )
-    calc = (
-        db.query(Calculate)
-        .filter(Calculate.mathematician == mathematician.strip())
-        .first()
-    )
-    if not calc or not verify_secret(mathematician_secret, calc.mathematician_secret):
+    calc = await run_in_threadpool(find_mathematician, db, mathematician.strip())
+    if not calc or not await verify_secret_async(
+        mathematician_secret, calc.mathematician_secret
+    ):
         raise HTTPException(status_code=403, detail="access denied, invalid entry")
     token_expires = timedelta(minutes=60)
     create_access = create_access_token(
         data={
             "sub": calc.mathematician,
+            "uid": calc.id,
             "mathematician_secret": calc.mathematician_secret,
         },
         expires_delta=token_expires,
@@ -0,0 +1,109 @@
+from fastapi import APIRouter, Depends
+from fastapi.routing import APIRoute
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.body.dependencies.db_session import (
+    get_async_db,
+    get_async_read_db,
+    get_async_write_db,
+    get_db,
+    get_read_db,
+    get_write_db,
+)
+import inspect
+
+# the async session each sync session dependency stands for, same routing
+ASYNC_SESSIONS = {
+    get_db: get_async_db,
+    get_read_db: get_async_read_db,
+    get_write_db: get_async_write_db,
+}
+
+# everything add_api_route takes besides the path and the endpoint
+ROUTE_OPTIONS = (
+    "response_model",
+    "status_code",
+    "tags",
+    "dependencies",
+    "summary",
+    "description",
+    "response_description",
+    "responses",
+    "deprecated",
+    "methods",
+    "operation_id",
+    "response_model_include",
+    "response_model_exclude",
+    "response_model_by_alias",
+    "response_model_exclude_unset",
+    "response_model_exclude_defaults",
+    "response_model_exclude_none",
+    "include_in_schema",
+    "response_class",
+    "name",
+    "callbacks",
+    "openapi_extra",
+    "generate_unique_id_function",
+)
+
+
+def session_parameter(endpoint) -> str | None:
+    """Name of the parameter ``endpoint`` receives its sync session through."""
+    for param in inspect.signature(endpoint).parameters.values():
+        dependency = getattr(param.default, "dependency", None)
+        if dependency in ASYNC_SESSIONS:
+            return param.name
+    return None
+
+
+def asyncify_endpoint(endpoint, name: str = "db"):
+    """Wrap a sync ``Session`` handler into an ``async def`` one.
+
+    The wrapper receives an ``AsyncSession`` from the async twin of the
+    handler's session dependency, so reads still go to a replica and writes
+    still open the read-your-writes window, and runs the original handler
+    through ``AsyncSession.run_sync``: every query goes over the async driver
+    on the event loop instead of occupying a threadpool worker.
+    """
+    signature = inspect.signature(endpoint)
+
+    async def wrapper(**kwargs):
+        db: AsyncSession = kwargs.pop(name)
+        return await db.run_sync(lambda session: endpoint(**{name: session}, **kwargs))
+
+    wrapper.__signature__ = signature.replace(
+        parameters=[
+            (
+                param.replace(
+                    annotation=AsyncSession,
+                    default=Depends(ASYNC_SESSIONS[param.default.dependency]),
+                )
+                if param.name == name
+                else param
+            )
+            for param in signature.parameters.values()
+        ]
+    )
+    wrapper.__name__ = endpoint.__name__
+    wrapper.__qualname__ = endpoint.__qualname__
+    wrapper.__doc__ = endpoint.__doc__
+    wrapper.__module__ = endpoint.__module__
+    return wrapper
+
+
+def asyncify(router: APIRouter) -> APIRouter:
+    """Build the async twin of a router whose handlers depend on a session."""
+    async_router = APIRouter()
+    for route in router.routes:
+        if not isinstance(route, APIRoute):
+            async_router.routes.append(route)
+            continue
+        endpoint = route.endpoint
+        name = session_parameter(endpoint)
+        if name and not inspect.iscoroutinefunction(endpoint):
+            endpoint = asyncify_endpoint(endpoint, name)
+        async_router.add_api_route(
+            route.path,
+            endpoint,
+            **{option: getattr(route, option) for option in ROUTE_OPTIONS},
+        )
+    return async_router
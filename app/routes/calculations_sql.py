@@ -1,18 +1,55 @@
-import math
-import operator
-from functools import reduce
+from sqlalchemy import insert
 from sqlalchemy.orm import Session
-from app.body.dependencies.db_session import get_db
-from app.models_sql import Calculate
+from app.body.dependencies.db_session import get_db, get_read_db, get_write_db
+from app.body.dependencies.principals import principal_id
+from app.body.pagination import paginate
+from app.body.counters import row_count, track_rows
+from app.body.rollups import summarize, track_rollups
+from app.body.batch import batch_body, batch_report, validate_batch
+from app.body.search import fts_available, fts_query, fts_searchable
+from app.body.streaming import stream_format, stream_query
+from app.body.calc_engine import pack_numbers, parse_numbers
+from app.body.result_cache import result_cache
+from app.body.concurrency import off_loop
+from app.body.calc_jobs import (
+    CALC_JOB_THRESHOLD,
+    enqueue,
+    enqueue_all,
+    job_view,
+    operand_count,
+)
+from app.body.bulk_delete import (
+    clear_job_status,
+    delete_all,
+    run_clear_job,
+    start_clear_job,
+)
+from app.models_sql import Calculate, CalculationJob, Mathematician
 import logging
-from datetime import datetime, timezone
-from fastapi import APIRouter, HTTPException, Depends, Query
+from datetime import date, datetime, timezone
+from fastapi import APIRouter, HTTPException, Depends, Query, BackgroundTasks
+from fastapi import Response
 from pathlib import Path
 from app.body.verify_jwt import verify_mathematician, add_post
-from app.models import secret, CalculateResponse, PaginatedResponse
-from typing import List
+from app.body.serializers import encode, typed_response
+from app.body.entity_cache import entity_cache
+from app.body.etags import cached_response, conditional, tagged
+from app.body.projection import project, record_columns
+from app.models import (
+    secret,
+    CalculateResponse,
+    CalculationRecord,
+    CalculationResults,
+    CalculationStats,
+    Message,
+    PaginatedResponse,
+    RecentCalculations,
+)
+from typing import List, Literal
+from pydantic import TypeAdapter
 
 router = APIRouter(prefix="/Cal_Sql", tags=["Mathematics"])
+calculation_batch = TypeAdapter(List[secret])
 LOGFILE = Path("calculations.log")
 LOGFILE.parent.mkdir(parents=True, exist_ok=True)
 logging.basicConfig(
@@ -29,73 +66,121 @@ def secure(payload: dict = Depends(verify_mathematician)):
 
 @router.post("/calculate")
 def mathing(
+    response: Response,
+    background: bool = False,
     data: CalculateResponse = Depends(add_post),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_write_db),
     payload: dict = Depends(verify_mathematician),
 ):
     calc = Calculate(
-        numbers=data.numbers,
+        mathematician_id=principal_id(
+            db, Mathematician, Mathematician.mathematician, payload
+        ),
         operation=data.operation,
         mathematician=data.mathematician,
         result=data.result,
         time_of_calculation=datetime.now(timezone.utc),
     )
+    # large inputs are queued so they do not hold the request worker
+    if background or operand_count(data.numbers) >= CALC_JOB_THRESHOLD:
+        job_id = enqueue(
+            db,
+            mathematician_id=calc.mathematician_id,
+            mathematician=calc.mathematician,
+            operation=calc.operation,
+            numbers=data.numbers,
+        )
+        logging.info("calculation job %s queued", job_id)
+        response.status_code = 202
+        return {"message": "Calculation queued", "job_id": job_id, "status": "pending"}
+    values = off_loop(parse_numbers, data.numbers)
+    calc.numbers = values
+    result, calc.result_id = result_cache.evaluate(db, calc.operation, values)
+    logging.info("calculation done %s over %s numbers", calc.operation, values.size)
+    # element-wise operations answer with a list, which has no result column
+    calc.result = result if isinstance(result, float) else None
+    db.add(calc)
+    db.commit()
+    db.refresh(calc)
+    return {"message": "Calculation done successfully", "data": result}
 
-    numbers_list = [float(num.strip()) for num in calc.numbers.split(",")]
 
-    if calc.operation == "add":
-        result = sum(numbers_list)
-        calc.result = result
-        db.add(calc)
-        db.commit()
-        db.refresh(calc)
-        return {"message": "Calculation done successfully", "data": result}
-    elif calc.operation == "minus":
-        result = reduce(lambda x, y: x - y, numbers_list)
-        logging.info(f"calculation done {calc.operation}, result{result} ")
-        calc.result = result
-        db.add(calc)
-        db.commit()
-        db.refresh(calc)
-        return {"message": "Calculation done successfully", "data": result}
-    elif calc.operation == "times":
-        result = reduce(operator.mul, numbers_list)
-        logging.info(f"calculation done {calc.operation}, result{result} ")
-        calc.result = result
-        db.add(calc)
-        db.commit()
-        db.refresh(calc)
-        return {
-            "message": "Calculation done successfully",
-            "data": result,
-        }
-    elif calc.operation == "divide":
+@router.post("/batch")
+def mathing_batch(
+    items: list = Depends(batch_body),
+    db: Session = Depends(get_write_db),
+    payload: dict = Depends(verify_mathematician),
+):
+    valid, failed = validate_batch(calculation_batch, items)
+    failed = {index: {"errors": errors} for index, errors in failed.items()}
+    mathematician_id = principal_id(
+        db, Mathematician, Mathematician.mathematician, payload
+    )
+    now = datetime.now(timezone.utc)
+    indexes, rows = [], []
+    queued_indexes, jobs = [], []
+    for index, item in valid.items():
+        # the same cut-off as /calculate, large items become jobs
+        if operand_count(item.numbers) >= CALC_JOB_THRESHOLD:
+            queued_indexes.append(index)
+            jobs.append(
+                {
+                    "mathematician_id": mathematician_id,
+                    "mathematician": payload.get("sub"),
+                    "operation": item.operation,
+                    "numbers": item.numbers,
+                }
+            )
+            continue
         try:
-            result = reduce(operator.truediv, numbers_list)
-        except ZeroDivisionError:
-            raise HTTPException(status_code=400, detail="Cannot divide by zero")
-        logging.info(f"calculation done {calc.operation}, result{result} ")
-        calc.result = result
-        db.add(calc)
-        db.commit()
-        db.refresh(calc)
-        return {
-            "message": "Calculation done successfully",
-            "data": result,
-        }
-    elif calc.operation == "sqrt":
-        result = math.sqrt(numbers_list[0])
-        logging.info(f"calculation done {calc.operation}, result{result} ")
-        calc.result = result
-        db.add(calc)
+            values = off_loop(parse_numbers, item.numbers)
+            result, result_id = result_cache.evaluate(db, item.operation, values)
+        except HTTPException as exc:
+            failed[index] = {"errors": [{"loc": [], "msg": exc.detail}]}
+            continue
+        indexes.append(index)
+        rows.append(
+            {
+                "mathematician_id": mathematician_id,
+                "mathematician": payload.get("sub"),
+                "operation": item.operation,
+                "operands": pack_numbers(values),
+                "operand_count": int(values.size),
+                "result": result if isinstance(result, float) else None,
+                "result_id": result_id,
+                "time_of_calculation": now,
+            }
+        )
+    created = {}
+    if rows:
+        ids = db.scalars(
+            insert(Calculate).returning(Calculate.id, sort_by_parameter_order=True),
+            rows,
+        ).all()
+        track_rows(db, Calculate, rows)
+        track_rollups(db, rows)
         db.commit()
-        db.refresh(calc)
-        return {
-            "message": "Calculation done successfully",
-            "data": result,
-        }
-    else:
-        raise HTTPException(status_code=400, detail="unsupported operation")
+        created = dict(zip(indexes, ids))
+    queued = dict(zip(queued_indexes, enqueue_all(db, jobs))) if jobs else {}
+    logging.info(
+        "batch of %s calculations, %s stored, %s queued",
+        len(items),
+        len(created),
+        len(queued),
+    )
+    return batch_report(len(items), created, failed, queued)
+
+
+@router.get("/jobs/{job_id}")
+def job_status(
+    job_id: str,
+    db: Session = Depends(get_db),
+    payload: dict = Depends(verify_mathematician),
+):
+    job = db.get(CalculationJob, job_id)
+    if not job or job.mathematician != payload.get("sub"):
+        raise HTTPException(status_code=404, detail="job not found")
+    return job_view(db, job)
 
 
 @router.get(
@@ -104,97 +189,183 @@ def mathing(
     response_model_exclude_none=True,
 )
 def get_all(
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     page: int = (Query(1, ge=1)),
     limit: int = (Query(10, le=100)),
+    cursor: str | None = None,
+    exact_total: bool = False,
     payload: dict = Depends(verify_mathematician),
+    tag: str | None = Depends(conditional(Calculate)),
 ):
-    offset = (page - 1) * limit
-    total = db.query(Calculate).count()
-    query = db.query(Calculate)
-    result = query.offset(offset).limit(limit).all()
-    data = [
-        CalculateResponse.model_validate(
+    if cached := cached_response(tag):
+        return cached
+    total = row_count(db, Calculate, exact=exact_total)
+    result, next_cursor, prev_cursor = paginate(
+        project(db.query(Calculate), Calculate, CalculateResponse),
+        [Calculate.id],
+        page,
+        limit,
+        cursor,
+    )
+    return tagged(
+        tag,
+        typed_response(
+            PaginatedResponse[CalculateResponse],
             {
-                "mathematician": item.mathematician,
-                "numbers": item.numbers,
-                "operation": item.operation,
-                "result": item.result,
-            }
-        )
-        for item in result
-    ]
-    return PaginatedResponse(total=total, page=page, limit=limit, data=data)
+                "total": total,
+                "page": page,
+                "limit": limit,
+                "data": result,
+                "next_cursor": next_cursor,
+                "prev_cursor": prev_cursor,
+            },
+            exclude={"page"} if cursor else None,
+            exclude_none=True,
+        ),
+    )
 
 
-@router.get("/filter")
+@router.get("/filter", response_model=CalculationResults | Message)
 def search(
     operation: str,
-    db: Session = Depends(get_db),
+    mode: Literal["fts", "substring"] | None = None,
+    page: int = Query(1, ge=1),
+    limit: int | None = Query(None, ge=1, le=1000),
+    fmt: str | None = Depends(stream_format),
+    db: Session = Depends(get_read_db),
     payload: dict = Depends(verify_mathematician),
 ):
-    query = db.query(Calculate)
-    if operation:
-        query = query.filter(Calculate.operation.ilike(f"%{operation}%"))
+    terms = {"operation": operation}
+    if fts_searchable(terms) and mode != "substring" and fts_available(db, Calculate):
+        columns = record_columns(Calculate, CalculationRecord)
+        query = fts_query(db, Calculate, terms, page, limit, columns)
+    else:
+        query = project(db.query(Calculate), Calculate, CalculationRecord)
+        if operation:
+            query = query.filter(Calculate.operation.ilike(f"%{operation}%"))
+        if limit:
+            query = query.order_by(Calculate.id).offset((page - 1) * limit)
+            query = query.limit(limit)
+    if fmt:
+        return stream_query(query, Calculate, fmt, CalculationRecord)
     result = query.all()
     if not result:
         return {"message": "sorry, no data"}
-    return {"result": result}
+    return typed_response(CalculationResults, {"result": result})
 
 
-@router.get("/retrieve_some/{calc_id}")
+@router.get("/retrieve_some/{calc_id}", response_model=CalculationRecord | Message)
 def fetch_some(
     calc_id: int,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     payload: dict = Depends(verify_mathematician),
 ):
-    data = db.query(Calculate).filter(Calculate.id == calc_id).first()
-    if not data:
+    def load(session: Session) -> bytes | None:
+        data = project(session.query(Calculate), Calculate, CalculationRecord)
+        data = data.filter(Calculate.id == calc_id).first()
+        if data:
+            return encode(CalculationRecord, data)
+
+    body = entity_cache.fetch(db, Calculate, calc_id, load)
+    if body is None:
         return {"message": "invalid id"}
-    return data
+    return Response(body, media_type="application/json")
 
 
-@router.get("/recent_Calculations")
+@router.get(
+    "/stats", response_model=CalculationStats, response_model_exclude_unset=True
+)
+def stats(
+    group_by: List[Literal["mathematician", "operation", "day"]] = Query(["operation"]),
+    mathematician: str | None = None,
+    operation: str | None = None,
+    start: date | None = None,
+    end: date | None = None,
+    db: Session = Depends(get_read_db),
+    payload: dict = Depends(verify_mathematician),
+):
+    group_by = list(dict.fromkeys(group_by))
+    groups = summarize(
+        db,
+        group_by,
+        mathematician=mathematician,
+        operation=operation,
+        start=start,
+        end=end,
+    )
+    return typed_response(
+        CalculationStats, {"group_by": group_by, "groups": groups}, exclude_unset=True
+    )
+
+
+@router.get("/recent_Calculations", response_model=RecentCalculations | Message)
 def recent_calculations(
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     page: int = Query(1, ge=1),
     limit: int = Query(10, le=100),
+    cursor: str | None = None,
+    exact_total: bool = False,
     payload: dict = Depends(verify_mathematician),
 ):
-    offset = (page - 1) * limit
-    total = db.query(Calculate).count()
-    data = db.query(Calculate).offset(offset).limit(limit).all()
+    total = row_count(db, Calculate, exact=exact_total)
+    data, next_cursor, prev_cursor = paginate(
+        project(db.query(Calculate), Calculate, CalculationRecord),
+        [Calculate.time_of_calculation, Calculate.id],
+        page,
+        limit,
+        cursor,
+        descending=True,
+    )
     if data:
-        sorted_calcs = sorted(
-            data,
-            key=lambda x: x.time_of_calculation,
-            reverse=True,
+        return typed_response(
+            RecentCalculations,
+            {
+                "total": total,
+                "page": page,
+                "limit": limit,
+                "most recent calculation": data,
+                "next_cursor": next_cursor,
+                "prev_cursor": prev_cursor,
+            },
+            exclude={"page"} if cursor else None,
         )
-        return {
-            "total": total,
-            "page": page,
-            "limit": limit,
-            "most recent calculation": sorted_calcs,
-        }
     else:
         return {"message": "no calculations found for this user"}
 
 
 @router.delete("/clear_all")
-def clear(db: Session = Depends(get_db), payload: dict = Depends(verify_mathematician)):
-    data = db.query(Calculate).all()
-    if not data:
+def clear(
+    background_tasks: BackgroundTasks,
+    background: bool = False,
+    db: Session = Depends(get_write_db),
+    payload: dict = Depends(verify_mathematician),
+):
+    if not db.query(Calculate.id).first():
         return {"message:": "no available data"}
-    for item in data:
-        db.delete(item)
-    db.commit()
+    if background:
+        job = start_clear_job(db, Calculate)
+        background_tasks.add_task(run_clear_job, job["job_id"], Calculate)
+        return job
+    delete_all(db, Calculate)
     return {"message": "data wiped"}
 
 
+@router.get("/clear_all/{job_id}")
+def clear_status(
+    job_id: str,
+    db: Session = Depends(get_db),
+    payload: dict = Depends(verify_mathematician),
+):
+    job = clear_job_status(db, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="job not found")
+    return job
+
+
 @router.delete("/erase/{calc_id}")
 def delete_one(
     calc_id: int,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_write_db),
     payload: dict = Depends(verify_mathematician),
 ):
     data = db.query(Calculate).filter(Calculate.id == calc_id).first()
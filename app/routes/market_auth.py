@@ -1,10 +1,11 @@
 from sqlalchemy.orm import Session
-from app.body.dependencies.db_session import get_db
+from app.body.dependencies.db_session import get_db, save_new
 from fastapi import Depends, HTTPException, APIRouter
-from app.models_sql import Market
+from fastapi.concurrency import run_in_threadpool
+from app.models_sql import Developer
 from app.body.dependencies.auth_jwt import (
-    verify_code,
-    get_hashed_code,
+    verify_code_async,
+    get_hashed_code_async,
     create_access_token,
 )
 from datetime import timedelta
@@ -15,8 +16,14 @@ router = APIRouter(prefix="/Market Authentification", tags=["Secure Development"
 ACCESS_CODES = {20005, 30005, 40005, 50005}
 
 
+def find_developer(db: Session, developer_name: str) -> Developer | None:
+    return (
+        db.query(Developer).filter(Developer.developer_name == developer_name).first()
+    )
+
+
 @router.post("/registration")
-def register(
+async def register(
     developer_code: int = Form(...),
     developer_name: str = Form(...),
     db: Session = Depends(get_db),
@@ -25,21 +32,22 @@ def register(
         raise HTTPException(
             status_code=403, detail="access denied, invalid developer_code"
         )
-    hashed_code = get_hashed_code(developer_code)
-    mark = db.query(Market).filter(Market.developer_code == hashed_code).first()
-    if mark:
-        raise HTTPException(status_code=400, detail="developer is already registered")
-    new_developer = Market(
+    already_registered = HTTPException(
+        status_code=400, detail="developer is already registered"
+    )
+    if await run_in_threadpool(find_developer, db, developer_name.strip()):
+        raise already_registered
+    hashed_code = await get_hashed_code_async(developer_code)
+    new_developer = Developer(
         developer_code=hashed_code, developer_name=developer_name.strip()
     )
-    db.add(new_developer)
-    db.commit()
-    db.refresh(new_developer)
+    if not await run_in_threadpool(save_new, db, new_developer):
+        raise already_registered
     return {developer_name: "you are successfully registerd, welcome"}
 
 
 @router.post("/logins")
-def login(
+async def login(
     developer_code: int = Form(...),
     developer_name: str = Form(...),
     db: Session = Depends(get_db),
@@ -48,14 +56,12 @@ def login(
         raise HTTPException(
             status_code=403, detail="access denied, invalid developer_code"
         )
-    mark = (
-        db.query(Market).filter(Market.developer_name == developer_name.strip()).first()
-    )
-    if not mark or not verify_code(developer_code, mark.developer_code):
+    mark = await run_in_threadpool(find_developer, db, developer_name.strip())
+    if not mark or not await verify_code_async(developer_code, mark.developer_code):
         raise HTTPException(status_code=401, detail="unauthorized developer")
     token_expires = timedelta(minutes=60)
     create_token = create_access_token(
-        data={"sub": mark.developer_name, "code": mark.developer_code},
+        data={"sub": mark.developer_name, "uid": mark.id, "code": mark.developer_code},
         expires_delta=token_expires,
     )
     return {"access_token": create_token, "token_type": "bearer"}
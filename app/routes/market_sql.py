@@ -1,15 +1,45 @@
-from app.models_sql import Market
+from app.models_sql import Market, Developer
+from sqlalchemy import insert, select
 from sqlalchemy.orm import Session
-from app.body.dependencies.db_session import get_db
+from pydantic import TypeAdapter
+from app.body.dependencies.db_session import get_db, get_read_db, get_write_db
+from app.body.dependencies.principals import principal_id
+from app.body.pagination import paginate
+from app.body.counters import row_count, track_rows
+from app.body.batch import batch_body, batch_report, validate_batch
+from app.body.search import fts_available, fts_query, fts_searchable
+from app.body.streaming import stream_format, stream_query
+from app.body.bulk_delete import (
+    clear_job_status,
+    delete_all,
+    run_clear_job,
+    start_clear_job,
+)
 from datetime import datetime
 from fastapi import APIRouter
-from fastapi import HTTPException, Depends, Query
+from fastapi import HTTPException, Depends, Query, BackgroundTasks, Response
+from typing import List, Literal
 import logging
 from pathlib import Path
 from app.body.verify_jwt import verify_developer, augument
-from app.models import dev_n
+from app.body.serializers import encode, typed_response
+from app.body.entity_cache import entity_cache
+from app.body.etags import cached_response, conditional, tagged
+from app.body.projection import project, record_columns
+from app.body.market_analytics import snapshot_analytics, sql_summary
+from app.body.concurrency import off_loop
+from app.models import (
+    dev_n,
+    MarketSection,
+    MarketResponse,
+    MarketPage,
+    MarketResults,
+    MarketAnalytics,
+    Message,
+)
 
 router = APIRouter(prefix="/market_sections_sql", tags=["Contract"])
+market_batch = TypeAdapter(list[MarketSection])
 LOGFILE = Path("market.log")
 LOGFILE.parent.mkdir(parents=True, exist_ok=True)
 logging.basicConfig(
@@ -24,57 +54,145 @@ def secure(payload: dict = Depends(verify_developer)):
     return {"welcome": "Developer, you are verified"}
 
 
-@router.get("/reveal_all_market_sections")
+@router.get("/reveal_all_market_sections", response_model=MarketPage | Message)
 def get_all(
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     page: int = Query(1, ge=1),
     limit: int = Query(10, le=100),
+    cursor: str | None = None,
+    exact_total: bool = False,
     payload: dict = Depends(verify_developer),
+    tag: str | None = Depends(conditional(Market)),
 ):
-    offset = (page - 1) * limit
-    total = db.query(Market).count()
-    mark = db.query(Market).offset(offset).limit(limit).all()
+    if cached := cached_response(tag):
+        return cached
+    total = row_count(db, Market, exact=exact_total)
+    mark, next_cursor, prev_cursor = paginate(
+        project(db.query(Market), Market, MarketResponse),
+        [Market.id],
+        page,
+        limit,
+        cursor,
+    )
     if not mark:
         return {"message": "no sections developed"}
-    return {
-        "total sections developed": total,
-        "page": page,
-        "limit": limit,
-        "required data": mark,
-    }
+    return tagged(
+        tag,
+        typed_response(
+            MarketPage,
+            {
+                "total sections developed": total,
+                "page": page,
+                "limit": limit,
+                "required data": mark,
+                "next_cursor": next_cursor,
+                "prev_cursor": prev_cursor,
+            },
+            exclude={"page"} if cursor else None,
+        ),
+    )
 
 
-@router.get("/search")
+@router.get("/search", response_model=MarketResults | Message)
 def locator(
     trade: str | None = None,
     union: str | None = None,
     taxes: str | None = None,
-    db: Session = Depends(get_db),
+    mode: Literal["fts", "substring"] | None = None,
+    page: int = Query(1, ge=1),
+    limit: int | None = Query(None, ge=1, le=1000),
+    fmt: str | None = Depends(stream_format),
+    db: Session = Depends(get_read_db),
     payload: dict = Depends(verify_developer),
 ):
-    locate = db.query(Market)
-    if trade:
-        locate = locate.filter(Market.trade.ilike(f"%{trade}%"))
-    if union:
-        locate = locate.filter(Market.union.ilike(f"%{union}%"))
-    if taxes:
-        locate = locate.filter(Market.taxes.ilike(f"%{taxes}%"))
+    terms = {"trade": trade, "union": union, "taxes": taxes}
+    if fts_searchable(terms) and mode != "substring" and fts_available(db, Market):
+        columns = record_columns(Market, MarketResponse)
+        locate = fts_query(db, Market, terms, page, limit, columns)
+    else:
+        locate = project(db.query(Market), Market, MarketResponse)
+        if trade:
+            locate = locate.filter(Market.trade.ilike(f"%{trade}%"))
+        if union:
+            locate = locate.filter(Market.union.ilike(f"%{union}%"))
+        if taxes:
+            locate = locate.filter(Market.taxes.ilike(f"%{taxes}%"))
+        if limit:
+            locate = locate.order_by(Market.id).offset((page - 1) * limit).limit(limit)
+    if fmt:
+        return stream_query(locate, Market, fmt, MarketResponse)
     result = locate.all()
     if not result:
         return {"message": "no data found"}
-    return {"total results": len(result), "results": result}
+    return typed_response(
+        MarketResults, {"total results": len(result), "results": result}
+    )
 
 
-@router.get("/fetch_required_market_sections/{section}")
+@router.get(
+    "/fetch_required_market_sections/{section}",
+    response_model=MarketResponse | Message,
+)
 def getting_some(
     section: int,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     payload: dict = Depends(verify_developer),
 ):
-    Mark = db.query(Market).filter(Market.section == section).first()
-    if not Mark:
+    def load(session: Session) -> bytes | None:
+        Mark = project(session.query(Market), Market, MarketResponse)
+        Mark = Mark.filter(Market.section == section).first()
+        if Mark:
+            return encode(MarketResponse, Mark)
+
+    body = entity_cache.fetch(db, Market, section, load)
+    if body is None:
         return {"message": "section not found"}
-    return Mark
+    return Response(body, media_type="application/json")
+
+
+@router.get(
+    "/analytics", response_model=MarketAnalytics, response_model_exclude_unset=True
+)
+def analytics(
+    group_by: Literal["trade", "union", "taxes"] | None = None,
+    metric: Literal["sales_per_day", "traders"] = "sales_per_day",
+    percentiles: List[float] = Query([]),
+    top: int | None = Query(None, ge=1, le=1000),
+    top_sections: int = Query(0, ge=0, le=1000),
+    db: Session = Depends(get_read_db),
+    payload: dict = Depends(verify_developer),
+):
+    if any(not 0 <= percentile <= 100 for percentile in percentiles):
+        raise HTTPException(
+            status_code=400, detail="percentiles must be between 0 and 100"
+        )
+    # SQL covers plain aggregates, percentiles and ranking need the columnar
+    # snapshot, which also answers everything once it is loaded and current
+    answer = off_loop(
+        snapshot_analytics,
+        bool(percentiles or top_sections),
+        group_by,
+        metric,
+        percentiles,
+        top,
+        top_sections,
+    )
+    if answer is not None:
+        engine = "numpy"
+        groups, sections = answer
+    else:
+        engine = "sql"
+        groups = sql_summary(db, group_by, metric, top)
+        sections = []
+    content = {
+        "group_by": group_by,
+        "metric": metric,
+        "engine": engine,
+        "groups": groups,
+    }
+    if top_sections:
+        content["top_sections"] = sections
+    return typed_response(MarketAnalytics, content, exclude_unset=True)
 
 
 @router.post("/market_section")
@@ -86,10 +204,11 @@ def dev(
     taxes: str,
     union: str,
     data: dev_n = Depends(augument),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_write_db),
     payload: dict = Depends(verify_developer),
 ):
     mark = Market(
+        developer_id=principal_id(db, Developer, Developer.developer_name, payload),
         section=section,
         trade=trade,
         traders=traders,
@@ -111,12 +230,61 @@ def dev(
     return {"message": "section developed successfully"}
 
 
+@router.post("/batch")
+def dev_batch(
+    items: list = Depends(batch_body),
+    db: Session = Depends(get_write_db),
+    payload: dict = Depends(verify_developer),
+):
+    valid, failed = validate_batch(market_batch, items)
+    failed = {index: {"errors": errors} for index, errors in failed.items()}
+    codes = [item.developer_code for item in valid.values()]
+    taken = set(
+        db.scalars(
+            select(Market.developer_code).where(Market.developer_code.in_(codes))
+        )
+    )
+    developer_id = principal_id(db, Developer, Developer.developer_name, payload)
+    indexes, rows = [], []
+    for index, item in valid.items():
+        if item.developer_code in taken:
+            failed[index] = {
+                "errors": [{"loc": ["developer_code"], "msg": "already in use"}]
+            }
+            continue
+        taken.add(item.developer_code)
+        indexes.append(index)
+        rows.append(
+            {
+                "developer_id": developer_id,
+                "developer_name": payload.get("sub"),
+                "developer_code": item.developer_code,
+                "section": item.section,
+                "trade": item.trade,
+                "traders": item.traders,
+                "sales_per_day": item.sales,
+                "taxes": item.taxes,
+                "union": item.union,
+            }
+        )
+    created = {}
+    if rows:
+        ids = db.scalars(
+            insert(Market).returning(Market.id, sort_by_parameter_order=True), rows
+        ).all()
+        track_rows(db, Market, rows)
+        db.commit()
+        created = dict(zip(indexes, ids))
+    logging.info("batch of %s sections, %s developed", len(items), len(created))
+    return batch_report(len(items), created, failed)
+
+
 @router.put("/update")
 def change(
     section: int,
     trade: str,
     traders: str | None = None,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_write_db),
     payload: dict = Depends(verify_developer),
 ):
     data = db.query(Market).filter(Market.section == section).first()
@@ -131,20 +299,38 @@ def change(
 
 
 @router.delete("/clear_all")
-def clear(db: Session = Depends(get_db), payload: dict = Depends(verify_developer)):
-    data = db.query(Market).all()
-    if not data:
-        return {f"no {data} to clear"}
-    for item in data:
-        db.delete(item)
-    db.commit()
+def clear(
+    background_tasks: BackgroundTasks,
+    background: bool = False,
+    db: Session = Depends(get_write_db),
+    payload: dict = Depends(verify_developer),
+):
+    if not db.query(Market.id).first():
+        return {"message": "no data to clear"}
+    if background:
+        job = start_clear_job(db, Market)
+        background_tasks.add_task(run_clear_job, job["job_id"], Market)
+        return job
+    delete_all(db, Market)
     return {"message": "data successfully wiped"}
 
 
+@router.get("/clear_all/{job_id}")
+def clear_status(
+    job_id: str,
+    db: Session = Depends(get_db),
+    payload: dict = Depends(verify_developer),
+):
+    job = clear_job_status(db, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="job not found")
+    return job
+
+
 @router.delete("/erase/{section}")
 def delete_one(
     section: int,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_write_db),
     payload: dict = Depends(verify_developer),
 ):
     data = db.query(Market).filter(Market.section == section).first()
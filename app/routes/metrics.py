@@ -0,0 +1,54 @@
+from fastapi import APIRouter, Depends, HTTPException, status
+from app.body.verify_jwt import current_principal, token_cache
+from app.body.etags import response_cache
+from app.body.entity_cache import entity_cache
+from app.body.result_cache import result_cache
+from app.body.expressions import expression_cache
+from app.body.dependencies.auth_jwt import hashing_pool
+from dotenv import load_dotenv
+import os
+
+load_dotenv()
+METRICS_PRINCIPALS = {
+    name.strip()
+    for name in os.getenv("METRICS_PRINCIPALS", "").split(",")
+    if name.strip()
+}
+
+
+def verify_metrics_access(payload: dict | None = Depends(current_principal)):
+    """Any signed-in user, developer or mathematician, or only the listed ones."""
+    if payload is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="not authenticated",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    if METRICS_PRINCIPALS and payload.get("sub") not in METRICS_PRINCIPALS:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN, detail="metrics are restricted"
+        )
+    return payload
+
+
+router = APIRouter(
+    prefix="/metrics",
+    tags=["Metrics"],
+    dependencies=[Depends(verify_metrics_access)],
+)
+
+
+@router.get("/caches")
+def cache_stats():
+    return {
+        "token_cache": token_cache.stats(),
+        "response_cache": response_cache.stats(),
+        "entity_cache": entity_cache.stats(),
+        "result_cache": result_cache.stats(),
+        "expression_cache": expression_cache.stats(),
+    }
+
+
+@router.get("/hashing_pool")
+def hashing_pool_stats():
+    return hashing_pool.stats()
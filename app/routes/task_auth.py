@@ -1,11 +1,12 @@
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
-from app.models_sql import Task
-from app.body.dependencies.db_session import get_db
+from app.models_sql import User
+from app.body.dependencies.db_session import get_db, save_new
 from app.body.dependencies.auth_jwt import (
     create_access_token,
-    verify_password,
-    hash_password,
+    verify_password_async,
+    hash_password_async,
 )
 from datetime import timedelta
 from fastapi import Form
@@ -13,37 +14,42 @@ from fastapi import Form
 router = APIRouter(prefix="/Auth", tags=["Authentification"])
 
 
+def find_user(db: Session, username: str) -> User | None:
+    return db.query(User).filter(User.username == username).first()
+
+
+# handlers stay on the event loop while Argon2 runs on the hashing pool, only
+# the short queries go to the threadpool, so a login burst meets the pool's 503
 @router.post("/registeration")
-def register(
+async def register(
     username: str = Form(...),
     password: str = Form(...),
     nationality: str = Form(...),
     db: Session = Depends(get_db),
 ):
-    user_exists = db.query(Task).filter(Task.username == username).first()
-    if user_exists:
-        raise HTTPException(status_code=400, detail="user already exists")
+    user_exists = HTTPException(status_code=400, detail="user already exists")
+    if await run_in_threadpool(find_user, db, username.strip()):
+        raise user_exists
     password = str(password)
-    hashed_password = hash_password(password)
-    new_user = Task(
+    hashed_password = await hash_password_async(password)
+    new_user = User(
         username=username.strip(),
         password=hashed_password,
         nationality=nationality.strip(),
     )
-    db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
+    if not await run_in_threadpool(save_new, db, new_user):
+        raise user_exists
     return {"message": f"User {username} registered successfully"}
 
 
 @router.post("/logins")
-def login(username: str, password: str, db: Session = Depends(get_db)):
-    user = db.query(Task).filter(Task.username == username.strip()).first()
-    if not user or not verify_password(password, user.password):
+async def login(username: str, password: str, db: Session = Depends(get_db)):
+    user = await run_in_threadpool(find_user, db, username.strip())
+    if not user or not await verify_password_async(password, user.password):
         raise HTTPException(status_code=401, detail="Invalid username or password")
     token_expires = timedelta(minutes=60)
     access_token = create_access_token(
-        data={"sub": user.username, "nationality": user.nationality},
+        data={"sub": user.username, "uid": user.id, "nationality": user.nationality},
         expires_delta=token_expires,
     )
     return {"access_token": access_token, "token_type": "bearer"}
@@ -1,15 +1,45 @@
+from sqlalchemy import insert
 from sqlalchemy.orm import Session
-from app.models_sql import Task
+from pydantic import TypeAdapter
+from app.models_sql import Task, User
 from fastapi import APIRouter
 from datetime import datetime, timezone
-from app.body.dependencies.db_session import get_db
-from fastapi import HTTPException, Depends, Query
+from app.body.dependencies.db_session import get_db, get_read_db, get_write_db
+from app.body.dependencies.principals import principal_id
+from app.body.pagination import paginate
+from app.body.counters import row_count, track_rows
+from app.body.batch import batch_body, batch_report, validate_batch
+from app.body.search import fts_available, fts_query, fts_searchable
+from app.body.streaming import stream_format, stream_query
+from app.body.bulk_delete import (
+    clear_job_status,
+    delete_all,
+    run_clear_job,
+    start_clear_job,
+)
+from fastapi import HTTPException, Depends, Query, BackgroundTasks, Response
+from typing import Literal
 import logging
 from pathlib import Path
 from app.body.verify_jwt import verify_token, enrich_input
-from app.models import Post
+from app.body.serializers import encode, typed_response
+from app.body.entity_cache import entity_cache
+from app.body.etags import cached_response, conditional, tagged
+from app.body.projection import project, record_columns
+from app.models import (
+    Post,
+    Description,
+    Message,
+    TaskRecord,
+    TaskPage,
+    TaskResults,
+    TaskFile,
+    CompletedTasks,
+    UndoneTasks,
+)
 
 router = APIRouter(prefix="/tasks", tags=["Routines"])
+task_batch = TypeAdapter(list[Description])
 LOGFILE = Path("tasks.log")
 LOGFILE.parent.mkdir(parents=True, exist_ok=True)
 logging.basicConfig(
@@ -27,10 +57,11 @@ def secure(username: str = Depends(verify_token)):
 @router.post("/create")
 def create_tasks(
     data: Post = Depends(enrich_input),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_write_db),
     username: str = Depends(verify_token),
 ):
     new_task = Task(
+        user_id=principal_id(db, User, User.username, username),
         description=data.description,
         username=data.name,
         nationality=data.nationality,
@@ -42,11 +73,44 @@ def create_tasks(
     return {"task saved": new_task.description}
 
 
+@router.post("/batch")
+def create_tasks_batch(
+    items: list = Depends(batch_body),
+    db: Session = Depends(get_write_db),
+    username: dict = Depends(verify_token),
+):
+    valid, failed = validate_batch(task_batch, items)
+    now = datetime.now(timezone.utc)
+    user_id = principal_id(db, User, User.username, username)
+    rows = [
+        {
+            "user_id": user_id,
+            "username": username.get("sub"),
+            "nationality": username.get("nationality"),
+            "description": item.description,
+            "complete": False,
+            "time_of_execution": now,
+        }
+        for item in valid.values()
+    ]
+    created = {}
+    if rows:
+        ids = db.scalars(
+            insert(Task).returning(Task.id, sort_by_parameter_order=True), rows
+        ).all()
+        track_rows(db, Task, rows)
+        db.commit()
+        created = dict(zip(valid, ids))
+    logging.info("batch of %s tasks, %s saved", len(items), len(created))
+    failed = {index: {"errors": errors} for index, errors in failed.items()}
+    return batch_report(len(items), created, failed)
+
+
 @router.put("/update/{task_id}")
 def update_task(
     task_id: int,
     new_description: str,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_write_db),
     username: str = Depends(verify_token),
 ):
     data = db.query(Task).filter(Task.id == task_id).first()
@@ -59,50 +123,92 @@ def update_task(
     return {"message": f"Task {task_id} updated successfully"}
 
 
-@router.get("/retrieve_all")
+@router.get("/retrieve_all", response_model=TaskPage | str)
 def get_all_tasks(
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     page: int = Query(1, ge=1),
     limit: int = Query(10, le=100),
+    cursor: str | None = None,
+    exact_total: bool = False,
     username: dict = Depends(verify_token),
+    tag: str | None = Depends(conditional(Task)),
 ):
-    offset = (page - 1) * limit
-    tasks = db.query(Task).offset(offset).limit(limit).all()
-    total = db.query(Task).count()
+    if cached := cached_response(tag):
+        return cached
+    tasks, next_cursor, prev_cursor = paginate(
+        project(db.query(Task), Task, TaskRecord), [Task.id], page, limit, cursor
+    )
+    total = row_count(db, Task, exact=exact_total)
     if not tasks:
         return "no file stored"
-    return {"total": total, "page": page, "limit": limit, "tasks": tasks}
+    return tagged(
+        tag,
+        typed_response(
+            TaskPage,
+            {
+                "total": total,
+                "page": page,
+                "limit": limit,
+                "tasks": tasks,
+                "next_cursor": next_cursor,
+                "prev_cursor": prev_cursor,
+            },
+            exclude={"page"} if cursor else None,
+        ),
+    )
 
 
-@router.get("/search")
-def filtering(description: str | None = None, db: Session = Depends(get_db)):
-    desc = db.query(Task)
-    if description:
-        desc = desc.filter(Task.description.ilike(f"%{description}%"))
+@router.get("/search", response_model=TaskResults | Message)
+def filtering(
+    description: str | None = None,
+    mode: Literal["fts", "substring"] | None = None,
+    page: int = Query(1, ge=1),
+    limit: int | None = Query(None, ge=1, le=1000),
+    fmt: str | None = Depends(stream_format),
+    db: Session = Depends(get_read_db),
+):
+    terms = {"description": description}
+    if fts_searchable(terms) and mode != "substring" and fts_available(db, Task):
+        columns = record_columns(Task, TaskRecord)
+        desc = fts_query(db, Task, terms, page, limit, columns)
+    else:
+        desc = project(db.query(Task), Task, TaskRecord)
+        if description:
+            desc = desc.filter(Task.description.ilike(f"%{description}%"))
+        if limit:
+            desc = desc.order_by(Task.id).offset((page - 1) * limit).limit(limit)
+    if fmt:
+        return stream_query(desc, Task, fmt, TaskRecord)
     results = desc.all()
     if results:
         logging.info("search successful")
-        return {"results": results}
+        return typed_response(TaskResults, {"results": results})
     return {"message": "such tasks does not exist"}
 
 
-@router.get("/retrieve_some/{task_id}")
+@router.get("/retrieve_some/{task_id}", response_model=TaskFile)
 def fetch_some(
     task_id: int,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     username: str = Depends(verify_token),
 ):
-    data = db.query(Task).filter(Task.id == task_id).first()
-    if not data:
+    def load(session: Session) -> bytes | None:
+        data = project(session.query(Task), Task, TaskRecord)
+        data = data.filter(Task.id == task_id).first()
+        if data:
+            return encode(TaskFile, {"this is your requested file": data})
+
+    body = entity_cache.fetch(db, Task, task_id, load)
+    if body is None:
         raise HTTPException(status_code=404, detail="task not found")
     logging.info("retrieved task %s", task_id)
-    return {"this is your requested file": data}
+    return Response(body, media_type="application/json")
 
 
 @router.get("/mark_complete{task_id}")
 def completed(
     task_id: int,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_write_db),
     username: str = Depends(verify_token),
 ):
     tasks = db.query(Task).filter(Task.id == task_id).first()
@@ -115,45 +221,90 @@ def completed(
     return "invalid id"
 
 
-@router.get("/completed_tasks")
+@router.get("/completed_tasks", response_model=CompletedTasks | Message)
 def completed_data(
-    db: Session = Depends(get_db), username: str = Depends(verify_token)
+    fmt: str | None = Depends(stream_format),
+    exact_total: bool = False,
+    db: Session = Depends(get_read_db),
+    username: str = Depends(verify_token),
 ):
-    data = db.query(Task).filter(Task.complete == True).all()
+    query = project(db.query(Task), Task, TaskRecord).filter(Task.complete == True)
+    if fmt:
+        return stream_query(query.order_by(Task.id), Task, fmt, TaskRecord)
+    data = query.all()
     if data:
         logging.info("queried completed tasks")
-        return {"you have completed these tasks": data, "total completed": len(data)}
+        return typed_response(
+            CompletedTasks,
+            {
+                "you have completed these tasks": data,
+                "total completed": row_count(
+                    db, Task, exact=exact_total, complete=True
+                ),
+            },
+        )
     return {"message": "no tasks completed"}
 
 
-@router.get("/undone_tasks")
-def not_complete(db: Session = Depends(get_db), username: str = Depends(verify_token)):
-    data = db.query(Task).filter(Task.complete == False).all()
+@router.get("/undone_tasks", response_model=UndoneTasks | Message)
+def not_complete(
+    fmt: str | None = Depends(stream_format),
+    exact_total: bool = False,
+    db: Session = Depends(get_read_db),
+    username: str = Depends(verify_token),
+):
+    query = project(db.query(Task), Task, TaskRecord).filter(Task.complete == False)
+    if fmt:
+        return stream_query(query.order_by(Task.id), Task, fmt, TaskRecord)
+    data = query.all()
     if data:
         logging.info("queried undone tasks")
-        return {
-            "you have not completed these tasks": data,
-            "total completed": len(data),
-        }
+        return typed_response(
+            UndoneTasks,
+            {
+                "you have not completed these tasks": data,
+                "total completed": row_count(
+                    db, Task, exact=exact_total, complete=False
+                ),
+            },
+        )
     return {"message": "all task data found"}
 
 
 @router.delete("/clear_all")
-def clear(db: Session = Depends(get_db), username: str = Depends(verify_token)):
-    data = db.query(Task).all()
-    if not data:
-        return {f"no {data} to clear"}
-    for item in data:
-        db.delete(item)
-    db.commit()
+def clear(
+    background_tasks: BackgroundTasks,
+    background: bool = False,
+    db: Session = Depends(get_write_db),
+    username: dict = Depends(verify_token),
+):
+    if not db.query(Task.id).first():
+        return {"message": "no data to clear"}
+    if background:
+        job = start_clear_job(db, Task)
+        background_tasks.add_task(run_clear_job, job["job_id"], Task)
+        return job
+    delete_all(db, Task)
     logging.info("deleted tasks")
     return {"message": "data wiped"}
 
 
+@router.get("/clear_all/{job_id}")
+def clear_status(
+    job_id: str,
+    db: Session = Depends(get_db),
+    username: dict = Depends(verify_token),
+):
+    job = clear_job_status(db, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="job not found")
+    return job
+
+
 @router.delete("/erase/{task_id}")
 def delete_one(
     task_id: int,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_write_db),
     username: str = Depends(verify_token),
 ):
     data = db.query(Task).filter(Task.id == task_id).first()
@@ -0,0 +1,46 @@
+"""Parse-and-evaluate time of the NumPy engine against the pure Python path.
+
+python -m benchmarks.calc_engine --sizes 100 10000 100000
+"""
+
+import argparse
+import operator
+import random
+import timeit
+from functools import reduce
+from app.body.calc_engine import calculate, parse_numbers
+
+
+def python_path(numbers: str, operation: str) -> float:
+    values = [float(num.strip()) for num in numbers.split(",")]
+    if operation == "add":
+        return sum(values)
+    if operation == "minus":
+        return reduce(lambda x, y: x - y, values)
+    return reduce(operator.mul, values)
+
+
+def numpy_path(numbers: str, operation: str) -> float:
+    return calculate(operation, parse_numbers(numbers))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 10_000, 100_000])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+    print(f"{'size':>8} {'operation':>10} {'python ms':>10} {'numpy ms':>10}")
+    for size in args.sizes:
+        numbers = ", ".join(str(random.uniform(0.5, 1.5)) for _ in range(size))
+        for operation in ("add", "minus", "times"):
+            timings = [
+                timeit.timeit(lambda: path(numbers, operation), number=args.repeat)
+                / args.repeat
+                * 1000
+                for path in (python_path, numpy_path)
+            ]
+            print(f"{size:>8} {operation:>10} {timings[0]:>10.3f} {timings[1]:>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""Mixed-domain write throughput with one shared SQLite file vs one file per domain.
+
+python -m benchmarks.domain_writes --seconds 5 --writers 2
+"""
+
+import argparse
+import os
+import tempfile
+import threading
+import time
+from sqlalchemy import create_engine
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+from app.database.config import Base, DOMAIN_TABLES, routing_session
+from app.database.settings import install_sqlite_pragmas
+from app.models_sql import Task, Market, Calculate
+
+ROWS = {
+    Task: lambda n: Task(description=f"bench {n}", nationality="n"),
+    Market: lambda n: Market(
+        section=n, trade="bench", sales_per_day=1.0, developer_code=n
+    ),
+    Calculate: lambda n: Calculate(operation="add", numbers="1,2", result=3),
+}
+
+
+def make_engine(path: str):
+    engine = create_engine(
+        f"sqlite:///{path}", connect_args={"check_same_thread": False}
+    )
+    install_sqlite_pragmas(engine)
+    Base.metadata.create_all(bind=engine)
+    return engine
+
+
+def make_sessions(split: bool):
+    directory = tempfile.mkdtemp()
+    shared = make_engine(os.path.join(directory, "shared.db"))
+    engines = {
+        domain: (
+            make_engine(os.path.join(directory, f"{domain}.db")) if split else shared
+        )
+        for domain in DOMAIN_TABLES
+    }
+    factory = sessionmaker(bind=shared, class_=routing_session(engines, shared))
+    return factory, {shared, *engines.values()}
+
+
+def run(factory, seconds: float, writers: int) -> dict:
+    counts = {"writes": 0, "errors": 0}
+    lock = threading.Lock()
+    sequence = iter(range(1, 10**9))
+    deadline = time.perf_counter() + seconds
+
+    def writer(model):
+        while time.perf_counter() < deadline:
+            with lock:
+                n = next(sequence)
+            try:
+                with factory() as db:
+                    db.add(ROWS[model](n))
+                    db.commit()
+                key = "writes"
+            except OperationalError:
+                key = "errors"
+            with lock:
+                counts[key] += 1
+
+    threads = [
+        threading.Thread(target=writer, args=(model,))
+        for model in ROWS
+        for _ in range(writers)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return {key: value / seconds for key, value in counts.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--seconds", type=float, default=5)
+    parser.add_argument("--writers", type=int, default=2, help="writers per domain")
+    args = parser.parse_args()
+    print(f"{'layout':>8} {'writes/s':>10} {'errors/s':>10}")
+    for name, split in (("shared", False), ("split", True)):
+        factory, engines = make_sessions(split)
+        rates = run(factory, args.seconds, args.writers)
+        for engine in engines:
+            engine.dispose()
+        print(f"{name:>8} {rates['writes']:>10.1f} {rates['errors']:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
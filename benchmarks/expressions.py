@@ -0,0 +1,35 @@
+"""Expression evaluation with and without the compiled-form cache.
+
+python -m benchmarks.expressions --repeat 10000
+"""
+
+import argparse
+import timeit
+from app.body.calc_engine import parse_numbers
+from app.body.expressions import Expression, compile_expression
+
+EXPRESSIONS = {
+    "(a+b)*sqrt(c)/d": "1,2,9,3",
+    "a*b - c/d + max(e, f)": "1,2,3,4,5,6",
+    "exp(-a**2/2) / sqrt(2*pi)": "0.5",
+}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=10_000)
+    args = parser.parse_args()
+    print(f"{'expression':>28} {'parse us':>10} {'cached us':>10}")
+    for text, numbers in EXPRESSIONS.items():
+        values = parse_numbers(numbers)
+        timings = [
+            timeit.timeit(lambda: build(text)(values), number=args.repeat)
+            / args.repeat
+            * 1e6
+            for build in (Expression, compile_expression)
+        ]
+        print(f"{text:>28} {timings[0]:>10.2f} {timings[1]:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+"""Login throughput and p99 latency of Argon2 verification per pool size.
+
+Run from the project root with the usual .env in place:
+
+    python -m benchmarks.login_throughput --requests 64 --sizes 1 2 4 8
+"""
+
+import argparse
+import asyncio
+import time
+from app.body.dependencies.auth_jwt import HashingPool, pwd_context, verify_password
+
+
+async def burst(pool: HashingPool, hashed: str, requests: int):
+    latencies = []
+
+    async def one():
+        start = time.perf_counter()
+        await pool.run(verify_password, "benchmark-password", hashed)
+        latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(requests)))
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+    return requests / elapsed, p99
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=64)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1, 2, 4, 8])
+    args = parser.parse_args()
+    hashed = pwd_context.hash("benchmark-password")
+    print(f"{'workers':>8} {'logins/s':>10} {'p99 ms':>10}")
+    for size in args.sizes:
+        pool = HashingPool(workers=size, queue_size=args.requests)
+        throughput, p99 = asyncio.run(burst(pool, hashed, args.requests))
+        pool.shutdown()
+        print(f"{size:>8} {throughput:>10.1f} {p99 * 1000:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
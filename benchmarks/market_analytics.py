@@ -0,0 +1,83 @@
+"""SQL aggregates against the NumPy snapshot on a synthetic markets table.
+
+python -m benchmarks.market_analytics --rows 1000000
+"""
+
+import argparse
+import os
+import random
+import tempfile
+import time
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import Session
+from app.database.config import Base
+from app.models_sql import Market
+from app.body.market_analytics import load_snapshot, sql_summary
+
+TRADES = "fish yam rice cloth gold salt palm oil cattle spice".split()
+UNIONS = "dockers weavers smiths farmers".split()
+TAXES = "low medium high".split()
+
+
+def populate(engine, rows: int):
+    Base.metadata.create_all(bind=engine, tables=[Market.__table__])
+    rng = random.Random(7)
+    with engine.begin() as conn:
+        for start in range(0, rows, 50_000):
+            batch = [
+                {
+                    "section": i,
+                    "trade": rng.choice(TRADES),
+                    "union": rng.choice(UNIONS),
+                    "taxes": rng.choice(TAXES),
+                    "traders": rng.randint(1, 50),
+                    "sales_per_day": rng.uniform(0, 1000),
+                    "developer_name": "bench",
+                }
+                for i in range(start, min(start + 50_000, rows))
+            ]
+            conn.execute(insert(Market), batch)
+
+
+def timed(func, repeat: int = 5) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    args = parser.parse_args()
+    path = os.path.join(tempfile.mkdtemp(), "markets.db")
+    engine = create_engine(f"sqlite:///{path}")
+    start = time.perf_counter()
+    populate(engine, args.rows)
+    print(f"loaded {args.rows} rows in {time.perf_counter() - start:.1f}s")
+
+    with Session(engine) as db:
+        start = time.perf_counter()
+        snapshot = load_snapshot(db, 0)
+        print(f"snapshot load {(time.perf_counter() - start) * 1000:>9.1f} ms")
+        start = time.perf_counter()
+        snapshot.summarize("trade", "sales_per_day", [50, 90, 99], None)
+        print(f"first sort    {(time.perf_counter() - start) * 1000:>9.1f} ms")
+        print(f"{'query':>28} {'sql ms':>9} {'numpy ms':>9}")
+        for group in (None, "trade", "taxes"):
+            sql = timed(lambda: sql_summary(db, group, "sales_per_day", None))
+            snapshot.summarize(group, "sales_per_day", [], None)
+            numpy = timed(lambda: snapshot.summarize(group, "sales_per_day", [], None))
+            print(f"{'sum/mean by ' + str(group):>28} {sql:>9.1f} {numpy:>9.2f}")
+        percentiles = timed(
+            lambda: snapshot.summarize("trade", "sales_per_day", [50, 90, 99], 5)
+        )
+        print(f"{'p50/p90/p99 by trade, top 5':>28} {'-':>9} {percentiles:>9.2f}")
+        ranked = timed(lambda: snapshot.top_sections("sales_per_day", 10))
+        print(f"{'top 10 sections':>28} {'-':>9} {ranked:>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
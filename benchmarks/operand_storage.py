@@ -0,0 +1,57 @@
+"""Stored size and read time of calculation numbers as text against float64 blobs.
+
+python -m benchmarks.operand_storage --rows 1000000 --numbers 5
+"""
+
+import argparse
+import random
+import time
+from app.body.calc_engine import (
+    format_numbers,
+    pack_numbers,
+    parse_numbers,
+    unpack_numbers,
+)
+
+
+def timed(label: str, rows: list, read, scale: float) -> float:
+    start = time.perf_counter()
+    for row in rows:
+        read(row)
+    elapsed = (time.perf_counter() - start) * scale
+    print(f"{label:>24} {elapsed:>9.2f} s")
+    return elapsed
+
+
+def render_text(blob: bytes) -> str:
+    return format_numbers(unpack_numbers(blob))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--numbers", type=int, default=5)
+    args = parser.parse_args()
+
+    texts = [
+        ", ".join(str(round(random.uniform(-1e6, 1e6), 4)) for _ in range(args.numbers))
+        for _ in range(args.rows)
+    ]
+    blobs = [pack_numbers(parse_numbers(text)) for text in texts]
+    scale = 1_000_000 / args.rows
+
+    text_bytes = sum(len(text.encode()) for text in texts) * scale
+    # operand_count is one more integer per row
+    blob_bytes = (sum(len(blob) for blob in blobs) + 8 * args.rows) * scale
+    print(f"{args.rows} rows of {args.numbers} numbers, scaled to 1M calculations")
+    print(f"{'text storage':>24} {text_bytes / 2**20:>9.1f} MiB")
+    print(f"{'blob + count storage':>24} {blob_bytes / 2**20:>9.1f} MiB")
+
+    parse = timed("parse text", texts, parse_numbers, scale)
+    unpack = timed("unpack blob", blobs, unpack_numbers, scale)
+    timed("render blob as text", blobs, render_text, scale)
+    print(f"{'read speedup':>24} {parse / unpack:>9.1f} x")
+
+
+if __name__ == "__main__":
+    main()
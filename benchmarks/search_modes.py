@@ -0,0 +1,77 @@
+"""Compare FTS5 and substring search on a synthetic tasks table.
+
+python -m benchmarks.search_modes --rows 1000000
+"""
+
+import argparse
+import os
+import random
+import tempfile
+import time
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import Session
+from app.database.config import Base
+from app.models_sql import Task
+from app.body.search import install_fts, fts_search
+
+WORDS = (
+    "market fish report invoice deliver review clean boat garden budget "
+    "meeting school travel repair paint order cook laundry doctor call"
+).split()
+
+
+def populate(engine, rows: int):
+    Base.metadata.create_all(bind=engine, tables=[Task.__table__])
+    rng = random.Random(7)
+    with engine.begin() as conn:
+        for start in range(0, rows, 50_000):
+            batch = [
+                {
+                    "description": " ".join(rng.choices(WORDS, k=6)) + f" item{i}",
+                    "username": "bench",
+                    "nationality": "n",
+                    "complete": False,
+                }
+                for i in range(start, min(start + 50_000, rows))
+            ]
+            conn.execute(insert(Task), batch)
+        install_fts(conn, Task)
+
+
+def timed(func, repeat: int = 5) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--term", default="item4242")
+    parser.add_argument("--limit", type=int, default=20)
+    args = parser.parse_args()
+    path = os.path.join(tempfile.mkdtemp(), "search.db")
+    engine = create_engine(f"sqlite:///{path}")
+    start = time.perf_counter()
+    populate(engine, args.rows)
+    print(f"loaded {args.rows} rows in {time.perf_counter() - start:.1f}s")
+    with Session(engine) as db:
+        substring = timed(
+            lambda: db.query(Task)
+            .filter(Task.description.ilike(f"%{args.term}%"))
+            .limit(args.limit)
+            .all()
+        )
+        fts = timed(
+            lambda: fts_search(db, Task, {"description": args.term}, 1, args.limit)
+        )
+    print(f"{'mode':>10} {'best ms':>10}")
+    print(f"{'substring':>10} {substring:>10.2f}")
+    print(f"{'fts':>10} {fts:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
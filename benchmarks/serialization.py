@@ -0,0 +1,101 @@
+"""Time to serialize a 100-row page of each domain through each JSON path.
+
+python -m benchmarks.serialization --rows 100 --repeat 200
+"""
+
+import argparse
+import json
+import timeit
+from datetime import datetime, timezone
+import orjson
+from fastapi.encoders import jsonable_encoder
+from app.body.serializers import adapter, typed_response
+from app.models import TaskPage, MarketPage, RecentCalculations
+from app.models_sql import Task, Market, Calculate
+
+NOW = datetime.now(timezone.utc)
+
+
+def pages(rows: int) -> dict:
+    tasks = [
+        Task(
+            id=n,
+            description=f"task {n}",
+            complete=False,
+            nationality="n",
+            username="user",
+            time_of_execution=NOW,
+        )
+        for n in range(rows)
+    ]
+    markets = [
+        Market(
+            id=n,
+            developer_name="dev",
+            section=n,
+            trade="fish",
+            traders=3,
+            sales_per_day=1.5,
+            taxes="low",
+            union="dockers",
+        )
+        for n in range(rows)
+    ]
+    calculations = [
+        Calculate(
+            id=n,
+            mathematician="gauss",
+            operation="add",
+            numbers="1,2",
+            result=3.0,
+            time_of_calculation=NOW,
+        )
+        for n in range(rows)
+    ]
+    common = {"page": 1, "limit": rows, "next_cursor": None, "prev_cursor": None}
+    return {
+        "tasks": (TaskPage, {**common, "total": rows, "tasks": tasks}),
+        "markets": (
+            MarketPage,
+            {**common, "total sections developed": rows, "required data": markets},
+        ),
+        "calculations": (
+            RecentCalculations,
+            {**common, "total": rows, "most recent calculation": calculations},
+        ),
+    }
+
+
+def encoder(response_type, content) -> bytes:
+    return json.dumps(jsonable_encoder(content)).encode()
+
+
+def response_model(response_type, content) -> bytes:
+    serializer = adapter(response_type)
+    value = serializer.validate_python(content, from_attributes=True)
+    return orjson.dumps(serializer.dump_python(value, mode="json", by_alias=True))
+
+
+def typed(response_type, content) -> bytes:
+    return typed_response(response_type, content).body
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+    paths = {"encoder": encoder, "model+orjson": response_model, "typed": typed}
+    print(f"{'domain':>13}" + "".join(f"{name:>14}" for name in paths) + "   (ms/page)")
+    for domain, (response_type, content) in pages(args.rows).items():
+        timings = [
+            timeit.timeit(lambda: path(response_type, content), number=args.repeat)
+            / args.repeat
+            * 1000
+            for path in paths.values()
+        ]
+        print(f"{domain:>13}" + "".join(f"{ms:>14.3f}" for ms in timings))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""Concurrent read/write throughput with and without the SQLite pragma profile.
+
+python -m benchmarks.sqlite_pragmas --seconds 5 --readers 8 --writers 2
+"""
+
+import argparse
+import os
+import tempfile
+import threading
+import time
+from sqlalchemy import create_engine, insert, select, func
+from sqlalchemy.exc import OperationalError
+from app.database.config import Base
+from app.database.settings import SQLITE_PRAGMAS, install_sqlite_pragmas
+from app.models_sql import Task
+
+
+def make_engine(path: str, tuned: bool):
+    engine = create_engine(
+        f"sqlite:///{path}", connect_args={"check_same_thread": False}
+    )
+    if tuned:
+        install_sqlite_pragmas(engine)
+    else:
+        install_sqlite_pragmas(engine, {"journal_mode": "DELETE"})
+    Base.metadata.create_all(bind=engine, tables=[Task.__table__])
+    return engine
+
+
+def run(engine, seconds: float, readers: int, writers: int) -> dict:
+    counts = {"reads": 0, "writes": 0, "errors": 0}
+    lock = threading.Lock()
+    deadline = time.perf_counter() + seconds
+
+    def reader():
+        while time.perf_counter() < deadline:
+            try:
+                with engine.connect() as conn:
+                    conn.execute(select(func.count()).select_from(Task)).scalar()
+                key = "reads"
+            except OperationalError:
+                key = "errors"
+            with lock:
+                counts[key] += 1
+
+    def writer():
+        while time.perf_counter() < deadline:
+            try:
+                with engine.begin() as conn:
+                    conn.execute(
+                        insert(Task), {"description": "bench", "nationality": "n"}
+                    )
+                key = "writes"
+            except OperationalError:
+                key = "errors"
+            with lock:
+                counts[key] += 1
+
+    threads = [threading.Thread(target=reader) for _ in range(readers)]
+    threads += [threading.Thread(target=writer) for _ in range(writers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return {key: value / seconds for key, value in counts.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--seconds", type=float, default=5)
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--writers", type=int, default=2)
+    args = parser.parse_args()
+    print(f"profile: {SQLITE_PRAGMAS}")
+    print(f"{'profile':>8} {'reads/s':>10} {'writes/s':>10} {'errors/s':>10}")
+    for name, tuned in (("default", False), ("tuned", True)):
+        path = os.path.join(tempfile.mkdtemp(), f"{name}.db")
+        engine = make_engine(path, tuned)
+        rates = run(engine, args.seconds, args.readers, args.writers)
+        engine.dispose()
+        print(
+            f"{name:>8} {rates['reads']:>10.1f} {rates['writes']:>10.1f} "
+            f"{rates['errors']:>10.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""Peak Python memory of a buffered JSON list vs the NDJSON/CSV stream.
+
+python -m benchmarks.streaming_memory --rows 200000
+"""
+
+import argparse
+import json
+import os
+import tempfile
+import tracemalloc
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import Session
+from app.database.config import Base
+from app.body.streaming import query_chunks
+from app.models_sql import Task
+
+
+def seed(path: str, rows: int):
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(bind=engine, tables=[Task.__table__])
+    with engine.begin() as conn:
+        conn.execute(
+            insert(Task),
+            [
+                {"description": f"task {n}", "nationality": "n", "complete": True}
+                for n in range(rows)
+            ],
+        )
+    return engine
+
+
+def buffered(db: Session) -> int:
+    data = db.query(Task).filter(Task.complete == True).all()
+    return len(json.dumps(jsonable_encoder({"tasks": data})))
+
+
+def streamed(db: Session, fmt: str) -> int:
+    query = db.query(Task).filter(Task.complete == True)
+    return sum(len(chunk) for chunk in query_chunks(query, Task, fmt))
+
+
+def measure(func, *args) -> tuple[int, float]:
+    tracemalloc.start()
+    size = func(*args)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return size, peak / 2**20
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=200_000)
+    args = parser.parse_args()
+    engine = seed(os.path.join(tempfile.mkdtemp(), "stream.db"), args.rows)
+    print(f"{'mode':>8} {'bytes':>12} {'peak MiB':>10}")
+    for name, func, extra in (
+        ("json", buffered, ()),
+        ("ndjson", streamed, ("ndjson",)),
+        ("csv", streamed, ("csv",)),
+    ):
+        with Session(engine) as db:
+            size, peak = measure(func, db, *extra)
+        print(f"{name:>8} {size:>12} {peak:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""Load test the sync and async database stacks side by side.
+
+Starts uvicorn once per stack against a seeded temporary SQLite file and
+fires concurrent GET /tasks/retrieve_all requests at it.
+
+    python -m benchmarks.sync_vs_async --connections 50 200 500 --requests 2000
+"""
+
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import timedelta
+import httpx
+
+PORT = 8765
+
+
+def seed(path: str, rows: int):
+    from sqlalchemy import create_engine, insert
+    from app.database.config import Base
+    from app.models_sql import Task
+
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        conn.execute(
+            insert(Task),
+            [
+                {"description": f"task {i}", "username": "bench", "nationality": "n"}
+                for i in range(rows)
+            ],
+        )
+
+
+async def load(url: str, token: str, connections: int, requests: int):
+    latencies = []
+    headers = {"Authorization": f"Bearer {token}"}
+    limits = httpx.Limits(max_connections=connections)
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=60) as client:
+        queue = iter(range(requests))
+
+        async def worker():
+            for _ in queue:
+                start = time.perf_counter()
+                response = await client.get(
+                    "/tasks/retrieve_all", params={"limit": 20}, headers=headers
+                )
+                response.raise_for_status()
+                latencies.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(connections)))
+        elapsed = time.perf_counter() - start
+    latencies.sort()
+    return requests / elapsed, latencies[int(len(latencies) * 0.99) - 1]
+
+
+def wait_until_up(url: str):
+    for _ in range(100):
+        try:
+            httpx.get(url + "/")
+            return
+        except httpx.TransportError:
+            time.sleep(0.1)
+    raise RuntimeError("server did not start")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--connections", type=int, nargs="+", default=[50, 200, 500])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--rows", type=int, default=10_000)
+    args = parser.parse_args()
+
+    from app.body.dependencies.auth_jwt import create_access_token
+
+    token = create_access_token(
+        {"sub": "bench", "nationality": "n"}, timedelta(minutes=30)
+    )
+    path = os.path.join(tempfile.mkdtemp(), "load.db")
+    seed(path, args.rows)
+    url = f"http://127.0.0.1:{PORT}"
+    print(f"{'stack':>6} {'conns':>6} {'req/s':>10} {'p99 ms':>10}")
+    for stack, database_url in (
+        ("sync", f"sqlite:///{path}"),
+        ("async", f"sqlite+aiosqlite:///{path}"),
+    ):
+        server = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(PORT)],
+            env={**os.environ, "DATABASE_URL": database_url},
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        try:
+            wait_until_up(url)
+            for connections in args.connections:
+                throughput, p99 = asyncio.run(
+                    load(url, token, connections, args.requests)
+                )
+                print(
+                    f"{stack:>6} {connections:>6} {throughput:>10.1f} {p99 * 1000:>10.1f}"
+                )
+        finally:
+            server.terminate()
+            server.wait()
+
+
+if __name__ == "__main__":
+    main()
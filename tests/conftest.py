@@ -0,0 +1,54 @@
+import os
+import tempfile
+
+# settings are read at import time, so they go in before the app loads
+_database = os.path.join(tempfile.mkdtemp(), "test.db")
+os.environ.setdefault("SECRET_KEY", "testsecret")
+os.environ.setdefault("ALGORITHM", "HS256")
+os.environ.setdefault("ACCESS_TOKEN_EXPIRE_MINUTES", "60")
+os.environ["DATABASE_URL"] = f"sqlite:///{_database}"
+
+from datetime import timedelta
+
+from fastapi.testclient import TestClient
+import pytest
+
+from app.body.dependencies.auth_jwt import create_access_token
+from app.database.config import Base, SessionLocal, distinct_engines
+from app.database.migrate import run_migrations
+import app.models_sql  # noqa: F401
+
+for _engine in distinct_engines():
+    Base.metadata.create_all(bind=_engine)
+run_migrations()
+
+
+def bearer(**claims) -> dict:
+    token = create_access_token(claims, timedelta(minutes=30))
+    return {"Authorization": f"Bearer {token}"}
+
+
+def mathematician(name: str) -> dict:
+    return bearer(sub=name, mathematician_secret="secret")
+
+
+def developer(name: str) -> dict:
+    return bearer(sub=name, code="code")
+
+
+def user(name: str) -> dict:
+    return bearer(sub=name, nationality="n")
+
+
+@pytest.fixture(scope="session")
+def client():
+    from app.main import app
+
+    with TestClient(app) as client:
+        yield client
+
+
+@pytest.fixture
+def db():
+    with SessionLocal() as session:
+        yield session
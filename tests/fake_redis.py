@@ -0,0 +1,44 @@
+from threading import Lock
+import time
+
+
+class FakeRedis:
+    """The slice of the redis-py client the app uses, kept in a dict."""
+
+    def __init__(self):
+        self.data = {}
+        self._lock = Lock()
+
+    def _live(self, key):
+        entry = self.data.get(key)
+        if entry and entry[1] is not None and entry[1] < time.monotonic():
+            del self.data[key]
+            return None
+        return entry
+
+    def get(self, key):
+        with self._lock:
+            entry = self._live(key)
+            return entry and entry[0]
+
+    def set(self, key, value, px=None, nx=False):
+        with self._lock:
+            if nx and self._live(key):
+                return None
+            expires = time.monotonic() + px / 1000 if px else None
+            self.data[key] = (value, expires)
+            return True
+
+    def delete(self, *keys):
+        with self._lock:
+            return sum(self.data.pop(key, None) is not None for key in keys)
+
+    def incr(self, key):
+        with self._lock:
+            entry = self._live(key)
+            value = int(entry[0]) + 1 if entry else 1
+            self.data[key] = (str(value).encode(), entry and entry[1])
+            return value
+
+    def scan_iter(self, *args, **kwargs):
+        raise AssertionError("SCAN walks the whole keyspace")
@@ -0,0 +1,50 @@
+from fastapi import APIRouter, Depends
+from fastapi.routing import APIRoute
+
+from app.body.dependencies.db_session import (
+    get_async_read_db,
+    get_async_write_db,
+    get_read_db,
+    get_write_db,
+)
+from app.routes.async_routes import asyncify
+
+
+def allowed():
+    return True
+
+
+router = APIRouter(prefix="/things", dependencies=[Depends(allowed)])
+
+
+@router.get("/", responses={404: {"description": "none yet"}}, summary="List")
+def list_things(db=Depends(get_read_db)):
+    return []
+
+
+@router.post("/", status_code=201)
+def add_thing(db=Depends(get_write_db)):
+    return {}
+
+
+def routes(router: APIRouter) -> dict:
+    return {route.name: route for route in router.routes if isinstance(route, APIRoute)}
+
+
+def session_dependency(route: APIRoute):
+    return route.dependant.dependencies[-1].call
+
+
+def test_route_metadata_is_kept():
+    twin = routes(asyncify(router))["list_things"]
+    assert twin.path == "/things/"
+    assert twin.responses == {404: {"description": "none yet"}}
+    assert twin.summary == "List"
+    assert [dependency.dependency for dependency in twin.dependencies] == [allowed]
+    assert routes(asyncify(router))["add_thing"].status_code == 201
+
+
+def test_sessions_keep_their_routing():
+    twins = routes(asyncify(router))
+    assert session_dependency(twins["list_things"]) is get_async_read_db
+    assert session_dependency(twins["add_thing"]) is get_async_write_db
@@ -0,0 +1,57 @@
+import asyncio
+from threading import Event
+
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+import pytest
+
+from app.body.dependencies import auth_jwt
+from app.body.dependencies.auth_jwt import HashingPool
+from app.main import app
+
+client = TestClient(app)
+
+
+def register(username: str):
+    return client.post(
+        "/Auth/registeration",
+        data={"username": username, "password": "longenough", "nationality": "n"},
+    )
+
+
+def test_register_and_login():
+    assert register("ada").status_code == 200
+    assert register("ada").status_code == 400
+    login = client.post(
+        "/Auth/logins", params={"username": "ada", "password": "longenough"}
+    )
+    assert login.json()["token_type"] == "bearer"
+    wrong = client.post("/Auth/logins", params={"username": "ada", "password": "nope"})
+    assert wrong.status_code == 401
+
+
+def test_full_pool_answers_503(monkeypatch):
+    monkeypatch.setattr(auth_jwt.hashing_pool, "capacity", 0)
+    response = register("grace")
+    assert response.status_code == 503
+    assert response.headers["retry-after"] == "1"
+
+
+def test_pool_rejects_beyond_capacity():
+    pool = HashingPool(workers=1, queue_size=1)
+    release = Event()
+
+    async def burst():
+        admitted = [asyncio.create_task(pool.run(release.wait, 5)) for _ in range(2)]
+        await asyncio.sleep(0.05)
+        with pytest.raises(HTTPException) as rejected:
+            await pool.run(release.wait, 5)
+        release.set()
+        await asyncio.gather(*admitted)
+        return rejected.value
+
+    rejected = asyncio.run(burst())
+    assert rejected.status_code == 503
+    assert pool.stats()["rejected"] == 1
+    assert pool.stats()["pending"] == 0
+    pool.shutdown()
@@ -0,0 +1,100 @@
+import json
+
+import pytest
+
+from app.body import batch
+from app.database.config import SessionLocal
+from app.models_sql import Calculate, Task
+from tests.conftest import mathematician, user
+
+HEADERS = user("batcher")
+
+
+def test_reports_each_item(client):
+    response = client.post(
+        "/tasks/batch",
+        json=[{"description": "first"}, {"other": 1}, {"description": "third"}],
+        headers=HEADERS,
+    )
+    assert response.status_code == 200
+    report = response.json()
+    assert (report["created"], report["failed"]) == (2, 1)
+    assert [item["status"] for item in report["results"]] == [
+        "created",
+        "failed",
+        "created",
+    ]
+    assert report["results"][1]["errors"][0]["loc"] == ["description"]
+
+    with SessionLocal() as db:
+        for item in report["results"][::2]:
+            assert db.get(Task, item["id"]).username == "batcher"
+
+
+def test_calculation_failures_stay_per_item(client):
+    response = client.post(
+        "/Cal_Sql/batch",
+        json=[
+            {"operation": "add", "numbers": "1,2"},
+            {"operation": "divide", "numbers": "1,0"},
+            {"operation": "add", "numbers": "1,nan"},
+            {"operation": "times", "numbers": "2,3"},
+        ],
+        headers=mathematician("batcher"),
+    )
+    report = response.json()
+    assert [item["status"] for item in report["results"]] == [
+        "created",
+        "failed",
+        "failed",
+        "created",
+    ]
+    assert report["results"][1]["errors"][0]["msg"] == "Cannot divide by zero"
+    with SessionLocal() as db:
+        assert db.get(Calculate, report["results"][3]["id"]).result == 6.0
+
+
+def test_reads_ndjson(client):
+    body = "\n".join(json.dumps({"description": f"line {n}"}) for n in range(3))
+    response = client.post(
+        "/tasks/batch",
+        content=body + "\n\n",
+        headers=dict(HEADERS, **{"Content-Type": "application/x-ndjson"}),
+    )
+    assert response.json()["created"] == 3
+
+
+@pytest.mark.parametrize(
+    "body, detail",
+    [("[]", "batch is empty"), ('{"a": 1}', "batch body must be a list")],
+)
+def test_rejects_bad_bodies(client, body, detail):
+    response = client.post(
+        "/tasks/batch",
+        content=body,
+        headers=dict(HEADERS, **{"Content-Type": "application/json"}),
+    )
+    assert response.status_code == 400
+    assert response.json()["detail"] == detail
+
+
+def test_caps_the_batch_size(client, monkeypatch):
+    monkeypatch.setattr(batch, "MAX_BATCH_SIZE", 3)
+    with SessionLocal() as db:
+        before = db.query(Task).count()
+
+    response = client.post(
+        "/tasks/batch",
+        json=[{"description": f"over {n}"} for n in range(4)],
+        headers=HEADERS,
+    )
+    assert response.status_code == 413
+
+    with SessionLocal() as db:
+        assert db.query(Task).count() == before
+    at_cap = client.post(
+        "/tasks/batch",
+        json=[{"description": f"cap {n}"} for n in range(3)],
+        headers=HEADERS,
+    )
+    assert at_cap.json()["created"] == 3
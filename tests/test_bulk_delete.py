@@ -0,0 +1,58 @@
+from sqlalchemy import event, func, select
+
+from app.body.bulk_delete import clear_job_status, delete_all
+from app.body.counters import row_count
+from app.database.config import SessionLocal
+from app.models_sql import Calculate, CalculationJob, Task
+from tests.conftest import user
+
+
+def count_rows(db, model) -> int:
+    return db.scalar(select(func.count()).select_from(model.__table__))
+
+
+def test_deletes_in_committed_chunks(db):
+    db.add_all(Task(description=f"chunk {n}", nationality="n") for n in range(7))
+    db.commit()
+    total = count_rows(db, Task)
+    commits = []
+    event.listen(db, "after_commit", lambda session: commits.append(1))
+
+    assert delete_all(db, Task, chunk_size=3) == total
+    assert len(commits) == -(-total // 3)
+    assert count_rows(db, Task) == 0
+    assert row_count(db, Task) == row_count(db, Task, exact=True) == 0
+
+
+def test_jobs_lose_their_reference_to_deleted_calculations(db):
+    calc = Calculate(mathematician="bulk", operation="add", result=1.0)
+    db.add(calc)
+    db.flush()
+    job = CalculationJob(id="bulk-job", status="done", calculation_id=calc.id)
+    db.add(job)
+    db.commit()
+
+    delete_all(db, Calculate, chunk_size=1)
+    db.expire_all()
+    assert db.get(CalculationJob, "bulk-job").calculation_id is None
+    assert row_count(db, Calculate) == count_rows(db, Calculate) == 0
+
+
+def test_background_clear_reports_from_the_table(client, db):
+    headers = user("clearer")
+    for n in range(3):
+        client.post("/tasks/create", params={"description": f"bg {n}"}, headers=headers)
+    total = count_rows(db, Task)
+
+    job = client.delete(
+        "/tasks/clear_all", params={"background": True}, headers=headers
+    )
+    job_id = job.json()["job_id"]
+    # any worker answers, the status lives in the database
+    with SessionLocal() as other:
+        assert clear_job_status(other, job_id)["status"] == "done"
+    status = client.get(f"/tasks/clear_all/{job_id}", headers=headers).json()
+    assert status["status"] == "done"
+    assert status["deleted"] == total
+    assert row_count(db, Task) == count_rows(db, Task) == 0
+    assert client.get("/tasks/clear_all/nope", headers=headers).status_code == 404
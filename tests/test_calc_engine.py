@@ -0,0 +1,79 @@
+from fastapi import HTTPException
+import numpy as np
+import pytest
+
+from app.body.calc_engine import (
+    calculate,
+    format_numbers,
+    pack_numbers,
+    parse_numbers,
+    unpack_numbers,
+)
+
+VALUES = "9, 3,1"
+
+
+@pytest.mark.parametrize(
+    "operation, expected",
+    [
+        ("add", 13.0),
+        ("minus", 5.0),
+        ("times", 27.0),
+        ("product", 27.0),
+        ("divide", 3.0),
+        ("sqrt", 3.0),
+        ("mean", 13 / 3),
+        ("std", np.std([9.0, 3.0, 1.0])),
+        ("min", 1.0),
+        ("max", 9.0),
+        ("sqrt_each", [3.0, 3**0.5, 1.0]),
+        ("a - b * c", 6.0),
+    ],
+)
+def test_operations(operation, expected):
+    assert calculate(operation, parse_numbers(VALUES)) == pytest.approx(expected)
+
+
+@pytest.mark.parametrize(
+    "numbers", ["", "  ", "1,2,", "1, 2 ,", "1,,2", "one,2", "nan", "1,inf", "-inf"]
+)
+def test_rejects_bad_numbers(numbers):
+    with pytest.raises(HTTPException) as error:
+        parse_numbers(numbers)
+    assert error.value.status_code == 400
+
+
+def test_rejects_overflowing_literals():
+    with pytest.raises(HTTPException) as error:
+        parse_numbers("1e400")
+    assert error.value.status_code == 400
+
+
+@pytest.mark.parametrize(
+    "operation, numbers",
+    [
+        ("times", "1e200,1e200"),
+        ("add", "1e308,1e308"),
+        ("a * b", "1e200,1e200"),
+        ("a ** b", "10,400"),
+    ],
+)
+def test_overflow_is_a_client_error(operation, numbers):
+    with pytest.raises(HTTPException) as error:
+        calculate(operation, parse_numbers(numbers))
+    assert error.value.status_code == 400
+
+
+@pytest.mark.parametrize(
+    "operation, numbers",
+    [("divide", "1,0"), ("sqrt", "-4"), ("sqrt_each", "4,-1"), ("cube", "2")],
+)
+def test_invalid_operations(operation, numbers):
+    with pytest.raises(HTTPException) as error:
+        calculate(operation, parse_numbers(numbers))
+    assert error.value.status_code == 400
+
+
+def test_numbers_round_trip():
+    values = parse_numbers("1, 2.5,-3,1e20")
+    assert format_numbers(unpack_numbers(pack_numbers(values))) == "1,2.5,-3,1e+20"
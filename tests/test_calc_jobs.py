@@ -0,0 +1,150 @@
+from threading import Thread
+import time
+
+import pytest
+
+from app.body.calc_jobs import SQLiteBroker
+from app.database.config import SessionLocal
+from app.models_sql import CalculationJob
+from app.routes import calculations_sql
+from tests.conftest import mathematician
+
+HEADERS = mathematician("jobber")
+
+
+def wait_for(check, timeout: float = 5):
+    deadline = time.monotonic() + timeout
+    while not check():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.02)
+
+
+@pytest.fixture
+def broker(tmp_path):
+    return SQLiteBroker(
+        path=str(tmp_path / "queue.db"), workers=0, lease=0.5, max_attempts=2
+    )
+
+
+def test_lease_hides_a_claimed_job_until_it_runs_out(broker):
+    broker.submit("job-a")
+    assert broker.claim() == ("job-a", 1)
+    assert broker.claim() is None
+
+    time.sleep(0.25)
+    broker.renew("job-a")
+    time.sleep(0.35)
+    assert broker.claim() is None
+
+    time.sleep(0.25)
+    assert broker.claim() == ("job-a", 2)
+    broker.finish("job-a")
+    time.sleep(0.6)
+    assert broker.claim() is None
+
+
+def test_submitting_twice_queues_once(broker):
+    broker.submit("job-b")
+    broker.submit("job-b")
+    assert broker.claim() == ("job-b", 1)
+    assert broker.claim() is None
+
+
+def test_job_of_dead_workers_fails_after_max_attempts(broker):
+    with SessionLocal() as db:
+        db.add(
+            CalculationJob(
+                id="abandoned", mathematician="jobber", operation="add", numbers="1,2"
+            )
+        )
+        db.commit()
+    broker.submit("abandoned")
+    for _ in range(broker.max_attempts):
+        assert broker.claim() is not None
+        time.sleep(0.6)
+
+    worker = Thread(target=broker.work, daemon=True)
+    worker.start()
+    try:
+        wait_for(lambda: not broker._execute("SELECT job_id FROM calculation_queue"))
+    finally:
+        broker.stop()
+        worker.join(5)
+
+    with SessionLocal() as db:
+        job = db.get(CalculationJob, "abandoned")
+        assert job.status == "failed"
+        assert job.error == "abandoned by 2 workers"
+
+
+def test_worker_runs_a_leased_job(broker):
+    with SessionLocal() as db:
+        db.add(
+            CalculationJob(
+                id="leased", mathematician="jobber", operation="add", numbers="1,2,3"
+            )
+        )
+        db.commit()
+    broker.submit("leased")
+    worker = Thread(target=broker.work, daemon=True)
+    worker.start()
+    try:
+        wait_for(lambda: not broker._execute("SELECT job_id FROM calculation_queue"))
+    finally:
+        broker.stop()
+        worker.join(5)
+
+    with SessionLocal() as db:
+        job = db.get(CalculationJob, "leased")
+        assert (job.status, job.result) == ("done", "6.0")
+        assert job.calculation_id is not None
+
+
+def job_status(client, job_id):
+    return client.get(f"/Cal_Sql/jobs/{job_id}", headers=HEADERS).json()
+
+
+def test_inputs_at_the_threshold_are_queued(client, monkeypatch):
+    monkeypatch.setattr(calculations_sql, "CALC_JOB_THRESHOLD", 3)
+
+    small = client.post(
+        "/Cal_Sql/calculate",
+        params={"operation": "add", "numbers": "1,2"},
+        headers=HEADERS,
+    )
+    assert small.status_code == 200
+    assert small.json()["data"] == 3.0
+
+    large = client.post(
+        "/Cal_Sql/calculate",
+        params={"operation": "add", "numbers": "1,2,3"},
+        headers=HEADERS,
+    )
+    assert large.status_code == 202
+    job_id = large.json()["job_id"]
+    wait_for(lambda: job_status(client, job_id)["status"] == "done")
+    assert job_status(client, job_id)["result"] == 6.0
+
+    report = client.post(
+        "/Cal_Sql/batch",
+        json=[
+            {"operation": "add", "numbers": "1,2"},
+            {"operation": "add", "numbers": "1,2,3,4"},
+        ],
+        headers=HEADERS,
+    ).json()
+    assert [item["status"] for item in report["results"]] == ["created", "queued"]
+    queued = report["results"][1]["job_id"]
+    wait_for(lambda: job_status(client, queued)["status"] == "done")
+    assert job_status(client, queued)["result"] == 10.0
+
+
+def test_failing_job_reports_its_error(client):
+    response = client.post(
+        "/Cal_Sql/calculate",
+        params={"operation": "divide", "numbers": "1,0", "background": True},
+        headers=HEADERS,
+    )
+    job_id = response.json()["job_id"]
+    wait_for(lambda: job_status(client, job_id)["status"] == "failed")
+    assert job_status(client, job_id)["error"] == "Cannot divide by zero"
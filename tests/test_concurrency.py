@@ -0,0 +1,58 @@
+import asyncio
+from threading import get_ident
+import time
+
+from sqlalchemy.util import greenlet_spawn
+
+from app.body.concurrency import off_loop
+from app.body.entity_cache import EntityCache, MemoryBackend
+from app.models_sql import Task
+
+
+def run_beside_ticker(func, *args):
+    """Run ``func`` the way an async route body runs, counting loop ticks."""
+
+    async def main():
+        ticks = []
+
+        async def ticker():
+            while True:
+                ticks.append(1)
+                await asyncio.sleep(0.01)
+
+        task = asyncio.create_task(ticker())
+        result = await greenlet_spawn(func, *args)
+        task.cancel()
+        return result, len(ticks)
+
+    return asyncio.run(main())
+
+
+def test_off_loop_keeps_the_loop_serving():
+    loop_thread = get_ident()
+
+    def blocking():
+        time.sleep(0.2)
+        return get_ident()
+
+    thread, ticks = run_beside_ticker(off_loop, blocking)
+    assert thread != loop_thread
+    assert ticks >= 5
+
+
+def test_off_loop_outside_async_routes_calls_directly():
+    assert off_loop(get_ident) == get_ident()
+
+
+def test_entity_cache_loads_off_the_loop():
+    loop_thread = get_ident()
+    threads = []
+
+    def load(session):
+        threads.append(get_ident())
+        return b"row"
+
+    cache = EntityCache(MemoryBackend())
+    body, _ = run_beside_ticker(cache.fetch, None, Task, 1, load)
+    assert body == b"row"
+    assert threads and threads[0] != loop_thread
@@ -0,0 +1,64 @@
+from app.body.counters import COUNTED, rebuild_counters, row_count
+from app.models_sql import Market, Task
+from tests.conftest import user
+
+HEADERS = user("counter")
+
+
+def assert_counts_match(db):
+    db.expire_all()
+    for model in COUNTED:
+        assert row_count(db, model) == row_count(db, model, exact=True)
+    for complete in (True, False):
+        assert row_count(db, Task, complete=complete) == row_count(
+            db, Task, exact=True, complete=complete
+        )
+
+
+def test_counters_follow_every_write_path(client, db):
+    for n in range(4):
+        client.post(
+            "/tasks/create", params={"description": f"count {n}"}, headers=HEADERS
+        )
+    assert_counts_match(db)
+
+    ids = [task.id for task in db.query(Task.id).order_by(Task.id)]
+    client.get(f"/tasks/mark_complete{ids[0]}", headers=HEADERS)
+    client.get(f"/tasks/mark_complete{ids[1]}", headers=HEADERS)
+    assert_counts_match(db)
+    assert row_count(db, Task, complete=True) >= 2
+
+    client.delete(f"/tasks/erase/{ids[0]}", headers=HEADERS)
+    assert_counts_match(db)
+
+    response = client.post(
+        "/tasks/batch",
+        json=[{"description": "batch a"}, {"description": "batch b"}],
+        headers=HEADERS,
+    )
+    assert response.status_code == 200
+    db.add(Market(section=990, developer_name="d", trade="t", taxes="x", union="u"))
+    db.commit()
+    assert_counts_match(db)
+
+    completed = client.get("/tasks/completed_tasks", headers=HEADERS).json()
+    assert completed["total completed"] == row_count(db, Task, complete=True)
+
+    client.delete("/tasks/clear_all", headers=HEADERS)
+    assert_counts_match(db)
+    assert row_count(db, Task) == 0
+
+
+def test_rebuild_matches_the_maintained_counts(db):
+    db.add_all(
+        Task(description=f"rebuild {n}", nationality="n", complete=n % 2 == 0)
+        for n in range(5)
+    )
+    db.commit()
+    before = {flag: row_count(db, Task, complete=flag) for flag in (True, False)}
+    rebuild_counters(db, Task)
+    db.commit()
+    assert {
+        flag: row_count(db, Task, complete=flag) for flag in (True, False)
+    } == before
+    assert_counts_match(db)
@@ -0,0 +1,105 @@
+from threading import Event, Thread
+import time
+
+import pytest
+
+from app.body.entity_cache import EntityCache, MemoryBackend, RedisBackend
+from app.database.config import SessionLocal
+from app.models_sql import Task
+from tests.fake_redis import FakeRedis
+
+
+@pytest.fixture(params=["memory", "redis"])
+def make_cache(request):
+    """Build caches that share one backend, as workers sharing Redis do."""
+    backend = MemoryBackend() if request.param == "memory" else None
+    client = FakeRedis()
+
+    def make():
+        return EntityCache(backend or RedisBackend(client))
+
+    return make
+
+
+def test_caches_rows_and_misses(make_cache, db):
+    cache = make_cache()
+    loads = []
+
+    def load(session):
+        loads.append(1)
+        return b"row"
+
+    assert cache.fetch(db, Task, 1, load) == b"row"
+    assert cache.fetch(db, Task, 1, load) == b"row"
+    assert cache.fetch(db, Task, 2, lambda session: None) is None
+    assert cache.fetch(db, Task, 2, load) is None
+    assert len(loads) == 1
+    assert cache.stats()["hits"] == 2
+
+
+def test_evicts_keys_and_tables(make_cache, db):
+    cache = make_cache()
+    for value in (1, 2, 3):
+        cache.fetch(db, Task, value, lambda session: b"old")
+
+    cache.evict(keys=["tasks:1"])
+    assert cache.fetch(db, Task, 1, lambda session: b"new") == b"new"
+    assert cache.fetch(db, Task, 2, lambda session: b"new") == b"old"
+
+    cache.evict(tables=["tasks"])
+    assert cache.fetch(db, Task, 2, lambda session: b"new") == b"new"
+    assert cache.fetch(db, Task, 3, lambda session: b"new") == b"new"
+
+
+def test_concurrent_misses_share_one_load(make_cache):
+    cache = make_cache()
+    release = Event()
+    loads = []
+    bodies = []
+
+    def load(session):
+        loads.append(1)
+        release.wait(5)
+        return b"row"
+
+    def read():
+        with SessionLocal() as session:
+            bodies.append(cache.fetch(session, Task, 7, load))
+
+    threads = [Thread(target=read) for _ in range(10)]
+    for thread in threads:
+        thread.start()
+    time.sleep(0.2)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert len(loads) == 1
+    assert bodies == [b"row"] * 10
+
+
+@pytest.mark.parametrize("scope", ["key", "table"])
+def test_write_during_load_keeps_stale_body_out(make_cache, db, scope):
+    reader, writer = make_cache(), make_cache()
+    loading, written = Event(), Event()
+
+    def slow_load(session):
+        loading.set()
+        written.wait(5)
+        return b"before write"
+
+    def read():
+        with SessionLocal() as session:
+            reader.fetch(session, Task, 1, slow_load)
+
+    thread = Thread(target=read)
+    thread.start()
+    loading.wait(5)
+    if scope == "key":
+        writer.evict(keys=["tasks:1"])
+    else:
+        writer.evict(tables=["tasks"])
+    written.set()
+    thread.join()
+
+    assert writer.fetch(db, Task, 1, lambda session: b"after write") == (b"after write")
@@ -0,0 +1,64 @@
+from contextlib import contextmanager
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.database.config import SessionLocal
+from app.models_sql import Task
+from tests.conftest import user
+
+HEADERS = user("tagger")
+PATH = "/tasks/retrieve_all"
+
+
+@contextmanager
+def statements():
+    seen = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        seen.append(statement)
+
+    event.listen(Engine, "before_cursor_execute", record)
+    try:
+        yield seen
+    finally:
+        event.remove(Engine, "before_cursor_execute", record)
+
+
+def fetch(client, params=None, tag=None):
+    headers = dict(HEADERS, **({"If-None-Match": tag} if tag else {}))
+    return client.get(PATH, params=params, headers=headers)
+
+
+def test_parameter_order_does_not_change_the_tag(client):
+    client.post("/tasks/create", params={"description": "tagged"}, headers=HEADERS)
+    first = client.get(f"{PATH}?limit=5&page=1", headers=HEADERS)
+    second = client.get(f"{PATH}?page=1&limit=5", headers=HEADERS)
+    assert first.headers["ETag"] == second.headers["ETag"]
+    assert fetch(client, {"page": 1, "limit": 6}).headers["ETag"] != (
+        first.headers["ETag"]
+    )
+
+
+def test_matching_tag_answers_304_before_reading_rows(client):
+    client.post("/tasks/create", params={"description": "tagged"}, headers=HEADERS)
+    tag = fetch(client).headers["ETag"]
+
+    with statements() as seen:
+        response = fetch(client, tag=tag)
+    assert response.status_code == 304
+    assert response.headers["ETag"] == tag
+    assert seen and all("table_versions" in statement for statement in seen)
+
+
+def test_write_from_another_session_changes_the_tag(client):
+    client.post("/tasks/create", params={"description": "tagged"}, headers=HEADERS)
+    tag = fetch(client).headers["ETag"]
+
+    with SessionLocal() as other:
+        other.add(Task(description="written elsewhere", nationality="n"))
+        other.commit()
+
+    response = fetch(client, tag=tag)
+    assert response.status_code == 200
+    assert response.headers["ETag"] != tag
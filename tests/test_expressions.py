@@ -0,0 +1,79 @@
+from fastapi import HTTPException
+import numpy as np
+import pytest
+
+from app.body.expressions import (
+    EXPRESSION_MAX_DEPTH,
+    EXPRESSION_MAX_LENGTH,
+    EXPRESSION_MAX_NODES,
+    Expression,
+    compile_expression,
+)
+from tests.conftest import mathematician
+
+
+def rejected(text: str) -> str:
+    with pytest.raises(HTTPException) as error:
+        Expression(text)
+    assert error.value.status_code == 400
+    return error.value.detail
+
+
+def test_evaluates_with_operands_in_alphabetical_order():
+    expression = Expression("(b - a) * sqrt(c) / pi")
+    assert expression.operands == ["a", "b", "c"]
+    assert expression(np.array([1.0, 4.0, 9.0])) == pytest.approx(9 / np.pi)
+
+
+@pytest.mark.parametrize(
+    "text, reason",
+    [
+        ("__import__('os')", "unknown function __import__"),
+        ("__import__", "unknown name __import__"),
+        ("a.__class__", "Attribute is not allowed"),
+        ("(1).real", "Attribute is not allowed"),
+        ("a[0]", "Subscript is not allowed"),
+        ("lambda: 1", "Lambda is not allowed"),
+        ("[a for a in b]", "ListComp is not allowed"),
+        ("'text'", "Constant is not allowed"),
+        ("a if b else c", "IfExp is not allowed"),
+        ("a < b", "Compare is not allowed"),
+        ("open('f')", "unknown function open"),
+        ("sqrt(*a)", "unpacking is not allowed"),
+        ("max(a, key=b)", "unknown function max"),
+        ("x1", "unknown name x1"),
+        ("A", "unknown name A"),
+    ],
+)
+def test_rejects_everything_outside_the_whitelist(text, reason):
+    detail = rejected(text)
+    assert detail.startswith("invalid expression")
+    assert reason in detail
+
+
+def test_caps_depth_nodes_and_length():
+    assert "nested deeper" in rejected("-" * EXPRESSION_MAX_DEPTH + "a")
+    Expression("-" * (EXPRESSION_MAX_DEPTH - 1) + "a")
+
+    assert "terms" in rejected(f"max({','.join(['1'] * EXPRESSION_MAX_NODES)})")
+    Expression(f"max({','.join(['1'] * (EXPRESSION_MAX_NODES - 1))})")
+
+    assert "longer than" in rejected("a" + " " * EXPRESSION_MAX_LENGTH)
+
+
+def test_deeply_nested_input_does_not_crash_the_parser():
+    assert rejected("(" * 5000 + "a" + ")" * 5000)
+
+
+def test_compiled_expressions_are_cached():
+    assert compile_expression("a + b") is compile_expression("a + b")
+
+
+def test_api_answers_400_for_rejected_expressions(client):
+    response = client.post(
+        "/Cal_Sql/calculate",
+        params={"operation": "__import__('os').getcwd()", "numbers": "1"},
+        headers=mathematician("whitelist"),
+    )
+    assert response.status_code == 400
+    assert response.json()["detail"].startswith("invalid expression")
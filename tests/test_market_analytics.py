@@ -0,0 +1,141 @@
+import numpy as np
+import pytest
+from sqlalchemy import select
+
+from app.body.market_analytics import GROUPS, sql_summary
+from app.database.config import SessionLocal
+from app.models_sql import Market
+from tests.conftest import developer
+
+HEADERS = developer("analyst")
+PERCENTILES = [0, 25, 50, 90, 100]
+
+
+@pytest.fixture(scope="module")
+def sections():
+    rows = [
+        ("an-oil", "an-north", "an-low", 3, 10.0),
+        ("an-oil", "an-north", "an-high", 5, 30.0),
+        ("an-oil", "an-south", "an-low", None, 20.0),
+        ("an-grain", "an-south", "an-low", 2, 5.5),
+        ("an-grain", "an-north", "an-high", 7, None),
+        ("an-salt", "an-south", "an-high", 1, 99.0),
+    ]
+    with SessionLocal() as db:
+        markets = [
+            Market(
+                section=9000 + n,
+                developer_name="analyst",
+                trade=trade,
+                union=union,
+                taxes=taxes,
+                traders=traders,
+                sales_per_day=sales,
+            )
+            for n, (trade, union, taxes, traders, sales) in enumerate(rows)
+        ]
+        db.add_all(markets)
+        db.commit()
+        yield
+        for market in markets:
+            db.delete(market)
+        db.commit()
+
+
+def analytics(client, **params):
+    response = client.get(
+        "/market_sections_sql/analytics", params=params, headers=HEADERS
+    )
+    assert response.status_code == 200
+    return response.json()
+
+
+def sql_values(group, metric) -> dict:
+    """Every non-null ``metric`` value per group, straight from the table."""
+    value = getattr(Market, metric)
+    key = getattr(Market, group) if group else None
+    query = select(key if key is not None else Market.id, value).where(
+        Market.section.is_not(None), value.is_not(None)
+    )
+    grouped = {}
+    with SessionLocal() as db:
+        for label, number in db.execute(query):
+            grouped.setdefault(label if key is not None else None, []).append(number)
+    return grouped
+
+
+@pytest.mark.parametrize("metric", ["sales_per_day", "traders"])
+@pytest.mark.parametrize("group", [None, *GROUPS])
+def test_snapshot_groups_match_sql(client, sections, group, metric):
+    params = {"metric": metric, "percentiles": PERCENTILES}
+    if group:
+        params["group_by"] = group
+    body = analytics(client, **params)
+    assert body["engine"] == "numpy"
+
+    with SessionLocal() as db:
+        expected = {row["group"]: row for row in sql_summary(db, group, metric, None)}
+    values = sql_values(group, metric)
+    groups = {row["group"]: row for row in body["groups"]}
+    assert groups.keys() == expected.keys() == values.keys()
+    for label, row in groups.items():
+        sql = expected[label]
+        assert row["count"] == sql["count"]
+        for field in ("sum", "mean", "min", "max"):
+            assert row[field] == pytest.approx(sql[field])
+        if sql["weighted_sales_per_day"] is None:
+            assert row.get("weighted_sales_per_day") is None
+        else:
+            assert row["weighted_sales_per_day"] == pytest.approx(
+                sql["weighted_sales_per_day"]
+            )
+        for percentile in PERCENTILES:
+            assert row["percentiles"][f"p{percentile}"] == pytest.approx(
+                np.percentile(values[label], percentile)
+            )
+    sums = [row["sum"] for row in body["groups"]]
+    assert sums == sorted(sums, reverse=True)
+
+
+def test_top_groups_and_sections_match_sql(client, sections):
+    body = analytics(
+        client, group_by="trade", metric="sales_per_day", top=2, top_sections=3
+    )
+    with SessionLocal() as db:
+        expected = sql_summary(db, "trade", "sales_per_day", 2)
+        best = db.scalars(
+            select(Market.sales_per_day)
+            .where(Market.section.is_not(None), Market.sales_per_day.is_not(None))
+            .order_by(Market.sales_per_day.desc())
+            .limit(3)
+        ).all()
+    assert [row["sum"] for row in body["groups"]] == pytest.approx(
+        [row["sum"] for row in expected]
+    )
+    assert [row["sales_per_day"] for row in body["top_sections"]] == best
+
+
+def test_snapshot_follows_writes(client, sections):
+    before = analytics(client, group_by="trade", percentiles=[50])
+    with SessionLocal() as db:
+        db.add(
+            Market(
+                section=9100,
+                developer_name="analyst",
+                trade="an-new",
+                union="an-north",
+                taxes="an-low",
+                traders=1,
+                sales_per_day=1.0,
+            )
+        )
+        db.commit()
+    try:
+        after = analytics(client, group_by="trade")
+        assert after["engine"] == "sql"
+        assert "an-new" not in [row["group"] for row in before["groups"]]
+        assert "an-new" in [row["group"] for row in after["groups"]]
+    finally:
+        with SessionLocal() as db:
+            db.query(Market).filter(Market.section == 9100).delete()
+            db.commit()
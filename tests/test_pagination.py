@@ -0,0 +1,107 @@
+from datetime import datetime
+
+import pytest
+
+from app.database.config import SessionLocal
+from app.models_sql import Calculate, Task
+from tests.conftest import mathematician, user
+
+HEADERS = mathematician("pager")
+SAME_TIME = datetime(2001, 2, 3, 4, 5, 6)
+
+
+@pytest.fixture(scope="module")
+def tied_calculations():
+    """Calculations sharing one timestamp, so only the id breaks the ties."""
+    with SessionLocal() as db:
+        rows = [
+            Calculate(
+                mathematician="pager",
+                operation="add",
+                result=n,
+                time_of_calculation=SAME_TIME,
+            )
+            for n in range(7)
+        ]
+        rows.append(Calculate(mathematician="pager", operation="add", result=7))
+        db.add_all(rows)
+        db.commit()
+        yield
+        for row in rows:
+            db.delete(row)
+        db.commit()
+
+
+def walk(client, path, rows_key, headers, limit, direction="next", cursor=None):
+    """Follow one kind of cursor until it runs out, returning ids and bodies."""
+    ids, bodies = [], []
+    while True:
+        params = (
+            {"limit": limit} if cursor is None else {"limit": limit, "cursor": cursor}
+        )
+        body = client.get(path, params=params, headers=headers).json()
+        bodies.append(body)
+        ids.append([row["id"] for row in body[rows_key]])
+        cursor = body.get(f"{direction}_cursor")
+        if cursor is None:
+            return ids, bodies
+
+
+def test_recent_walks_both_ways_with_ties(client, tied_calculations):
+    with SessionLocal() as db:
+        expected = [
+            row.id
+            for row in db.query(Calculate.id).order_by(
+                Calculate.time_of_calculation.desc(), Calculate.id.desc()
+            )
+        ]
+    path, key = "/Cal_Sql/recent_Calculations", "most recent calculation"
+
+    pages, bodies = walk(client, path, key, HEADERS, limit=3)
+    assert sum(pages, []) == expected
+    assert "page" in bodies[0]
+    assert all("page" not in body for body in bodies[1:])
+
+    last = bodies[-1]
+    back = client.get(
+        path, params={"limit": 3, "cursor": last["prev_cursor"]}, headers=HEADERS
+    ).json()
+    assert [row["id"] for row in back[key]] == pages[-2]
+
+    start = client.get(
+        path,
+        params={"limit": 3, "cursor": bodies[1]["prev_cursor"]},
+        headers=HEADERS,
+    ).json()
+    assert [row["id"] for row in start[key]] == pages[0]
+    assert start["prev_cursor"] is None
+
+
+def test_backward_walk_mirrors_forward_walk(client, tied_calculations):
+    path, key = "/Cal_Sql/recent_Calculations", "most recent calculation"
+    forward, bodies = walk(client, path, key, HEADERS, limit=2)
+    backward, _ = walk(
+        client,
+        path,
+        key,
+        HEADERS,
+        limit=2,
+        direction="prev",
+        cursor=bodies[-1]["prev_cursor"],
+    )
+    assert sum(reversed(backward), []) == sum(forward[:-1], [])
+
+
+def test_task_cursor_pages_omit_page(client):
+    headers = user("pager")
+    for n in range(5):
+        client.post(
+            "/tasks/create", params={"description": f"page {n}"}, headers=headers
+        )
+    with SessionLocal() as db:
+        expected = [row.id for row in db.query(Task.id).order_by(Task.id)]
+
+    pages, bodies = walk(client, "/tasks/retrieve_all", "tasks", headers, limit=2)
+    assert sum(pages, []) == expected
+    assert bodies[0]["page"] == 1
+    assert all("page" not in body for body in bodies[1:])
@@ -0,0 +1,105 @@
+import os
+import tempfile
+
+from fastapi import Depends, FastAPI, Response
+from fastapi.testclient import TestClient
+import pytest
+
+from app.body.dependencies import db_session
+from app.body.dependencies.db_session import (
+    READ_PRIMARY_COOKIE,
+    get_read_db,
+    get_write_db,
+    read_your_writes,
+)
+from app.database import replicas
+
+app = FastAPI()
+app.middleware("http")(read_your_writes)
+
+
+@app.post("/write")
+def write(db=Depends(get_write_db)):
+    return {"replica": bool(db.info.get("replica"))}
+
+
+@app.post("/write_raw")
+def write_raw(db=Depends(get_write_db)):
+    return Response(b"{}", media_type="application/json")
+
+
+@app.get("/read")
+def read(db=Depends(get_read_db)):
+    return {"replica": bool(db.info.get("replica"))}
+
+
+@pytest.fixture
+def replica(monkeypatch):
+    path = os.path.join(tempfile.mkdtemp(), "replica.db")
+    replicas.refresh_local_replica(replica=path)
+    monkeypatch.setattr(
+        replicas,
+        "replica_sessions",
+        [replicas.replica_sessionmaker(f"sqlite:///{path}")],
+    )
+    db_session.recent_writers.clear()
+
+
+def reads_replica(client, **headers) -> bool:
+    return client.get("/read", headers=headers).json()["replica"]
+
+
+def test_reads_go_to_the_replica(replica):
+    assert reads_replica(TestClient(app))
+
+
+def test_reads_fall_back_to_the_primary_without_replicas(monkeypatch):
+    monkeypatch.setattr(replicas, "replica_sessions", [])
+    assert not reads_replica(TestClient(app))
+
+
+def test_writes_stay_on_the_primary(replica):
+    assert not TestClient(app).post("/write").json()["replica"]
+
+
+def test_writer_reads_its_writes_from_the_primary(replica):
+    writer = TestClient(app)
+    writer.post("/write", headers={"Authorization": "Bearer writer"})
+    assert not reads_replica(writer, Authorization="Bearer writer")
+    assert reads_replica(TestClient(app), Authorization="Bearer reader")
+
+
+def test_window_follows_the_client_to_other_workers(replica):
+    writer = TestClient(app)
+    writer.post("/write", headers={"Authorization": "Bearer writer"})
+    # another worker never saw the write, only the cookie tells it
+    db_session.recent_writers.clear()
+    assert not reads_replica(writer, Authorization="Bearer writer")
+
+    writer.cookies.clear()
+    assert reads_replica(writer, Authorization="Bearer writer")
+
+
+def test_window_ends(replica, monkeypatch):
+    writer = TestClient(app)
+    writer.post("/write")
+    db_session.recent_writers.clear()
+    now = db_session.time.time()
+    monkeypatch.setattr(
+        db_session.time,
+        "time",
+        lambda: now + replicas.READ_YOUR_WRITES_SECONDS + 1,
+    )
+    assert reads_replica(writer)
+
+
+def test_window_survives_routes_returning_their_own_response(replica):
+    writer = TestClient(app)
+    response = writer.post("/write_raw")
+    assert READ_PRIMARY_COOKIE in response.cookies
+    db_session.recent_writers.clear()
+    assert not reads_replica(writer)
+
+
+def test_reads_do_not_open_a_window(replica):
+    assert READ_PRIMARY_COOKIE not in TestClient(app).get("/read").cookies
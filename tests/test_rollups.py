@@ -0,0 +1,77 @@
+from sqlalchemy import text
+
+from app.body.rollups import rebuild_rollups
+from app.models_sql import Calculate
+from tests.conftest import mathematician
+
+NAME = "rollup-tester"
+FIELDS = ("operation", "day", "count", "result_count", "sum", "min", "max")
+
+
+def from_stats(client) -> list[dict]:
+    response = client.get(
+        "/Cal_Sql/stats",
+        params={"group_by": ["operation", "day"], "mathematician": NAME},
+        headers=mathematician(NAME),
+    )
+    assert response.status_code == 200
+    return [
+        {name: group[name] for name in FIELDS} for group in response.json()["groups"]
+    ]
+
+
+def from_sql(db) -> list[dict]:
+    rows = db.execute(
+        text(
+            "SELECT operation, coalesce(date(time_of_calculation), '1970-01-01'), "
+            "count(*), count(result), coalesce(sum(result), 0.0), min(result), "
+            "max(result) FROM calculations WHERE mathematician = :name "
+            "GROUP BY 1, 2 ORDER BY 1, 2"
+        ),
+        {"name": NAME},
+    ).all()
+    return [dict(zip(FIELDS, row)) for row in rows]
+
+
+def calculate(client, operation: str, numbers: str):
+    response = client.post(
+        "/Cal_Sql/calculate",
+        params={"operation": operation, "numbers": numbers},
+        headers=mathematician(NAME),
+    )
+    assert response.status_code == 200
+
+
+def test_stats_match_sql_through_insert_delete_and_rebuild(client, db):
+    calculate(client, "add", "1,2")
+    calculate(client, "add", "10,20")
+    calculate(client, "mean", "1,2,3")
+    undated = [
+        Calculate(mathematician=NAME, operation="add", result=result)
+        for result in (100.0, -5.0)
+    ]
+    db.add_all(undated)
+    db.flush()
+    for row in undated:
+        row.time_of_calculation = None
+    db.commit()
+    assert from_stats(client) == from_sql(db)
+    assert "1970-01-01" in {group["day"] for group in from_stats(client)}
+
+    # the undated maximum and the dated minimum leave, bounds are read again
+    response = client.delete(
+        f"/Cal_Sql/erase/{undated[0].id}", headers=mathematician(NAME)
+    )
+    assert response.status_code == 200
+    first = db.scalar(
+        text("SELECT min(id) FROM calculations WHERE mathematician = :name"),
+        {"name": NAME},
+    )
+    client.delete(f"/Cal_Sql/erase/{first}", headers=mathematician(NAME))
+    db.expire_all()
+    assert from_stats(client) == from_sql(db)
+
+    before = from_stats(client)
+    rebuild_rollups(db)
+    db.commit()
+    assert from_stats(client) == before == from_sql(db)
@@ -0,0 +1,81 @@
+import pytest
+
+from app.body.search import fts_available, fts_searchable
+from app.database.config import SessionLocal
+from app.models_sql import Calculate, Task
+from tests.conftest import mathematician, user
+
+HEADERS = mathematician("searcher")
+
+
+@pytest.fixture(scope="module")
+def operations():
+    with SessionLocal() as db:
+        rows = [
+            Calculate(mathematician="searcher", username="searcher", operation=op)
+            for op in ("+", "*", "/", "a+b", "sqrtzz")
+        ]
+        db.add_all(rows)
+        db.commit()
+        yield
+        for row in rows:
+            db.delete(row)
+        db.commit()
+
+
+def operations_found(client, operation, **params):
+    response = client.get(
+        "/Cal_Sql/filter",
+        params={"operation": operation, **params},
+        headers=HEADERS,
+    )
+    assert response.status_code == 200
+    body = response.json()
+    return sorted(row["operation"] for row in body.get("result", []))
+
+
+def test_only_tokenizable_terms_use_fts():
+    assert fts_searchable({"operation": "add"})
+    assert fts_searchable({"trade": "a+b", "union": None})
+    assert not fts_searchable({"operation": "+"})
+    assert not fts_searchable({"trade": "oil", "union": "*"})
+    assert not fts_searchable({"description": ""})
+
+
+@pytest.mark.parametrize("operation", ["+", "*", "/"])
+def test_symbol_only_terms_match_substrings(client, operations, operation):
+    found = operations_found(client, operation)
+    assert found
+    assert found == operations_found(client, operation, mode="substring")
+    assert operation in found
+
+
+def test_mixed_terms_match_by_word(client, operations):
+    assert operations_found(client, "a+b") == ["a+b"]
+    assert operations_found(client, "sqrt") == ["sqrtzz"]
+
+
+def test_index_follows_updates_and_deletes(client, db):
+    headers = user("fts writer")
+    client.post("/tasks/create", params={"description": "quokkafirst"}, headers=headers)
+
+    def search(term):
+        response = client.get(
+            "/tasks/search", params={"description": term}, headers=headers
+        )
+        return [row["description"] for row in response.json().get("results", [])]
+
+    assert search("quokka") == ["quokkafirst"]
+    task = db.query(Task).filter(Task.description == "quokkafirst").one()
+    task.description = "wombatafter"
+    db.commit()
+    assert search("quokka") == []
+    assert search("wombat") == ["wombatafter"]
+
+    db.delete(task)
+    db.commit()
+    assert search("wombat") == []
+
+
+def test_index_is_installed(db):
+    assert fts_available(db, Calculate)